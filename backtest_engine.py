@@ -9,11 +9,25 @@ Intraday only: signals expire at end of day.
 
 import pandas as pd
 import numpy as np
-from datetime import datetime, time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, time
+from enum import IntEnum
+import functools
+import hashlib
 import logging
+import multiprocessing
 from typing import Dict, List, Optional
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 import config
 import os
+from backtest_kernels import (HAVE_NUMBA, rolling_mean, rsi_cross_above, rsi_cross_above_batch,
+                              simulate_trade, simulate_signals,
+                              PART_SIZES, EXIT_NONE, EXIT_STOP_LOSS, EXIT_TARGET, EXIT_EOD)
 
 # ============================================
 # LOGGING SETUP
@@ -26,6 +40,144 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# ============================================
+# CONSTANTS (resolved once from config)
+# ============================================
+# Entry level multipliers: base_price * (1 + ENTRY_LEVEL_N_PCT / 100)
+_ENTRY_MULT = (
+    1 + config.ENTRY_LEVEL_1_PCT / 100,
+    1 + config.ENTRY_LEVEL_2_PCT / 100,
+    1 + config.ENTRY_LEVEL_3_PCT / 100,
+)
+
+# SL / TP multipliers on the average entry price
+_SL_MULT = 1 + config.STOP_LOSS_PCT / 100
+_TP_MULT = 1 - config.TARGET_PCT / 100
+
+# Instrument <-> int id, and lot size indexed by id
+_INSTRUMENT_CODES = {name: i for i, name in enumerate(config.LOT_SIZE)}
+_INSTRUMENT_NAMES = np.array(list(_INSTRUMENT_CODES), dtype=object)
+_LOT_SIZE_LUT = np.array([config.LOT_SIZE[name] for name in _INSTRUMENT_CODES], dtype=np.int32)
+
+
+# Columns that identify one option contract
+CONTRACT_KEYS = ['strike', 'option_type', 'expiry_type', 'expiry_code']
+
+
+# ============================================
+# CODES (int codes, names only at export)
+# ============================================
+class ExitReason(IntEnum):
+    """Why a trade was closed (values match backtest_kernels.EXIT_*)."""
+    NONE = EXIT_NONE
+    STOP_LOSS = EXIT_STOP_LOSS
+    TARGET = EXIT_TARGET
+    EOD = EXIT_EOD
+
+
+class Status(IntEnum):
+    """Trade lifecycle state."""
+    WAITING_ENTRY = 0
+    PARTIAL_POSITION = 1
+    FULL_POSITION = 2
+    CLOSED = 3
+
+
+class OptionType(IntEnum):
+    """Option side."""
+    CE = 0
+    PE = 1
+
+
+# Code -> name lookup tables for export
+_EXIT_REASON_NAMES = np.array([r.name if r else None for r in ExitReason], dtype=object)
+_STATUS_NAMES = np.array([s.name for s in Status], dtype=object)
+_OPTION_TYPE_NAMES = np.array([o.name for o in OptionType], dtype=object)
+
+# Fixed vocabularies for the report frame's low-cardinality columns
+_EXIT_REASON_DTYPE = pd.CategoricalDtype([r.name for r in ExitReason if r])
+_OPTION_TYPE_DTYPE = pd.CategoricalDtype(list(_OPTION_TYPE_NAMES))
+
+# Category codes of the summary's exit-reason rows, in table order
+_SUMMARY_REASON_CODES = np.array(
+    [_EXIT_REASON_DTYPE.categories.get_loc(r) for r in ('TARGET', 'STOP_LOSS', 'EOD')])
+
+
+# Log labels for a minute without ATM rows
+_NO_ATM_LABELS = ("--", "--", "--", "--")
+
+
+def _yyyymmdd_to_date(key: int) -> date:
+    """int yyyymmdd (the 'date' column) -> datetime.date."""
+    key = int(key)
+    return date(key // 10000, key // 100 % 100, key % 100)
+
+
+def _pct(n, d) -> float:
+    """
+    n as a percentage of d; 0.0 when d is 0 (empty run). Kept as n / d * 100:
+    n * (100 / d) can round differently to 0.1 on exact halves (15/48).
+    """
+    return n / d * 100 if d else 0.0
+
+
+# ============================================
+# RSI CACHE (memory + disk)
+# ============================================
+# Part of every cache key: bump when a cached function's results change
+# (e.g. an RSI kernel fix) so .npz files from older code are not reused
+CACHE_VERSION = 1
+
+
+def disk_cache(cache_dir: Optional[str], maxsize: int = 256):
+    """
+    Memoize a function of (prices array, *args) that returns a tuple of
+    arrays. Keyed by the SHA256 of the function's qualified name,
+    CACHE_VERSION, the prices and any array args, plus the scalar args.
+    An in-process LRU of `maxsize` entries sits in front of one .npz
+    file per key under `cache_dir` (None = memory only).
+    """
+    def decorator(func):
+        memory = OrderedDict()
+        salt = f"{func.__qualname__}:{CACHE_VERSION}".encode()
+
+        @functools.wraps(func)
+        def wrapper(prices: np.ndarray, *args):
+            digest = hashlib.sha256(salt)
+            digest.update(prices.tobytes())
+            for a in args:
+                if isinstance(a, np.ndarray):
+                    digest.update(a.tobytes())
+            key = digest.hexdigest() + ''.join(
+                f"_{a}" for a in args if not isinstance(a, np.ndarray))
+
+            # L1: in-process
+            if key in memory:
+                memory.move_to_end(key)
+                return memory[key]
+
+            # L2: disk
+            path = os.path.join(cache_dir, f"{key}.npz") if cache_dir else None
+            if path and os.path.exists(path):
+                with np.load(path) as data:
+                    result = tuple(data[f"arr_{i}"] for i in range(len(data.files)))
+            else:
+                result = func(prices, *args)
+                if path:
+                    os.makedirs(cache_dir, exist_ok=True)
+                    tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+                    np.savez(tmp_path, *result)
+                    os.replace(tmp_path, path)
+
+            memory[key] = result
+            if len(memory) > maxsize:
+                memory.popitem(last=False)
+            return result
+
+        return wrapper
+    return decorator
+
+
 # ============================================
 # RSI CALCULATOR
 # ============================================
@@ -33,17 +185,75 @@ class RSICalculator:
     """Calculate RSI indicator."""
 
     @staticmethod
-    def calculate_rsi(prices: pd.Series, period: int = 14) -> pd.Series:
+    def calculate_rsi(prices: np.ndarray, period: int = 14) -> np.ndarray:
         """
         Standard RSI using rolling mean of gains/losses.
-        Returns a Series of RSI values (NaN for first `period` rows).
+        Takes a float64 price array and returns an array of RSI values
+        (NaN for first `period` rows).
         """
-        delta = prices.diff()
-        gain = delta.where(delta > 0, 0).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        return rsi
+        delta = np.empty_like(prices)
+        delta[0] = 0.0
+        np.subtract(prices[1:], prices[:-1], out=delta[1:])
+        gain = np.where(delta > 0, delta, 0.0)
+        loss = np.where(delta < 0, -delta, 0.0)
+
+        # Same SMA definition as the live bot
+        if HAVE_NUMBA:
+            avg_gain = rolling_mean(gain, period)
+            avg_loss = rolling_mean(loss, period)
+        else:
+            # Both windows in one rolling call
+            avg = pd.DataFrame({'gain': gain, 'loss': loss}).rolling(window=period).mean().to_numpy()
+            avg_gain, avg_loss = avg[:, 0], avg[:, 1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return 100 - 100 / (1 + avg_gain / avg_loss)
+
+    @staticmethod
+    def rsi_cross_above(prices: np.ndarray, threshold: float = 70, period: int = 14):
+        """
+        RSI plus the indices where it crosses above `threshold`
+        (previous RSI <= threshold and current RSI > threshold).
+        Returns (rsi, cross_idx).
+        """
+        if HAVE_NUMBA:
+            return rsi_cross_above(prices, period, float(threshold))
+        rsi = RSICalculator.calculate_rsi(prices, period)
+        cross = (rsi[:-1] <= threshold) & (rsi[1:] > threshold)
+        return rsi, np.flatnonzero(cross) + 1
+
+    @staticmethod
+    @disk_cache(config.BACKTEST_RSI_CACHE_DIR)
+    def rsi_cross_above_batch(prices: np.ndarray, offsets: np.ndarray,
+                              threshold: float = 70, period: int = 14):
+        """
+        rsi_cross_above() for many series in one call. Series k is
+        prices[offsets[k]:offsets[k + 1]]. Returns (rsi, cross) where
+        cross is a boolean mask of crossing bars. Results are cached.
+        """
+        if HAVE_NUMBA:
+            return rsi_cross_above_batch(prices, offsets, period, float(threshold))
+
+        # One grouped rolling call over all series (no per-series loop, no padding)
+        starts = offsets[:-1]
+        lengths = np.diff(offsets)
+        gid = np.repeat(np.arange(len(lengths)), lengths)
+
+        delta = np.empty_like(prices)
+        delta[:1] = 0.0
+        np.subtract(prices[1:], prices[:-1], out=delta[1:])
+        delta[starts[starts < len(prices)]] = 0.0   # no delta across series
+        gains = pd.DataFrame({'gain': np.where(delta > 0, delta, 0.0),
+                              'loss': np.where(delta < 0, -delta, 0.0)})
+        # Series are contiguous and in gid order, so the grouped result is in row order
+        avg = gains.groupby(gid, sort=False).rolling(window=period).mean().to_numpy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = 100 - 100 / (1 + avg[:, 0] / avg[:, 1])
+
+        prev = np.empty_like(rsi)
+        prev[:1] = np.nan
+        prev[1:] = rsi[:-1]
+        prev[starts[starts < len(rsi)]] = np.nan
+        return rsi, (prev <= threshold) & (rsi > threshold)
 
 
 # ============================================
@@ -52,6 +262,8 @@ class RSICalculator:
 class PositionPart:
     """One part of a staggered position (33.33% each)."""
 
+    __slots__ = ('part_num', 'entry_time', 'entry_price', 'size_pct')
+
     def __init__(self, part_num: int, entry_time, entry_price: float, size_pct: float):
         self.part_num = part_num       # 1, 2, or 3
         self.entry_time = entry_time   # datetime of fill
@@ -59,6 +271,27 @@ class PositionPart:
         self.size_pct = size_pct       # 33.33 or 33.34
 
 
+# ============================================
+# TRADE PLAN (kernel result for one trade)
+# ============================================
+class TradePlan:
+    """
+    Fills and exit of one trade, resolved up front by simulate_trade()
+    over the contract's bars from the signal minute to exit time.
+    The minute loop applies each event when it reaches that bar's time.
+    """
+
+    __slots__ = ('times', 'high', 'low', 'close',
+                 'fill_i', 'fill_px', 'exit_i', 'exit_px', 'exit_code')
+
+    def __init__(self, times, high, low, close, result):
+        self.times = times   # bar datetimes
+        self.high = high
+        self.low = low
+        self.close = close
+        self.fill_i, self.fill_px, self.exit_i, self.exit_px, self.exit_code = result
+
+
 # ============================================
 # TRADE (complete trade cycle)
 # ============================================
@@ -73,6 +306,14 @@ class Trade:
       4. Exit on SL / TP / EOD (applied to entire position)
     """
 
+    __slots__ = ('signal_time', 'base_price', 'option_type', 'strike',
+                 'expiry_type', 'expiry_code', 'instrument_id',
+                 'entry_level_1', 'entry_level_2', 'entry_level_3',
+                 'parts', 'parts_mask',
+                 'exit_time', 'exit_price', 'exit_reason', 'status',
+                 'total_pnl', 'total_pnl_pct', 'plan',
+                 '_weighted_sum', '_weight_sum', 'avg_entry', 'sl_price', 'tp_price')
+
     def __init__(self, signal_time, base_price: float, option_type: str,
                  strike: float, expiry_type: str, expiry_code: int, instrument: str):
         # Signal info
@@ -82,64 +323,80 @@ class Trade:
         self.strike = strike
         self.expiry_type = expiry_type
         self.expiry_code = expiry_code
-        self.instrument = instrument
+        self.instrument_id = _INSTRUMENT_CODES[instrument]
 
         # Entry levels (sell at these prices)
-        self.entry_level_1 = base_price * (1 + config.ENTRY_LEVEL_1_PCT / 100)
-        self.entry_level_2 = base_price * (1 + config.ENTRY_LEVEL_2_PCT / 100)
-        self.entry_level_3 = base_price * (1 + config.ENTRY_LEVEL_3_PCT / 100)
+        self.entry_level_1 = base_price * _ENTRY_MULT[0]
+        self.entry_level_2 = base_price * _ENTRY_MULT[1]
+        self.entry_level_3 = base_price * _ENTRY_MULT[2]
 
         # Parts tracking
         self.parts: List[PositionPart] = []
-        self.part1_filled = False
-        self.part2_filled = False
-        self.part3_filled = False
+        self.parts_mask = 0   # bit k set = part k+1 filled
+
+        # Running sums for the weighted avg entry (parts are only appended);
+        # avg entry and its SL/TP levels are refreshed on each fill
+        self._weighted_sum = 0.0
+        self._weight_sum = 0.0
+        self.avg_entry: Optional[float] = None
+        self.sl_price: Optional[float] = None
+        self.tp_price: Optional[float] = None
 
         # Exit info
         self.exit_time = None
         self.exit_price = None
-        self.exit_reason = None
-        self.status = 'WAITING_ENTRY'
+        self.exit_reason = ExitReason.NONE
+        self.status = Status.WAITING_ENTRY
 
         # P&L
         self.total_pnl = 0.0
         self.total_pnl_pct = 0.0
 
+        # Kernel result (set by the engine when the signal fires)
+        self.plan: Optional[TradePlan] = None
+
     def add_entry(self, part_num: int, entry_time, entry_price: float, size_pct: float):
         """Fill one part of the staggered entry."""
         part = PositionPart(part_num, entry_time, entry_price, size_pct)
         self.parts.append(part)
-
-        if part_num == 1:
-            self.part1_filled = True
-        elif part_num == 2:
-            self.part2_filled = True
-        elif part_num == 3:
-            self.part3_filled = True
+        self._weighted_sum += entry_price * size_pct
+        self._weight_sum += size_pct
+        self.avg_entry = self._weighted_sum / self._weight_sum
+        self.sl_price = self.avg_entry * _SL_MULT
+        self.tp_price = self.avg_entry * _TP_MULT
+        self.parts_mask |= 1 << (part_num - 1)
 
         # Update status
-        self.status = 'FULL_POSITION' if len(self.parts) == 3 else 'PARTIAL_POSITION'
+        self.status = Status.FULL_POSITION if self.parts_mask.bit_count() == 3 else Status.PARTIAL_POSITION
+
+    @property
+    def part1_filled(self) -> bool:
+        return bool(self.parts_mask & 0b001)
+
+    @property
+    def part2_filled(self) -> bool:
+        return bool(self.parts_mask & 0b010)
+
+    @property
+    def part3_filled(self) -> bool:
+        return bool(self.parts_mask & 0b100)
 
     def get_avg_entry_price(self) -> Optional[float]:
         """Weighted average entry price across filled parts."""
-        if not self.parts:
-            return None
-        total_weighted = sum(p.entry_price * p.size_pct for p in self.parts)
-        total_weight = sum(p.size_pct for p in self.parts)
-        return total_weighted / total_weight if total_weight > 0 else None
+        return self.avg_entry
 
     def has_position(self) -> bool:
         """True if at least one part is filled."""
         return len(self.parts) > 0
 
-    def close_trade(self, exit_time, exit_price: float, exit_reason: str):
+    def close_trade(self, exit_time, exit_price: float, exit_reason: ExitReason):
         """Close entire position. P&L = avg_entry - exit (selling options)."""
         if not self.parts:
             return
         self.exit_time = exit_time
         self.exit_price = exit_price
         self.exit_reason = exit_reason
-        self.status = 'CLOSED'
+        self.status = Status.CLOSED
 
         avg = self.get_avg_entry_price()
         # Selling options: profit when price drops
@@ -148,15 +405,13 @@ class Trade:
 
     def get_money_pnl(self) -> float:
         """Actual money P&L = option price P&L * lot size."""
-        lot_size = config.LOT_SIZE.get(self.instrument, 1)
-        return self.total_pnl * lot_size
+        return self.total_pnl * _LOT_SIZE_LUT[self.instrument_id]
 
     def to_dict(self) -> Dict:
         """Flat dictionary for CSV export."""
-        avg = self.get_avg_entry_price()
-        lot_size = config.LOT_SIZE.get(self.instrument, 1)
-        return {
-            'instrument': self.instrument,
+        lot_size = _LOT_SIZE_LUT[self.instrument_id]
+        row = {
+            'instrument': _INSTRUMENT_NAMES[self.instrument_id],
             'option_type': self.option_type,
             'strike': self.strike,
             'expiry_type': self.expiry_type,
@@ -167,23 +422,156 @@ class Trade:
             'entry_level_2': self.entry_level_2,
             'entry_level_3': self.entry_level_3,
             'parts_filled': len(self.parts),
-            'part1_time': self.parts[0].entry_time if len(self.parts) > 0 else None,
-            'part1_price': self.parts[0].entry_price if len(self.parts) > 0 else None,
-            'part2_time': self.parts[1].entry_time if len(self.parts) > 1 else None,
-            'part2_price': self.parts[1].entry_price if len(self.parts) > 1 else None,
-            'part3_time': self.parts[2].entry_time if len(self.parts) > 2 else None,
-            'part3_price': self.parts[2].entry_price if len(self.parts) > 2 else None,
-            'avg_entry_price': avg,
+            'part1_time': None, 'part1_price': None,
+            'part2_time': None, 'part2_price': None,
+            'part3_time': None, 'part3_price': None,
+            'avg_entry_price': self.get_avg_entry_price(),
             'exit_time': self.exit_time,
             'exit_price': self.exit_price,
-            'exit_reason': self.exit_reason,
+            'exit_reason': _EXIT_REASON_NAMES[self.exit_reason],
             'pnl': self.total_pnl,
             'pnl_pct': self.total_pnl_pct,
             'money_pnl': self.total_pnl * lot_size,
             'lot_size': lot_size,
-            'status': self.status,
+            'status': _STATUS_NAMES[self.status],
+        }
+        # Filled parts only (the rest stay None)
+        for part in self.parts:
+            row[f'part{part.part_num}_time'] = part.entry_time
+            row[f'part{part.part_num}_price'] = part.entry_price
+        return row
+
+
+# ============================================
+# TRADE BOOK (closed trades, columnar)
+# ============================================
+class TradeBook:
+    """
+    Closed trades stored as parallel numpy columns
+    (one row per trade). P&L columns are computed over the whole book
+    at export time instead of per Trade object.
+    """
+
+    FLOAT_COLS = ('strike', 'base_price', 'entry_level_1', 'entry_level_2', 'entry_level_3',
+                  'part1_price', 'part2_price', 'part3_price',
+                  'part1_size', 'part2_size', 'part3_size', 'exit_price')
+    INT_COLS = ('expiry_code', 'parts_filled')
+    CODE_COLS = ('instrument_id', 'option_type_code', 'exit_reason_code', 'status_code')
+    OBJECT_COLS = ('expiry_type', 'signal_time',
+                   'part1_time', 'part2_time', 'part3_time', 'exit_time')
+
+    def __init__(self, capacity: int = 256):
+        self.n = 0
+        self.cols: Dict[str, np.ndarray] = {}
+        self._alloc(capacity)
+
+    def __len__(self) -> int:
+        return self.n
+
+    def _alloc(self, capacity: int):
+        """(Re)allocate all columns with room for `capacity` trades."""
+        new = {}
+        for name in self.FLOAT_COLS:
+            new[name] = np.full(capacity, np.nan)
+        for name in self.INT_COLS:
+            new[name] = np.zeros(capacity, dtype=np.int32)
+        for name in self.CODE_COLS:
+            new[name] = np.zeros(capacity, dtype=np.int8)
+        for name in self.OBJECT_COLS:
+            new[name] = np.full(capacity, None, dtype=object)
+        for name, col in self.cols.items():
+            new[name][:self.n] = col[:self.n]
+        self.cols = new
+        self.capacity = capacity
+
+    def add(self, trade: Trade):
+        """Append one closed trade (at least one part filled) as a new row."""
+        if self.n == self.capacity:
+            self._alloc(self.capacity * 2)
+        i = self.n
+        c = self.cols
+
+        c['instrument_id'][i] = trade.instrument_id
+        c['option_type_code'][i] = OptionType[trade.option_type]
+        c['strike'][i] = trade.strike
+        c['expiry_type'][i] = trade.expiry_type
+        c['expiry_code'][i] = trade.expiry_code
+        c['signal_time'][i] = trade.signal_time
+        c['base_price'][i] = trade.base_price
+        c['entry_level_1'][i] = trade.entry_level_1
+        c['entry_level_2'][i] = trade.entry_level_2
+        c['entry_level_3'][i] = trade.entry_level_3
+
+        # Unfilled parts keep price NaN / size 0 / time None
+        c['parts_filled'][i] = len(trade.parts)
+        for k, part in enumerate(trade.parts, 1):
+            c[f'part{k}_time'][i] = part.entry_time
+            c[f'part{k}_price'][i] = part.entry_price
+            c[f'part{k}_size'][i] = part.size_pct
+        for k in range(len(trade.parts) + 1, 4):
+            c[f'part{k}_size'][i] = 0.0
+
+        c['exit_time'][i] = trade.exit_time
+        c['exit_price'][i] = trade.exit_price
+        c['exit_reason_code'][i] = trade.exit_reason
+        c['status_code'][i] = trade.status
+        self.n += 1
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Export columns for all trades, with avg entry and P&L computed vectorized."""
+        c = {name: col[:self.n] for name, col in self.cols.items()}
+        lot_size = np.take(_LOT_SIZE_LUT, c['instrument_id'])
+        filled = c['parts_filled'] > 0
+
+        # Weighted avg over filled parts (unfilled parts add 0 * 0)
+        p1 = np.where(c['part1_size'] > 0, c['part1_price'], 0.0)
+        p2 = np.where(c['part2_size'] > 0, c['part2_price'], 0.0)
+        p3 = np.where(c['part3_size'] > 0, c['part3_price'], 0.0)
+        weight = c['part1_size'] + c['part2_size'] + c['part3_size']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            avg = np.where(filled, (p1 * c['part1_size'] + p2 * c['part2_size']
+                                    + p3 * c['part3_size']) / weight, np.nan)
+            # Selling options: profit when price drops
+            pnl = np.where(filled, avg - c['exit_price'], 0.0)
+            pnl_pct = np.where(filled, (pnl / avg) * 100, 0.0)
+
+        return {
+            'instrument': _INSTRUMENT_NAMES[c['instrument_id']],
+            'option_type': _OPTION_TYPE_NAMES[c['option_type_code']],
+            'strike': c['strike'],
+            'expiry_type': c['expiry_type'],
+            'expiry_code': c['expiry_code'].astype(np.int64),
+            'signal_time': c['signal_time'],
+            'base_price': c['base_price'],
+            'entry_level_1': c['entry_level_1'],
+            'entry_level_2': c['entry_level_2'],
+            'entry_level_3': c['entry_level_3'],
+            'parts_filled': c['parts_filled'].astype(np.int64),
+            'part1_time': c['part1_time'],
+            'part1_price': c['part1_price'],
+            'part2_time': c['part2_time'],
+            'part2_price': c['part2_price'],
+            'part3_time': c['part3_time'],
+            'part3_price': c['part3_price'],
+            'avg_entry_price': avg,
+            'exit_time': c['exit_time'],
+            'exit_price': c['exit_price'],
+            'exit_reason': _EXIT_REASON_NAMES[c['exit_reason_code']],
+            'pnl': pnl,
+            'pnl_pct': pnl_pct,
+            'money_pnl': pnl * lot_size,
+            'lot_size': lot_size,
+            'status': _STATUS_NAMES[c['status_code']],
         }
 
+    def to_frame(self) -> pd.DataFrame:
+        """All trades as a DataFrame."""
+        return pd.DataFrame(self.columns())
+
+    def to_arrow(self) -> pa.Table:
+        """All trades as an Arrow table, built straight from the columns."""
+        return pa.Table.from_pydict(self.columns())
+
 
 # ============================================
 # BACKTEST ENGINE
@@ -199,23 +587,43 @@ class BacktestEngine:
       - Each row is one minute of one option contract
     """
 
-    def __init__(self, instrument: str, data_path: str):
+    # Only these parquet columns are read (atm_strike, spot, volume, ... are unused)
+    NEEDED_COLS = ['datetime', 'strike', 'option_type', 'expiry_type', 'expiry_code',
+                   'moneyness', 'close', 'high', 'low']
+
+    # Partition keys of dataset directories written by partition_data.py,
+    # with the same types as the columns in the single-file layout
+    PARTITIONING = ds.partitioning(
+        pa.schema([('expiry_type', pa.string()), ('expiry_code', pa.int64())]), flavor='hive')
+
+    def __init__(self, instrument: str, data_path: str,
+                 detailed_log: bool = config.BACKTEST_DETAILED_LOG):
         self.instrument = instrument
         self.data_path = data_path
+        # False: skip the minute-by-minute log and resolve all trades in
+        # one kernel call (same trades, no backtest_detailed_*.log)
+        self.detailed_log = detailed_log
         self.df = None
-        self.trades: List[Trade] = []
+        self.book = TradeBook()
         self.initial_capital = config.BACKTEST_INITIAL_CAPITAL
 
         # Strategy params from config
-        self.rsi_period = config.STRATEGY_CONFIG['rsi_length']
+        self.rsi_period = config.RSI_LENGTH
         self.rsi_threshold = 70
-        self.stop_loss_pct = config.STRATEGY_CONFIG['stop_loss_pct']
-        self.target_pct = config.STRATEGY_CONFIG['target_pct']
+        self.stop_loss_pct = config.STOP_LOSS_PCT
+        self.target_pct = config.TARGET_PCT
 
         # Trading hours
         self.entry_time = datetime.strptime(config.TRADING_START_TIME, '%H:%M').time()
         self.exit_time = datetime.strptime(config.TRADING_END_TIME, '%H:%M').time()
 
+        # Entry/exit time as offsets from midnight (for timestamp arithmetic)
+        self.entry_offset = pd.Timedelta(hours=self.entry_time.hour, minutes=self.entry_time.minute)
+        self.exit_offset = pd.Timedelta(hours=self.exit_time.hour, minutes=self.exit_time.minute)
+
+        # Bar dtype for the simulation kernel (P&L stays float64)
+        self.kernel_dtype = np.dtype(config.BACKTEST_KERNEL_DTYPE)
+
         logger.info(f"Initialized backtest for {instrument}")
 
     # ------------------------------------------
@@ -224,31 +632,48 @@ class BacktestEngine:
     def load_data(self):
         """Load parquet, filter to backtest period + nearest weekly expiry."""
         logger.info(f"Loading {self.data_path}...")
-        self.df = pd.read_parquet(self.data_path)
+        start = pd.to_datetime(config.BACKTEST_START_DATE).tz_localize('Asia/Kolkata')
+        end = pd.to_datetime(config.BACKTEST_END_DATE).tz_localize('Asia/Kolkata') + pd.Timedelta(days=1)
+
+        # Filter: nearest weekly expiry only (expiry_type=WEEK, expiry_code=1)
+        # Monthly contracts also have expiry_code=1, so we must filter both.
+        # Filters are pushed down to pyarrow so skipped rows are never decoded.
+        # data_path may also be a dataset directory partitioned on these keys
+        # (see partition_data.py); other partitions are then never opened.
+        filters = [('expiry_code', '=', 1), ('expiry_type', '=', 'WEEK')]
+        partitioning = self.PARTITIONING if os.path.isdir(self.data_path) else 'hive'
+        dt_type = ds.dataset(self.data_path, format='parquet',
+                             partitioning=partitioning).schema.field('datetime').type
+        if pa.types.is_timestamp(dt_type) and dt_type.tz is not None:
+            # Date range can be pushed down too (string datetimes are filtered below)
+            filters += [('datetime', '>=', start), ('datetime', '<', end)]
+        self.df = pd.read_parquet(self.data_path, engine='pyarrow', columns=self.NEEDED_COLS,
+                                  filters=filters, partitioning=partitioning)
 
         # Parse datetime
         self.df['datetime'] = pd.to_datetime(self.df['datetime'])
 
         # Filter: date range
-        start = pd.to_datetime(config.BACKTEST_START_DATE).tz_localize('Asia/Kolkata')
-        end = pd.to_datetime(config.BACKTEST_END_DATE).tz_localize('Asia/Kolkata') + pd.Timedelta(days=1)
         self.df = self.df[(self.df['datetime'] >= start) & (self.df['datetime'] < end)]
 
-        # Filter: nearest weekly expiry only (expiry_type=WEEK, expiry_code=1)
-        # Monthly contracts also have expiry_code=1, so we must filter both.
-        self.df = self.df[(self.df['expiry_code'] == 1) & (self.df['expiry_type'] == 'WEEK')]
-
         # NOTE: We do NOT filter by moneyness here.
         # We need all strikes so we can track a contract's price
         # even after it stops being ATM (spot moved).
         # ATM filter is applied only during signal detection.
 
+        # Low-cardinality strings as categoricals (fewer bytes per scan/groupby).
+        # Prices and strikes stay float64: RSI and the SL/TP/entry levels must
+        # match exactly (see config.BACKTEST_KERNEL_DTYPE for float32 bars).
+        for col in ('option_type', 'expiry_type', 'moneyness'):
+            self.df[col] = self.df[col].astype('category')
+
         # Sort chronologically
         self.df = self.df.sort_values('datetime').reset_index(drop=True)
 
-        # Add helper columns
-        self.df['date'] = self.df['datetime'].dt.date
-        self.df['time_only'] = self.df['datetime'].dt.time
+        # Add helper columns: date as int yyyymmdd, time as minutes since midnight
+        dt = self.df['datetime'].dt
+        self.df['date'] = (dt.year * 10000 + dt.month * 100 + dt.day).astype(np.int32)
+        self.df['time_only'] = (dt.hour * 60 + dt.minute).astype(np.int16)
 
         logger.info(f"Loaded {len(self.df):,} rows | "
                      f"{self.df['date'].nunique()} trading days | "
@@ -270,164 +695,257 @@ class BacktestEngine:
         """
         logger.info("Calculating RSI per contract...")
 
-        # Group by unique contract
-        groups = self.df.groupby(['strike', 'option_type', 'expiry_type', 'expiry_code'])
+        # Group by unique contract. Rows are already in time order, so a
+        # stable sort by contract lays each contract's series out contiguously.
+        codes = self.df.groupby(CONTRACT_KEYS).ngroup().to_numpy()
+        order = np.argsort(codes, kind='stable')
+        order = order[codes[order] >= 0]   # rows with a NaN key belong to no contract
+        offsets = np.concatenate(([0], np.flatnonzero(np.diff(codes[order])) + 1, [len(order)]))
+
+        # All contracts in one batch call
+        prices = self.df['close'].to_numpy(dtype=np.float64)[order]
+        rsi_sorted, cross_sorted = RSICalculator.rsi_cross_above_batch(
+            prices, offsets, self.rsi_threshold, self.rsi_period)
+
+        # Previous RSI within the same contract (for the signal log)
+        prev_sorted = np.empty_like(rsi_sorted)
+        prev_sorted[1:] = rsi_sorted[:-1]
+        prev_sorted[offsets[:-1][offsets[:-1] < len(order)]] = np.nan
+
+        n = len(self.df)
+        rsi = np.full(n, np.nan)
+        rsi_prev = np.full(n, np.nan)
+        rsi_cross = np.zeros(n, dtype=bool)
+        rsi[order] = rsi_sorted
+        rsi_prev[order] = prev_sorted
+        rsi_cross[order] = cross_sorted   # prev <= 70 and current > 70
+
+        self.df['rsi'] = rsi
+        self.df['rsi_prev'] = rsi_prev
+        self.df['rsi_cross'] = rsi_cross
+
+        # Contract-sorted layout, reused by the whole-backtest kernel
+        self._contract_codes = codes
+        self._contract_order = order
+        self._contract_offsets = offsets
 
-        rsi_list = []
-        for _, group in groups:
-            group = group.sort_values('datetime')
-            rsi = RSICalculator.calculate_rsi(group['close'], self.rsi_period)
-            rsi_list.append(rsi)
-
-        self.df['rsi'] = pd.concat(rsi_list).sort_index()
+        logger.info(f"RSI calculated | {self.df['rsi'].notna().sum():,} non-null values")
 
-        # Previous RSI for crossover detection
-        self.df['rsi_prev'] = self.df.groupby(['strike', 'option_type', 'expiry_type', 'expiry_code'])['rsi'].shift(1)
+    # ------------------------------------------
+    # ROW INDEXES (built once per backtest)
+    # ------------------------------------------
+    def _build_indexes(self):
+        """
+        Build column arrays and the signal rows, plus (for the detailed log)
+        lookups that replace boolean-mask scans in the minute loop:
+          - row of each (minute, contract) candle
+          - bar range of each contract in the contract-sorted layout
+          - signals (ATM rows where RSI crossed 70) per minute
+          - ATM CE/PE strike and RSI log labels per minute
+          - trading-window minutes of each day
+        """
+        df = self.df
+
+        # Column arrays for direct indexing
+        self._is_atm = (df['moneyness'] == 'ATM').to_numpy()
+        self._datetimes = df['datetime'].array
+        self._dt64 = df['datetime'].dt.tz_convert(None).to_numpy()   # UTC datetime64
+        self._high = df['high'].to_numpy(dtype=self.kernel_dtype)
+        self._low = df['low'].to_numpy(dtype=self.kernel_dtype)
+        self._close = df['close'].to_numpy(dtype=self.kernel_dtype)
+
+        # Signals: ATM rows with an RSI crossover, in row (time) order
+        self._signal_rows = np.flatnonzero(df['rsi_cross'].to_numpy() & self._is_atm)
+
+        # Minutes in the trading window (before entry time and after exit
+        # time are skipped; the exit_time minute itself is still processed),
+        # their exit-time flag and yyyymmdd day key
+        minutes = pd.DatetimeIndex(df['datetime'].unique())   # df is in time order
+        time_of_day = minutes - minutes.normalize()
+        in_window = (time_of_day >= self.entry_offset) & (time_of_day <= self.exit_offset)
+        minutes = minutes[in_window]
+        day_keys = (minutes.year * 10000 + minutes.month * 100 + minutes.day).tolist()
+        exit_flags = (time_of_day[in_window] >= self.exit_offset).tolist()
+
+        # Exit-time minute of each day that has one
+        self._day_exit_minute = {key: t for key, t, is_exit_time in zip(day_keys, minutes, exit_flags)
+                                 if is_exit_time}
+
+        if not self.detailed_log:
+            return
 
-        logger.info(f"RSI calculated | {self.df['rsi'].notna().sum():,} non-null values")
+        # Contract -> [start, end) of its bars in the contract-sorted layout,
+        # and that layout's times for binary searches without per-trade copies
+        order, offsets = self._contract_order, self._contract_offsets
+        first_rows = order[offsets[:-1]]
+        contract_keys = zip(*(df[c].to_numpy()[first_rows].tolist() for c in CONTRACT_KEYS))
+        self._contract_bounds = {key: (int(offsets[k]), int(offsets[k + 1]))
+                                 for k, key in enumerate(contract_keys)}
+        self._sorted_dt64 = self._dt64[order]
+
+        # First row wins if a contract has two candles in one minute
+        self._candle_rows = {}
+        keys = zip(df['datetime'], df['strike'], df['option_type'],
+                   df['expiry_type'], df['expiry_code'])
+        for i, key in enumerate(keys):
+            self._candle_rows.setdefault(key, i)
+
+        # Signals grouped by minute, in row order
+        sig = df.iloc[self._signal_rows][['datetime', 'option_type', 'strike', 'close',
+                                          'expiry_type', 'expiry_code', 'rsi_prev', 'rsi']]
+        self._signals: Dict[pd.Timestamp, List[tuple]] = {}
+        for t, *fields in zip(sig['datetime'], *(sig[c].tolist() for c in sig.columns[1:])):
+            self._signals.setdefault(t, []).append(tuple(fields))
+
+        # ATM labels for the log line: [ce_strike, ce_rsi, pe_strike, pe_rsi],
+        # "--" when missing; the last ATM row of each type in a minute wins
+        atm = df.loc[self._is_atm, ['datetime', 'option_type', 'strike', 'rsi']]
+        self._atm_labels: Dict[pd.Timestamp, List[str]] = {}
+        for t, opt_type, strike, rsi in zip(atm['datetime'], atm['option_type'].tolist(),
+                                            atm['strike'].tolist(), atm['rsi'].tolist()):
+            labels = self._atm_labels.setdefault(t, ["--", "--", "--", "--"])
+            rsi_val = f"{rsi:.2f}" if pd.notna(rsi) else "NaN"
+            if opt_type == 'CE':
+                labels[0], labels[1] = str(int(strike)), rsi_val
+            elif opt_type == 'PE':
+                labels[2], labels[3] = str(int(strike)), rsi_val
+
+        # Minutes of each day with the exit-time flag and log time
+        self._day_minutes: Dict[int, List[tuple]] = {}
+        for key, t, is_exit_time, time_str in zip(day_keys, minutes, exit_flags,
+                                                  minutes.strftime('%H:%M').tolist()):
+            self._day_minutes.setdefault(key, []).append((t, is_exit_time, time_str))
 
     # ------------------------------------------
     # HELPERS FOR PER-TRADE LOGIC
     # ------------------------------------------
-    def _get_contract_candle(self, trade: Trade, minute_data):
-        """Look up the specific contract's candle (no moneyness filter)."""
-        match = minute_data[
-            (minute_data['strike'] == trade.strike) &
-            (minute_data['option_type'] == trade.option_type) &
-            (minute_data['expiry_type'] == trade.expiry_type) &
-            (minute_data['expiry_code'] == trade.expiry_code)
-        ]
-        return match.iloc[0] if len(match) > 0 else None
-
-    def _check_staggered_entry(self, trade: Trade, minute_data, t) -> List[str]:
+    def _get_contract_candle(self, trade: Trade, t) -> Optional[int]:
+        """Row of the specific contract's candle at minute t (no moneyness filter)."""
+        return self._candle_rows.get(
+            (t, trade.strike, trade.option_type, trade.expiry_type, trade.expiry_code))
+
+    def _simulate_trade(self, trade: Trade, t) -> TradePlan:
+        """
+        Resolve a new trade's fills and exit in one kernel call over the
+        contract's bars from the signal minute to exit time.
+        """
+        a, b = self._contract_bounds[
+            (trade.strike, trade.option_type, trade.expiry_type, trade.expiry_code)]
+
+        # Bars from the signal minute up to and including exit time
+        exit_ts = t.normalize() + self.exit_offset
+        contract_dt = self._sorted_dt64[a:b]
+        lo = a + int(contract_dt.searchsorted(t.to_datetime64()))
+        hi = a + int(contract_dt.searchsorted(exit_ts.to_datetime64(), side='right'))
+        rows = self._contract_order[lo:hi]
+
+        times = self._datetimes[rows]
+        high = self._high[rows]
+        low = self._low[rows]
+        close = self._close[rows]
+
+        # Last bar is the exit-time bar only if the contract traded then
+        n = len(rows)
+        eod_i = n - 1 if n and times[n - 1] == exit_ts else n
+
+        result = simulate_trade(
+            high, low, close, 0, eod_i,
+            trade.entry_level_1, trade.entry_level_2, trade.entry_level_3,
+            1 + self.stop_loss_pct / 100, 1 - self.target_pct / 100,
+        )
+        return TradePlan(times, high, low, close, result)
+
+    def _check_staggered_entry(self, trade: Trade, t) -> List[str]:
         """
-        Check if any staggered entry levels are hit.
+        Apply the planned entries that fill on this minute.
         Returns list of event messages for logging.
         """
         events = []
-        candle = self._get_contract_candle(trade, minute_data)
-        if candle is None:
-            return events
+        plan = trade.plan
+        levels = (trade.entry_level_1, trade.entry_level_2, trade.entry_level_3)
 
-        candle_high = candle['high']
-
-        # Part 1: +5%
-        if not trade.part1_filled and candle_high >= trade.entry_level_1:
-            trade.add_entry(1, t, trade.entry_level_1, 33.33)
-            events.append(f"ENTRY Part1: high={candle_high:.2f} >= L1={trade.entry_level_1:.2f} | filled @ {trade.entry_level_1:.2f}")
-
-        # Part 2: +10% (only after part 1)
-        if trade.part1_filled and not trade.part2_filled \
-           and candle_high >= trade.entry_level_2:
-            trade.add_entry(2, t, trade.entry_level_2, 33.33)
-            events.append(f"ENTRY Part2: high={candle_high:.2f} >= L2={trade.entry_level_2:.2f} | filled @ {trade.entry_level_2:.2f}")
-
-        # Part 3: +15% (only after part 2)
-        if trade.part2_filled and not trade.part3_filled \
-           and candle_high >= trade.entry_level_3:
-            trade.add_entry(3, t, trade.entry_level_3, 33.34)
-            events.append(f"ENTRY Part3: high={candle_high:.2f} >= L3={trade.entry_level_3:.2f} | filled @ {trade.entry_level_3:.2f}")
+        # Parts fill in order, possibly several on the same candle
+        for k in range(len(trade.parts), 3):
+            i = plan.fill_i[k]
+            if i < 0 or plan.times[i] != t:
+                break
+            trade.add_entry(k + 1, t, levels[k], PART_SIZES[k])
+            events.append(f"ENTRY Part{k + 1}: high={plan.high[i]:.2f} >= L{k + 1}={levels[k]:.2f} | filled @ {levels[k]:.2f}")
 
         return events
 
-    def _check_exit(self, trade: Trade, minute_data, day_data, t, is_exit_time: bool):
+    def _check_exit(self, trade: Trade, t, is_exit_time: bool):
         """
-        Check SL/TP/EOD exit for this trade.
+        Apply the planned SL/TP/EOD exit if it lands on this minute.
         Returns (closed: bool, event_msg: str or None).
         """
         if not trade.has_position():
             return False, None
 
-        candle = self._get_contract_candle(trade, minute_data)
+        plan = trade.plan
+        i = plan.exit_i
 
-        if candle is None:
-            # No data at this minute. If exit time, find last available candle.
+        if i < 0 or plan.times[i] != t:
+            # Kernel found no exit: the contract has no candle at exit time.
+            # At exit time, close at the last available candle.
             if is_exit_time:
-                last_candle_df = day_data[
-                    (day_data['strike'] == trade.strike) &
-                    (day_data['option_type'] == trade.option_type) &
-                    (day_data['expiry_type'] == trade.expiry_type) &
-                    (day_data['expiry_code'] == trade.expiry_code) &
-                    (day_data['time_only'] <= self.exit_time)
-                ]
-                if len(last_candle_df) > 0:
-                    lc = last_candle_df.iloc[-1]
-                    trade.close_trade(t, lc['close'], 'EOD')
-                    msg = f"EXIT EOD (no data at exit time, used last candle close={lc['close']:.2f})"
+                if len(plan.close) > 0:
+                    last_close = float(plan.close[-1])
+                    trade.close_trade(t, last_close, ExitReason.EOD)
+                    msg = f"EXIT EOD (no data at exit time, used last candle close={last_close:.2f})"
                 else:
-                    trade.close_trade(t, trade.get_avg_entry_price(), 'EOD')
+                    trade.close_trade(t, trade.get_avg_entry_price(), ExitReason.EOD)
                     msg = f"EXIT EOD (no data, closed flat at avg_entry={trade.get_avg_entry_price():.2f})"
-                self.trades.append(trade)
+                self.book.add(trade)
                 return True, msg
             return False, None
 
-        avg_entry = trade.get_avg_entry_price()
-        if avg_entry is None:
-            return False, None
-
-        # Exact SL and TP price levels (fixed 20% SL, 10% TP)
-        sl_price = avg_entry * (1 + self.stop_loss_pct / 100)
-        tp_price = avg_entry * (1 - self.target_pct / 100)
-
-        exit_reason = None
-        exit_price = None
-        msg = None
-
-        # Check SL: did candle high breach the SL level?
-        if candle['high'] >= sl_price:
-            exit_reason = 'STOP_LOSS'
-            exit_price = sl_price
-            msg = (f"EXIT STOP_LOSS: high={candle['high']:.2f} >= SL={sl_price:.2f} | "
-                   f"avg_entry={avg_entry:.2f} | exit @ {sl_price:.2f} | pnl=-20%")
-        # Check TP: did candle low breach the TP level?
-        elif candle['low'] <= tp_price:
-            exit_reason = 'TARGET'
-            exit_price = tp_price
-            msg = (f"EXIT TARGET: low={candle['low']:.2f} <= TP={tp_price:.2f} | "
-                   f"avg_entry={avg_entry:.2f} | exit @ {tp_price:.2f} | pnl=+10%")
-        # EOD: at exit time, force close at candle close
-        elif is_exit_time:
-            exit_reason = 'EOD'
-            exit_price = candle['close']
+        avg_entry = trade.avg_entry
+        exit_price = plan.exit_px
+
+        if plan.exit_code == EXIT_STOP_LOSS:
+            # Candle high breached the SL level
+            exit_reason = ExitReason.STOP_LOSS
+            msg = (f"EXIT STOP_LOSS: high={plan.high[i]:.2f} >= SL={exit_price:.2f} | "
+                   f"avg_entry={avg_entry:.2f} | exit @ {exit_price:.2f} | pnl=-20%")
+        elif plan.exit_code == EXIT_TARGET:
+            # Candle low breached the TP level
+            exit_reason = ExitReason.TARGET
+            msg = (f"EXIT TARGET: low={plan.low[i]:.2f} <= TP={exit_price:.2f} | "
+                   f"avg_entry={avg_entry:.2f} | exit @ {exit_price:.2f} | pnl=+10%")
+        else:
+            # EOD: at exit time, force close at candle close
+            exit_reason = ExitReason.EOD
             pnl_pct = ((avg_entry - exit_price) / avg_entry) * 100
-            msg = (f"EXIT EOD: close={candle['close']:.2f} | "
+            msg = (f"EXIT EOD: close={exit_price:.2f} | "
                    f"avg_entry={avg_entry:.2f} | pnl={pnl_pct:+.2f}%")
 
-        if exit_reason:
-            trade.close_trade(t, exit_price, exit_reason)
-            self.trades.append(trade)
-            return True, msg
+        trade.close_trade(t, exit_price, exit_reason)
+        self.book.add(trade)
+        return True, msg
 
-        return False, None
-
-    def _eod_close_trade(self, trade: Trade, day_data, date) -> str:
+    def _eod_close_trade(self, trade: Trade, date) -> str:
         """Safety net: close a trade at EOD. Returns event message."""
         if trade.has_position():
-            contract_data = day_data[
-                (day_data['strike'] == trade.strike) &
-                (day_data['option_type'] == trade.option_type) &
-                (day_data['expiry_type'] == trade.expiry_type) &
-                (day_data['expiry_code'] == trade.expiry_code) &
-                (day_data['time_only'] <= self.exit_time)
-            ]
-            if len(contract_data) > 0:
-                last_row = contract_data.iloc[-1]
-                trade.close_trade(last_row['datetime'], last_row['close'], 'EOD')
+            plan = trade.plan
+            if len(plan.close) > 0:
+                last_close = float(plan.close[-1])
+                trade.close_trade(plan.times[-1], last_close, ExitReason.EOD)
                 avg = trade.get_avg_entry_price()
-                pnl_pct = ((avg - last_row['close']) / avg) * 100 if avg else 0
-                msg = f"EXIT EOD (safety net): close={last_row['close']:.2f} | pnl={pnl_pct:+.2f}%"
+                pnl_pct = ((avg - last_close) / avg) * 100 if avg else 0
+                msg = f"EXIT EOD (safety net): close={last_close:.2f} | pnl={pnl_pct:+.2f}%"
             else:
                 trade.close_trade(
                     pd.Timestamp(f"{date} {self.exit_time}"),
-                    trade.get_avg_entry_price(), 'EOD'
+                    trade.get_avg_entry_price(), ExitReason.EOD
                 )
                 msg = "EXIT EOD (safety net, no data, closed flat)"
-            self.trades.append(trade)
+            self.book.add(trade)
             return msg
         # No position was taken -- just discard the observation
         return "EOD: observation expired (no entry taken)"
 
-    def _get_track_status(self, trade: Optional[Trade], minute_data) -> str:
+    def _get_track_status(self, trade: Optional[Trade], t) -> str:
         """Get a short status string for a CE or PE track."""
         if trade is None:
             return "idle"
@@ -436,25 +954,110 @@ class BacktestEngine:
         strike = int(trade.strike)
 
         # Get current candle for the observed contract
-        candle = self._get_contract_candle(trade, minute_data)
-        price_str = f"close={candle['close']:.2f} high={candle['high']:.2f} low={candle['low']:.2f}" if candle is not None else "no data"
+        i = self._get_contract_candle(trade, t)
+        price_str = f"close={self._close[i]:.2f} high={self._high[i]:.2f} low={self._low[i]:.2f}" if i is not None else "no data"
 
-        if trade.status == 'WAITING_ENTRY':
+        if trade.status == Status.WAITING_ENTRY:
             return (f"observing {strike} {opt} | {price_str} | "
                     f"waiting L1={trade.entry_level_1:.2f} (need high >= L1)")
-        elif trade.status == 'PARTIAL_POSITION':
-            avg = trade.get_avg_entry_price()
-            sl = avg * 1.2
-            tp = avg * 0.9
+        elif trade.status == Status.PARTIAL_POSITION:
             return (f"in position {strike} {opt} ({len(trade.parts)}/3) | {price_str} | "
-                    f"avg={avg:.2f} SL={sl:.2f} TP={tp:.2f}")
-        elif trade.status == 'FULL_POSITION':
-            avg = trade.get_avg_entry_price()
-            sl = avg * 1.2
-            tp = avg * 0.9
+                    f"avg={trade.avg_entry:.2f} SL={trade.sl_price:.2f} TP={trade.tp_price:.2f}")
+        elif trade.status == Status.FULL_POSITION:
             return (f"in position {strike} {opt} (3/3) | {price_str} | "
-                    f"avg={avg:.2f} SL={sl:.2f} TP={tp:.2f}")
-        return trade.status
+                    f"avg={trade.avg_entry:.2f} SL={trade.sl_price:.2f} TP={trade.tp_price:.2f}")
+        return trade.status.name
+
+    # ------------------------------------------
+    # WHOLE-BACKTEST KERNEL (no detailed log)
+    # ------------------------------------------
+    def _run_signals_kernel(self):
+        """
+        Resolve every trade in one simulate_signals() call instead of the
+        minute loop, then add the closed trades to the book in the order
+        the loop would (by day, exit minute, CE before PE).
+        """
+        df = self.df
+        order = self._contract_order
+        offsets = self._contract_offsets
+
+        # Signals the minute loop acts on: trading window, not at exit time
+        rows = self._signal_rows
+        sig_times = pd.DatetimeIndex(self._datetimes[rows])
+        time_of_day = sig_times - sig_times.normalize()
+        opt_types = df['option_type'].to_numpy()[rows]
+        keep = ((time_of_day >= self.entry_offset) & (time_of_day < self.exit_offset)
+                & np.isin(opt_types, ['CE', 'PE']))
+        rows, sig_times, opt_types = rows[keep], sig_times[keep], opt_types[keep]
+
+        # Group by (day, track); rows are time ordered within each group
+        day_keys = df['date'].to_numpy()[rows]
+        tracks = (opt_types == 'PE').astype(np.int64)
+        group = day_keys.astype(np.int64) * 2 + tracks
+        perm = np.argsort(group, kind='stable')
+        rows, sig_times, day_keys, tracks = rows[perm], sig_times[perm], day_keys[perm], tracks[perm]
+        group_offsets = np.concatenate(
+            ([0], np.flatnonzero(np.diff(group[perm])) + 1, [len(rows)])).astype(np.int64)
+
+        codes = self._contract_codes[rows]
+        base = df['close'].to_numpy(dtype=np.float64)[rows]
+        levels = base[:, None] * np.array(_ENTRY_MULT)
+        dt_unit = self._dt64.dtype
+        exit_ts = (sig_times.normalize() + self.exit_offset).tz_convert(None).to_numpy()
+
+        taken, lo, hi, fill_i, fill_px, exit_i, exit_px, exit_code = simulate_signals(
+            self._high[order], self._low[order], self._close[order],
+            self._dt64[order].view(np.int64),
+            offsets[codes].astype(np.int64), offsets[codes + 1].astype(np.int64),
+            self._dt64[rows].view(np.int64), exit_ts.astype(dt_unit).view(np.int64),
+            levels, group_offsets,
+            1 + self.stop_loss_pct / 100, 1 - self.target_pct / 100,
+        )
+
+        # Closed trades, sorted into the minute loop's book order
+        closed = []
+        contract_cols = [df[c].to_numpy()[rows].tolist()
+                         for c in ('strike', 'expiry_type', 'expiry_code')]
+        for k in np.flatnonzero(taken & (fill_i[:, 0] >= 0)):
+            strike, expiry_type, expiry_code = (col[k] for col in contract_cols)
+            trade = Trade(
+                signal_time=sig_times[k],
+                base_price=float(base[k]),
+                option_type=OptionType(tracks[k]).name,
+                strike=strike,
+                expiry_type=expiry_type,
+                expiry_code=expiry_code,
+                instrument=self.instrument,
+            )
+            bar_rows = order[lo[k]:hi[k]]
+            plan = TradePlan(self._datetimes[bar_rows], self._high[bar_rows], self._low[bar_rows],
+                             self._close[bar_rows],
+                             (fill_i[k], fill_px[k], int(exit_i[k]), float(exit_px[k]), int(exit_code[k])))
+            trade.plan = plan
+
+            for part in range(3):
+                if plan.fill_i[part] < 0:
+                    break
+                trade.add_entry(part + 1, plan.times[plan.fill_i[part]],
+                                float(plan.fill_px[part]), PART_SIZES[part])
+
+            exit_minute = self._day_exit_minute.get(int(day_keys[k]))
+            if plan.exit_i >= 0:
+                trade.close_trade(plan.times[plan.exit_i], plan.exit_px, ExitReason(plan.exit_code))
+                close_key = plan.times[plan.exit_i]
+            elif exit_minute is not None:
+                # No candle at exit time: close at the last candle, at exit time
+                trade.close_trade(exit_minute, float(plan.close[-1]), ExitReason.EOD)
+                close_key = exit_minute
+            else:
+                # Day without an exit-time minute: EOD safety net
+                trade.close_trade(plan.times[-1], float(plan.close[-1]), ExitReason.EOD)
+                close_key = pd.Timestamp.max.tz_localize(sig_times.tz)
+            closed.append((int(day_keys[k]), close_key, int(tracks[k]), trade))
+
+        closed.sort(key=lambda item: item[:3])
+        for *_, trade in closed:
+            self.book.add(trade)
 
     # ------------------------------------------
     # MAIN BACKTEST LOOP
@@ -468,7 +1071,8 @@ class BacktestEngine:
           - Cannot have two CEs or two PEs active simultaneously
           - Both reset at end of day
         
-        Writes a detailed minute-by-minute log for manual verification.
+        Writes a detailed minute-by-minute log for manual verification
+        (with detailed_log=False, resolves the same trades without it).
         """
         logger.info("=" * 60)
         logger.info(f"BACKTEST: {self.instrument}")
@@ -476,6 +1080,12 @@ class BacktestEngine:
 
         self.load_data()
         self.calculate_rsi()
+        self._build_indexes()
+
+        if not self.detailed_log:
+            self._run_signals_kernel()
+            logger.info(f"Backtest done. Total trades: {len(self.book)}")
+            return
 
         # Independent tracks for CE and PE (can run simultaneously)
         active_ce: Optional[Trade] = None
@@ -484,7 +1094,8 @@ class BacktestEngine:
 
         # Open detailed log file
         log_path = f"backtest_detailed_{self.instrument}.log"
-        dlog = open(log_path, 'w')
+        # Lines are collected per day and written in one call (large buffer)
+        dlog = open(log_path, 'w', buffering=1 << 20)
         dlog.write(f"{'=' * 100}\n")
         dlog.write(f"DETAILED BACKTEST LOG: {self.instrument}\n")
         dlog.write(f"Period: {config.BACKTEST_START_DATE} to {config.BACKTEST_END_DATE}\n")
@@ -495,143 +1106,116 @@ class BacktestEngine:
 
         logger.info(f"Processing {len(dates)} trading days...")
 
-        for day_num, date in enumerate(dates, 1):
+        for day_num, day_key in enumerate(dates, 1):
             if day_num % 50 == 0:
-                logger.info(f"Day {day_num}/{len(dates)} | Trades so far: {len(self.trades)}")
+                logger.info(f"Day {day_num}/{len(dates)} | Trades so far: {len(self.book)}")
 
-            day_data = self.df[self.df['date'] == date]
-            minutes = day_data['datetime'].unique()
+            date = _yyyymmdd_to_date(day_key)
+            lines: List[str] = []
 
             # Day header in log
-            dlog.write(f"\n{'=' * 100}\n")
-            dlog.write(f"  DATE: {date}\n")
-            dlog.write(f"{'=' * 100}\n")
-
-            for minute in minutes:
-                t = pd.Timestamp(minute)
-                t_only = t.time()
-
-                # Skip if before trading start
-                if t_only < self.entry_time:
-                    continue
-                # Skip if AFTER exit time (we still process the exit_time minute)
-                if t_only > self.exit_time:
-                    continue
-
-                is_exit_time = (t_only >= self.exit_time)
-                minute_data = day_data[day_data['datetime'] == minute]
+            lines.append(f"\n{'=' * 100}\n")
+            lines.append(f"  DATE: {date}\n")
+            lines.append(f"{'=' * 100}\n")
 
+            for t, is_exit_time, time_str in self._day_minutes.get(int(day_key), ()):
                 # Collect events for this minute
                 events = []
 
-                # Get ATM RSI info for logging
-                atm_data = minute_data[minute_data['moneyness'] == 'ATM']
-                ce_rsi_str = "--"
-                pe_rsi_str = "--"
-                ce_atm_strike = "--"
-                pe_atm_strike = "--"
-                for _, row in atm_data.iterrows():
-                    rsi_val = f"{row['rsi']:.2f}" if pd.notna(row['rsi']) else "NaN"
-                    if row['option_type'] == 'CE':
-                        ce_rsi_str = rsi_val
-                        ce_atm_strike = str(int(row['strike']))
-                    elif row['option_type'] == 'PE':
-                        pe_rsi_str = rsi_val
-                        pe_atm_strike = str(int(row['strike']))
+                # ATM RSI info for logging
+                ce_atm_strike, ce_rsi_str, pe_atm_strike, pe_rsi_str = \
+                    self._atm_labels.get(t, _NO_ATM_LABELS)
 
                 # ---- CHECK SIGNALS (ATM only, not at exit time) ----
                 if not is_exit_time:
-                    for _, row in atm_data.iterrows():
-                        if pd.isna(row['rsi']) or pd.isna(row['rsi_prev']):
-                            continue
-
-                        # RSI crossover: prev <= 70 and current > 70
-                        if row['rsi_prev'] <= self.rsi_threshold and row['rsi'] > self.rsi_threshold:
-                            opt_type = row['option_type']
-
-                            if opt_type == 'CE' and active_ce is None:
-                                active_ce = Trade(
-                                    signal_time=t,
-                                    base_price=row['close'],
-                                    option_type='CE',
-                                    strike=row['strike'],
-                                    expiry_type=row['expiry_type'],
-                                    expiry_code=row['expiry_code'],
-                                    instrument=self.instrument,
-                                )
-                                events.append(
-                                    f"CE SIGNAL: RSI crossed 70 ({row['rsi_prev']:.2f} -> {row['rsi']:.2f}) "
-                                    f"on {int(row['strike'])} CE | base={row['close']:.2f} | "
-                                    f"L1={active_ce.entry_level_1:.2f} L2={active_ce.entry_level_2:.2f} L3={active_ce.entry_level_3:.2f}"
-                                )
-
-                            elif opt_type == 'PE' and active_pe is None:
-                                active_pe = Trade(
-                                    signal_time=t,
-                                    base_price=row['close'],
-                                    option_type='PE',
-                                    strike=row['strike'],
-                                    expiry_type=row['expiry_type'],
-                                    expiry_code=row['expiry_code'],
-                                    instrument=self.instrument,
-                                )
-                                events.append(
-                                    f"PE SIGNAL: RSI crossed 70 ({row['rsi_prev']:.2f} -> {row['rsi']:.2f}) "
-                                    f"on {int(row['strike'])} PE | base={row['close']:.2f} | "
-                                    f"L1={active_pe.entry_level_1:.2f} L2={active_pe.entry_level_2:.2f} L3={active_pe.entry_level_3:.2f}"
-                                )
+                    # RSI crossovers (prev <= 70 and current > 70) precomputed per minute
+                    for opt_type, strike, close, expiry_type, expiry_code, rsi_prev, rsi in self._signals.get(t, ()):
+                        if opt_type == 'CE' and active_ce is None:
+                            active_ce = Trade(
+                                signal_time=t,
+                                base_price=close,
+                                option_type='CE',
+                                strike=strike,
+                                expiry_type=expiry_type,
+                                expiry_code=expiry_code,
+                                instrument=self.instrument,
+                            )
+                            active_ce.plan = self._simulate_trade(active_ce, t)
+                            events.append(
+                                f"CE SIGNAL: RSI crossed 70 ({rsi_prev:.2f} -> {rsi:.2f}) "
+                                f"on {int(strike)} CE | base={close:.2f} | "
+                                f"L1={active_ce.entry_level_1:.2f} L2={active_ce.entry_level_2:.2f} L3={active_ce.entry_level_3:.2f}"
+                            )
+
+                        elif opt_type == 'PE' and active_pe is None:
+                            active_pe = Trade(
+                                signal_time=t,
+                                base_price=close,
+                                option_type='PE',
+                                strike=strike,
+                                expiry_type=expiry_type,
+                                expiry_code=expiry_code,
+                                instrument=self.instrument,
+                            )
+                            active_pe.plan = self._simulate_trade(active_pe, t)
+                            events.append(
+                                f"PE SIGNAL: RSI crossed 70 ({rsi_prev:.2f} -> {rsi:.2f}) "
+                                f"on {int(strike)} PE | base={close:.2f} | "
+                                f"L1={active_pe.entry_level_1:.2f} L2={active_pe.entry_level_2:.2f} L3={active_pe.entry_level_3:.2f}"
+                            )
 
                 # ---- STAGGERED ENTRY (not at exit time) ----
                 if not is_exit_time:
-                    if active_ce and active_ce.status in ['WAITING_ENTRY', 'PARTIAL_POSITION']:
-                        entry_events = self._check_staggered_entry(active_ce, minute_data, t)
+                    if active_ce and active_ce.status in (Status.WAITING_ENTRY, Status.PARTIAL_POSITION):
+                        entry_events = self._check_staggered_entry(active_ce, t)
                         events.extend([f"CE {e}" for e in entry_events])
-                    if active_pe and active_pe.status in ['WAITING_ENTRY', 'PARTIAL_POSITION']:
-                        entry_events = self._check_staggered_entry(active_pe, minute_data, t)
+                    if active_pe and active_pe.status in (Status.WAITING_ENTRY, Status.PARTIAL_POSITION):
+                        entry_events = self._check_staggered_entry(active_pe, t)
                         events.extend([f"PE {e}" for e in entry_events])
 
                 # ---- EXIT MANAGEMENT (CE and PE independently) ----
                 if active_ce:
-                    closed, exit_msg = self._check_exit(active_ce, minute_data, day_data, t, is_exit_time)
+                    closed, exit_msg = self._check_exit(active_ce, t, is_exit_time)
                     if closed:
                         events.append(f"CE {exit_msg}")
                         active_ce = None
                 if active_pe:
-                    closed, exit_msg = self._check_exit(active_pe, minute_data, day_data, t, is_exit_time)
+                    closed, exit_msg = self._check_exit(active_pe, t, is_exit_time)
                     if closed:
                         events.append(f"PE {exit_msg}")
                         active_pe = None
 
                 # ---- WRITE LOG LINE ----
-                time_str = t_only.strftime('%H:%M')
-                ce_status = self._get_track_status(active_ce, minute_data)
-                pe_status = self._get_track_status(active_pe, minute_data)
+                ce_status = self._get_track_status(active_ce, t)
+                pe_status = self._get_track_status(active_pe, t)
 
-                dlog.write(
+                lines.append(
                     f"[{time_str}] "
                     f"ATM CE {ce_atm_strike} RSI={ce_rsi_str} | "
                     f"ATM PE {pe_atm_strike} RSI={pe_rsi_str} | "
                     f"CE: {ce_status} | PE: {pe_status}\n"
                 )
                 for event in events:
-                    dlog.write(f"         >>> {event}\n")
+                    lines.append(f"         >>> {event}\n")
 
             # ---- END OF DAY: reset both tracks ----
             if active_ce:
-                msg = self._eod_close_trade(active_ce, day_data, date)
-                dlog.write(f"         >>> CE {msg}\n")
+                msg = self._eod_close_trade(active_ce, date)
+                lines.append(f"         >>> CE {msg}\n")
                 active_ce = None
             if active_pe:
-                msg = self._eod_close_trade(active_pe, day_data, date)
-                dlog.write(f"         >>> PE {msg}\n")
+                msg = self._eod_close_trade(active_pe, date)
+                lines.append(f"         >>> PE {msg}\n")
                 active_pe = None
 
+            dlog.write(''.join(lines))
+
         dlog.write(f"\n{'=' * 100}\n")
-        dlog.write(f"END OF LOG | Total trades: {len(self.trades)}\n")
+        dlog.write(f"END OF LOG | Total trades: {len(self.book)}\n")
         dlog.write(f"{'=' * 100}\n")
         dlog.close()
 
-        logger.info(f"Backtest done. Total trades: {len(self.trades)}")
+        logger.info(f"Backtest done. Total trades: {len(self.book)}")
         logger.info(f"Detailed log saved to {log_path}")
 
     # ------------------------------------------
@@ -639,31 +1223,57 @@ class BacktestEngine:
     # ------------------------------------------
     def generate_report(self) -> Dict:
         """Build a report dict from completed trades."""
-        if not self.trades:
+        if not len(self.book):
             logger.warning("No trades to report")
             return {}
 
-        trades_df = pd.DataFrame([t.to_dict() for t in self.trades])
-
-        # Only trades that actually entered
-        trades_df = trades_df[trades_df['parts_filled'] > 0].copy()
-        if len(trades_df) == 0:
-            logger.warning("No trades with entries")
-            return {}
+        # The book only holds trades that actually entered. Columns are
+        # exported once and shared by the DataFrame and the Arrow table.
+        cols = self.book.columns()
+        trades_df = pd.DataFrame(cols)
+
+        # Categoricals so masks and counts run on int8 codes; the Arrow
+        # table keeps the plain strings
+        trades_df = trades_df.astype({'option_type': _OPTION_TYPE_DTYPE,
+                                      'exit_reason': _EXIT_REASON_DTYPE})
+        trades_df['parts_filled'] = pd.to_numeric(trades_df['parts_filled'], downcast='unsigned')
+
+        # Stats on the plain numpy columns; masks computed once
+        pnl = cols['pnl']
+        money_pnl = cols['money_pnl']   # option price P&L * lot size
+        parts = cols['parts_filled']
+        is_win = pnl > 0
+        is_loss = pnl < 0
+        type_codes = trades_df['option_type'].cat.codes.to_numpy()
+        is_ce = type_codes == OptionType.CE
+        is_pe = type_codes == OptionType.PE
+
+        # Counts per exit-reason category code; the dict keeps only seen
+        # reasons, by count, ties in order of first appearance
+        reason_codes = trades_df['exit_reason'].cat.codes.to_numpy()
+        exit_counts = np.bincount(reason_codes, minlength=len(_EXIT_REASON_DTYPE.categories))
+        exit_reasons = dict(sorted(
+            ((_EXIT_REASON_DTYPE.categories[c], int(exit_counts[c]))
+             for c in pd.unique(reason_codes)),
+            key=lambda kv: -kv[1]))
 
         total = len(trades_df)
-        wins = len(trades_df[trades_df['pnl'] > 0])
-        losses = len(trades_df[trades_df['pnl'] < 0])
-        total_pnl = trades_df['pnl'].sum()
+        wins = int(is_win.sum())
+        losses = int(is_loss.sum())
+        total_pnl = pnl.sum()
 
-        # Actual money P&L (option price P&L * lot size)
-        lot_size = config.LOT_SIZE.get(self.instrument, 1)
-        total_money_pnl = trades_df['money_pnl'].sum()
+        lot_size = int(_LOT_SIZE_LUT[_INSTRUMENT_CODES[self.instrument]])
+        total_money_pnl = money_pnl.sum()
+        fill_counts = np.bincount(parts, minlength=len(PART_SIZES) + 1)   # index = parts filled
+        full_entries = int(fill_counts[len(PART_SIZES)])
 
         report = {
             'instrument': self.instrument,
             'lot_size': lot_size,
             'period': f"{config.BACKTEST_START_DATE} to {config.BACKTEST_END_DATE}",
+            'rsi_period': self.rsi_period,
+            'stop_loss_pct': self.stop_loss_pct,
+            'target_pct': self.target_pct,
             'initial_capital': self.initial_capital,
             'final_capital': self.initial_capital + total_money_pnl,
             'total_pnl': total_pnl,
@@ -673,26 +1283,30 @@ class BacktestEngine:
             'wins': wins,
             'losses': losses,
             'win_rate': (wins / total) * 100 if total else 0,
-            'avg_pnl': trades_df['pnl'].mean(),
-            'avg_money_pnl': trades_df['money_pnl'].mean(),
-            'avg_win': trades_df[trades_df['pnl'] > 0]['money_pnl'].mean() if wins else 0,
-            'avg_loss': trades_df[trades_df['pnl'] < 0]['money_pnl'].mean() if losses else 0,
-            'max_win': trades_df['money_pnl'].max(),
-            'max_loss': trades_df['money_pnl'].min(),
-            'exit_reasons': trades_df['exit_reason'].value_counts().to_dict(),
-            'ce_trades': len(trades_df[trades_df['option_type'] == 'CE']),
-            'pe_trades': len(trades_df[trades_df['option_type'] == 'PE']),
-            'ce_pnl': trades_df[trades_df['option_type'] == 'CE']['money_pnl'].sum(),
-            'pe_pnl': trades_df[trades_df['option_type'] == 'PE']['money_pnl'].sum(),
-            'full_entries': len(trades_df[trades_df['parts_filled'] == 3]),
-            'partial_entries': len(trades_df[trades_df['parts_filled'] < 3]),
-            'avg_parts': trades_df['parts_filled'].mean(),
+            'avg_pnl': pnl.mean(),
+            'avg_money_pnl': money_pnl.mean(),
+            'avg_win': money_pnl[is_win].mean() if wins else 0,
+            'avg_loss': money_pnl[is_loss].mean() if losses else 0,
+            'max_win': money_pnl.max(),
+            'max_loss': money_pnl.min(),
+            'exit_reasons': exit_reasons,
+            'exit_counts': exit_counts,   # by _EXIT_REASON_DTYPE category code
+            'ce_trades': int(is_ce.sum()),
+            'pe_trades': int(is_pe.sum()),
+            'ce_pnl': money_pnl[is_ce].sum(),
+            'pe_pnl': money_pnl[is_pe].sum(),
+            'full_entries': full_entries,
+            'partial_entries': total - full_entries,   # 1 or 2 parts
+            'avg_parts': parts.mean(),
+            'fill_counts': fill_counts,
             'trades_df': trades_df,
+            'trades_table': pa.Table.from_pydict(cols),
         }
         return report
 
-    def print_report(self, report: Dict):
-        """Print formatted report to console."""
+    @staticmethod
+    def print_report(report: Dict):
+        """Print formatted report to console (needs only the report dict)."""
         if not report:
             print("No trades to report.")
             return
@@ -702,7 +1316,7 @@ class BacktestEngine:
         print(f"  BACKTEST REPORT: {r['instrument']} (Lot Size: {r['lot_size']})")
         print("=" * 60)
         print(f"  Period:       {r['period']}")
-        print(f"  RSI Period:   {self.rsi_period} | SL: {self.stop_loss_pct}% | TP: {self.target_pct}%")
+        print(f"  RSI Period:   {r['rsi_period']} | SL: {r['stop_loss_pct']}% | TP: {r['target_pct']}%")
         print(f"  Entry Levels: +{config.ENTRY_LEVEL_1_PCT}% / +{config.ENTRY_LEVEL_2_PCT}% / +{config.ENTRY_LEVEL_3_PCT}%")
         print("-" * 60)
 
@@ -729,7 +1343,7 @@ class BacktestEngine:
 
         print("  Exit Reasons:")
         for reason, count in r['exit_reasons'].items():
-            pct = (count / r['total_trades']) * 100
+            pct = _pct(count, r['total_trades'])
             print(f"    {reason:20} {count:>4} ({pct:.1f}%)")
         print("-" * 60)
 
@@ -738,6 +1352,55 @@ class BacktestEngine:
         print("=" * 60)
 
 
+# ============================================
+# CSV WRITER
+# ============================================
+_CSV_BATCH_ROWS = 65536
+
+
+def _csv_batch(batch: pa.RecordBatch) -> pa.RecordBatch:
+    """Format one batch's timestamp and float columns the way to_csv did."""
+    columns = []
+    for field, col in zip(batch.schema, batch.columns):
+        if pa.types.is_timestamp(field.type):
+            # Second resolution (%S would print microseconds). Zoned columns
+            # get the real UTC offset via %z, whatever the zone is called
+            # ('Asia/Kolkata' or '+05:30'), with to_csv's colon inserted
+            tz = field.type.tz
+            col = pc.strftime(col.cast(pa.timestamp('s', tz)),
+                              format="%Y-%m-%d %H:%M:%S%z" if tz else "%Y-%m-%d %H:%M:%S")
+            if tz:
+                col = pc.replace_substring_regex(col, r'([+-]\d{2})(\d{2})$', r'\1:\2')
+        elif pa.types.is_floating(field.type):
+            col = pc.if_else(pc.is_nan(col), pa.scalar(None, field.type), col)
+        columns.append(col)
+    return pa.RecordBatch.from_arrays(columns, names=batch.schema.names)
+
+
+def write_trades_csv(table: pa.Table, path: str):
+    """Write the trades table as CSV with Arrow's writer.
+
+    Matches the old to_csv layout where it matters to readers: plain
+    header, timestamps as 'YYYY-mm-dd HH:MM:SS' followed by the UTC
+    offset (e.g. '+05:30') for zoned columns, empty cells for missing
+    values. Integral floats lose their '.0' (23600 not 23600.0).
+    Rows are formatted and written in batches of _CSV_BATCH_ROWS (each
+    batch gets the same timestamp format), so only one batch's string
+    copy is held at a time.
+    """
+    options = pacsv.WriteOptions(include_header=False, quoting_style='none')
+    writer = None
+    with open(path, 'wb') as f:
+        f.write((','.join(table.column_names) + '\n').encode())
+        for batch in table.to_batches(max_chunksize=_CSV_BATCH_ROWS):
+            batch = _csv_batch(batch)
+            if writer is None:
+                writer = pacsv.CSVWriter(f, batch.schema, write_options=options)
+            writer.write_batch(batch)
+        if writer is not None:
+            writer.close()
+
+
 # ============================================
 # TRADE LOG WRITER
 # ============================================
@@ -745,15 +1408,15 @@ def write_trade_log(reports: Dict[str, Dict]):
     """Write a clean trade log file with all entries."""
     log_path = "backtest_trades.log"
 
-    with open(log_path, 'w') as f:
+    with open(log_path, 'w', buffering=1 << 20) as f:
         f.write("=" * 80 + "\n")
         f.write("RSI OPTIONS STRATEGY - BACKTEST TRADE LOG\n")
         f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
         f.write(f"Period: {config.BACKTEST_START_DATE} to {config.BACKTEST_END_DATE}\n")
         f.write(f"Entry Levels: +{config.ENTRY_LEVEL_1_PCT}% / "
                 f"+{config.ENTRY_LEVEL_2_PCT}% / +{config.ENTRY_LEVEL_3_PCT}%\n")
-        f.write(f"SL: {config.STRATEGY_CONFIG['stop_loss_pct']}% | "
-                f"TP: {config.STRATEGY_CONFIG['target_pct']}%\n")
+        f.write(f"SL: {config.STOP_LOSS_PCT}% | "
+                f"TP: {config.TARGET_PCT}%\n")
         f.write("=" * 80 + "\n\n")
 
         for instrument, report in reports.items():
@@ -777,7 +1440,7 @@ def write_trade_log(reports: Dict[str, Dict]):
                     f"Partial: {r['partial_entries']}\n\n")
 
             # Individual trades
-            trades_df = r['trades_df']
+            trades_df = load_trades(r)
             for i, (_, trade) in enumerate(trades_df.iterrows(), 1):
                 f.write(f"  --- Trade #{i} ---\n")
                 f.write(f"  {trade['option_type']} | Strike: {trade['strike']} | "
@@ -813,124 +1476,147 @@ def write_trade_log(reports: Dict[str, Dict]):
 # ============================================
 # SUMMARY FILE WRITER
 # ============================================
+# Summary header: fixed by config, built once at import
+_SUMMARY_HEADER = (
+    "# Backtest Summary\n\n"
+    f"**Period**: {config.BACKTEST_START_DATE} to {config.BACKTEST_END_DATE}\n\n"
+    "## Strategy\n\n"
+    "- **Signal**: Sell ATM option when RSI(14) crosses above 70\n"
+    "- **RSI**: Calculated on continuous ATM option price (not underlying), "
+    "fresh each day\n"
+    f"- **Entry**: Staggered at +{config.ENTRY_LEVEL_1_PCT}% / "
+    f"+{config.ENTRY_LEVEL_2_PCT}% / +{config.ENTRY_LEVEL_3_PCT}% (33.33% each)\n"
+    f"- **Stop Loss**: {config.STOP_LOSS_PCT}% (exact fill assumed)\n"
+    f"- **Target**: {config.TARGET_PCT}% (exact fill assumed)\n"
+    f"- **Hours**: {config.TRADING_START_TIME} - {config.TRADING_END_TIME} IST\n"
+    "- **Expiry**: Nearest weekly (expiry_code = 1)\n"
+    "- **Strikes**: ATM only\n"
+    "- **Intraday**: Signals expire at EOD, positions force-closed at EOD\n"
+    f"- **Capital**: Rs {config.BACKTEST_INITIAL_CAPITAL:,} per instrument\n\n"
+)
+
+# Combined results block of the summary
+_SUMMARY_COMBINED_TEMPLATE = """---
+
+## Combined Results
+
+| Metric | Value |
+|--------|-------|
+| Total Capital Deployed | Rs {combined_capital:,.0f} |
+| Total Money P&L | Rs {total_money:,.2f} |
+| Combined Return | {combined_return:.2f}% |
+| Total Trades | {total_trades} |
+| Total Wins | {total_wins} ({win_share:.1f}%) |
+
+"""
+
+# Per-instrument block of the summary, up to the parts rows. Filled from
+# the report dict plus the exit-reason counts/shares in one format_map.
+_SUMMARY_INSTRUMENT_TEMPLATE = """---
+
+## {inst} (Lot Size: {lot})
+
+### Performance
+
+| Metric | Value |
+|--------|-------|
+| Initial Capital | Rs {initial_capital:,.0f} |
+| Final Capital | Rs {final_capital:,.0f} |
+| Money P&L | Rs {total_money_pnl:,.2f} |
+| Return | {return_pct:.2f}% |
+| Option P&L (points) | Rs {total_pnl:,.2f} |
+
+### Trade Statistics
+
+| Metric | Value |
+|--------|-------|
+| Total Trades | {total_trades} |
+| Wins | {wins} ({win_rate:.1f}%) |
+| Losses | {losses} |
+| Avg P&L per Trade | Rs {avg_money_pnl:,.2f} |
+| Avg Win | Rs {avg_win:,.2f} |
+| Avg Loss | Rs {avg_loss:,.2f} |
+| Max Win | Rs {max_win:,.2f} |
+| Max Loss | Rs {max_loss:,.2f} |
+
+### Exit Reasons
+
+| Reason | Count | % |
+|--------|-------|---|
+| Target | {target_n} | {target_share:.1f}% |
+| Stop Loss | {sl_n} | {sl_share:.1f}% |
+| EOD | {eod_n} | {eod_share:.1f}% |
+
+### By Option Type
+
+| Type | Trades | Money P&L |
+|------|--------|----------|
+| CE | {ce_trades} | Rs {ce_pnl:,.2f} |
+| PE | {pe_trades} | Rs {pe_pnl:,.2f} |
+
+### Entry Fill Breakdown
+
+| Parts Filled | Count |
+|-------------|-------|
+"""
+
+
 def write_summary(reports: Dict[str, Dict]):
     """Write a clean backtest summary file."""
     path = "backtest_summary.md"
 
-    with open(path, 'w') as f:
-        f.write("# Backtest Summary\n\n")
-        f.write(f"**Period**: {config.BACKTEST_START_DATE} to {config.BACKTEST_END_DATE}\n\n")
-        f.write("## Strategy\n\n")
-        f.write("- **Signal**: Sell ATM option when RSI(14) crosses above 70\n")
-        f.write("- **RSI**: Calculated on continuous ATM option price (not underlying), "
-                "fresh each day\n")
-        f.write(f"- **Entry**: Staggered at "
-                f"+{config.ENTRY_LEVEL_1_PCT}% / "
-                f"+{config.ENTRY_LEVEL_2_PCT}% / "
-                f"+{config.ENTRY_LEVEL_3_PCT}% "
-                f"(33.33% each)\n")
-        f.write(f"- **Stop Loss**: {config.STRATEGY_CONFIG['stop_loss_pct']}% "
-                f"(exact fill assumed)\n")
-        f.write(f"- **Target**: {config.STRATEGY_CONFIG['target_pct']}% "
-                f"(exact fill assumed)\n")
-        f.write(f"- **Hours**: {config.TRADING_START_TIME} - {config.TRADING_END_TIME} IST\n")
-        f.write("- **Expiry**: Nearest weekly (expiry_code = 1)\n")
-        f.write("- **Strikes**: ATM only\n")
-        f.write("- **Intraday**: Signals expire at EOD, positions force-closed at EOD\n")
-        f.write(f"- **Capital**: Rs {config.BACKTEST_INITIAL_CAPITAL:,} per instrument\n\n")
-
-        # Combined summary
-        total_money = sum(r['total_money_pnl'] for r in reports.values())
-        total_trades = sum(r['total_trades'] for r in reports.values())
-        total_wins = sum(r['wins'] for r in reports.values())
-        combined_capital = config.BACKTEST_INITIAL_CAPITAL * len(reports)
-
-        f.write("---\n\n")
-        f.write("## Combined Results\n\n")
-        f.write(f"| Metric | Value |\n")
-        f.write(f"|--------|-------|\n")
-        f.write(f"| Total Capital Deployed | Rs {combined_capital:,.0f} |\n")
-        f.write(f"| Total Money P&L | Rs {total_money:,.2f} |\n")
-        f.write(f"| Combined Return | {(total_money / combined_capital) * 100:.2f}% |\n")
-        f.write(f"| Total Trades | {total_trades} |\n")
-        f.write(f"| Total Wins | {total_wins} "
-                f"({(total_wins/total_trades*100):.1f}%) |\n\n")
-
-        # Per-instrument tables
-        for inst, r in reports.items():
-            trades_df = r['trades_df']
-            lot = r['lot_size']
-
-            # Exit reason counts
-            exit_counts = trades_df['exit_reason'].value_counts()
-            target_n = exit_counts.get('TARGET', 0)
-            sl_n = exit_counts.get('STOP_LOSS', 0)
-            eod_n = exit_counts.get('EOD', 0)
-
-            # Option type splits
-            ce_df = trades_df[trades_df['option_type'] == 'CE']
-            pe_df = trades_df[trades_df['option_type'] == 'PE']
-
-            # Parts breakdown
-            parts_counts = trades_df['parts_filled'].value_counts().sort_index()
-
-            # Win/loss money stats
-            wins_df = trades_df[trades_df['money_pnl'] > 0]
-            loss_df = trades_df[trades_df['money_pnl'] < 0]
-            avg_win = wins_df['money_pnl'].mean() if len(wins_df) > 0 else 0
-            avg_loss = loss_df['money_pnl'].mean() if len(loss_df) > 0 else 0
-
-            f.write("---\n\n")
-            f.write(f"## {inst} (Lot Size: {lot})\n\n")
-
-            # Performance table
-            f.write("### Performance\n\n")
-            f.write("| Metric | Value |\n")
-            f.write("|--------|-------|\n")
-            f.write(f"| Initial Capital | Rs {r['initial_capital']:,.0f} |\n")
-            f.write(f"| Final Capital | Rs {r['final_capital']:,.0f} |\n")
-            f.write(f"| Money P&L | Rs {r['total_money_pnl']:,.2f} |\n")
-            f.write(f"| Return | {r['return_pct']:.2f}% |\n")
-            f.write(f"| Option P&L (points) | Rs {r['total_pnl']:,.2f} |\n\n")
-
-            # Trade stats table
-            f.write("### Trade Statistics\n\n")
-            f.write("| Metric | Value |\n")
-            f.write("|--------|-------|\n")
-            f.write(f"| Total Trades | {r['total_trades']} |\n")
-            f.write(f"| Wins | {r['wins']} ({r['win_rate']:.1f}%) |\n")
-            f.write(f"| Losses | {r['losses']} |\n")
-            f.write(f"| Avg P&L per Trade | Rs {r['avg_money_pnl']:,.2f} |\n")
-            f.write(f"| Avg Win | Rs {avg_win:,.2f} |\n")
-            f.write(f"| Avg Loss | Rs {avg_loss:,.2f} |\n")
-            f.write(f"| Max Win | Rs {r['max_win']:,.2f} |\n")
-            f.write(f"| Max Loss | Rs {r['max_loss']:,.2f} |\n\n")
-
-            # Exit reasons
-            f.write("### Exit Reasons\n\n")
-            f.write("| Reason | Count | % |\n")
-            f.write("|--------|-------|---|\n")
-            f.write(f"| Target | {target_n} | "
-                    f"{(target_n/r['total_trades']*100):.1f}% |\n")
-            f.write(f"| Stop Loss | {sl_n} | "
-                    f"{(sl_n/r['total_trades']*100):.1f}% |\n")
-            f.write(f"| EOD | {eod_n} | "
-                    f"{(eod_n/r['total_trades']*100):.1f}% |\n\n")
-
-            # Option type split
-            f.write("### By Option Type\n\n")
-            f.write("| Type | Trades | Money P&L |\n")
-            f.write("|------|--------|----------|\n")
-            f.write(f"| CE | {len(ce_df)} | Rs {ce_df['money_pnl'].sum():,.2f} |\n")
-            f.write(f"| PE | {len(pe_df)} | Rs {pe_df['money_pnl'].sum():,.2f} |\n\n")
-
-            # Entry fill breakdown
-            f.write("### Entry Fill Breakdown\n\n")
-            f.write("| Parts Filled | Count |\n")
-            f.write("|-------------|-------|\n")
-            for parts, count in parts_counts.items():
-                f.write(f"| {int(parts)}/3 | {count} |\n")
-            f.write(f"| Avg Parts | {r['avg_parts']:.2f} |\n\n")
+    capital = config.BACKTEST_INITIAL_CAPITAL
+
+    # Collect the whole file and write it in one call
+    lines: List[str] = [_SUMMARY_HEADER]
+    append = lines.append
+
+    # Combined summary
+    # One row per instrument: money P&L, trades, wins
+    totals = np.array([(r['total_money_pnl'], r['total_trades'], r['wins'])
+                       for r in reports.values()], dtype=np.float64).sum(axis=0)
+    total_money = totals[0]
+    total_trades, total_wins = int(totals[1]), int(totals[2])
+    win_share = _pct(total_wins, total_trades)
+    combined_capital = capital * len(reports)
+
+    append(_SUMMARY_COMBINED_TEMPLATE.format_map({
+        'combined_capital': combined_capital,
+        'total_money': total_money,
+        'combined_return': _pct(total_money, combined_capital),
+        'total_trades': total_trades,
+        'total_wins': total_wins,
+        'win_share': win_share,
+    }))
+
+    # Per-instrument tables
+    for inst, r in reports.items():
+        lot = r['lot_size']
+
+        # Counts, sums and means all come precomputed from generate_report
+        target_n, sl_n, eod_n = r['exit_counts'][_SUMMARY_REASON_CODES]
+        n_trades = r['total_trades']
+        fill_counts = r['fill_counts']
+
+        append(_SUMMARY_INSTRUMENT_TEMPLATE.format_map({
+            **r,
+            'inst': inst,
+            'lot': lot,
+            'target_n': target_n,
+            'sl_n': sl_n,
+            'eod_n': eod_n,
+            'target_share': _pct(target_n, n_trades),
+            'sl_share': _pct(sl_n, n_trades),
+            'eod_share': _pct(eod_n, n_trades),
+        }))
+
+        # Entry fill breakdown rows (part counts that occur, ascending)
+        for parts in np.flatnonzero(fill_counts):
+            append(f"| {parts}/3 | {fill_counts[parts]} |\n")
+        append(f"| Avg Parts | {r['avg_parts']:.2f} |\n\n")
+
+    with open(path, 'w', buffering=1 << 20) as f:
+        f.write(''.join(lines))
 
     logger.info(f"Summary saved to {path}")
 
@@ -938,8 +1624,35 @@ def write_summary(reports: Dict[str, Dict]):
 # ============================================
 # MAIN
 # ============================================
-def run_backtest_for_instrument(instrument: str) -> Optional[Dict]:
-    """Run backtest for one instrument. Returns report dict."""
+def save_trades(report: Dict, out_dir: str = ".") -> str:
+    """Write a report's trades as parquet (+ CSV if enabled). Returns the parquet path."""
+    inst = report['instrument']
+    path = os.path.join(out_dir, f"backtest_results_{inst}.parquet")
+    pq.write_table(report['trades_table'], path, compression='zstd', compression_level=3)
+    if config.BACKTEST_WRITE_CSV:
+        write_trades_csv(report['trades_table'],
+                         os.path.join(out_dir, f"backtest_results_{inst}.csv"))
+        logger.info(f"Saved {inst} -> {path} (+ .csv)")
+    else:
+        logger.info(f"Saved {inst} -> {path}")
+    return path
+
+
+def load_trades(report: Dict) -> pd.DataFrame:
+    """A report's trades: the in-memory frame, or read back from trades_path."""
+    if 'trades_df' in report:
+        return report['trades_df']
+    return pq.read_table(report['trades_path']).to_pandas()
+
+
+def run_backtest_for_instrument(instrument: str, out_dir: str = ".") -> Optional[Dict]:
+    """Run backtest for one instrument. Returns report dict.
+
+    Runs in a worker process: the trades are written to out_dir here and
+    the returned report carries only the scalar stats plus 'trades_path'
+    (no trades_df / trades_table to pickle back). The caller prints the
+    report so the console output stays in instrument order.
+    """
     data_path = config.BACKTEST_DATA_PATH.get(instrument)
     if not data_path:
         logger.error(f"No data path for {instrument}")
@@ -948,7 +1661,12 @@ def run_backtest_for_instrument(instrument: str) -> Optional[Dict]:
     engine = BacktestEngine(instrument, data_path)
     engine.run_backtest()
     report = engine.generate_report()
-    engine.print_report(report)
+    if not report:
+        return report
+
+    path = save_trades(report, out_dir)
+    report = {k: v for k, v in report.items() if k not in ('trades_df', 'trades_table')}
+    report['trades_path'] = path
     return report
 
 
@@ -956,21 +1674,25 @@ if __name__ == "__main__":
     instruments = ['NIFTY', 'SENSEX']
     reports = {}
 
-    for inst in instruments:
-        try:
-            report = run_backtest_for_instrument(inst)
+    # Instruments are independent: one process each, results in order.
+    # spawn, not fork: loading the parallel numba kernel at import starts
+    # its thread pool, and a forked copy of it hangs the parent at exit.
+    with ProcessPoolExecutor(max_workers=len(instruments),
+                             mp_context=multiprocessing.get_context('spawn')) as ex:
+        futures = [ex.submit(run_backtest_for_instrument, inst) for inst in instruments]
+        for inst, fut in zip(instruments, futures):
+            try:
+                report = fut.result()
+            except Exception as e:
+                logger.error(f"Error backtesting {inst}: {e}", exc_info=True)
+                continue
+            if report is None:
+                continue
+            BacktestEngine.print_report(report)
             if report:
                 reports[inst] = report
-        except Exception as e:
-            logger.error(f"Error backtesting {inst}: {e}", exc_info=True)
 
-    # Save CSV + trade log
     if reports:
-        for inst, report in reports.items():
-            filename = f"backtest_results_{inst}.csv"
-            report['trades_df'].to_csv(filename, index=False)
-            logger.info(f"Saved {inst} -> {filename}")
-
         # Write detailed trade log + summary
         write_trade_log(reports)
         write_summary(reports)
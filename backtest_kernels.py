@@ -0,0 +1,470 @@
+"""
+Numeric kernels for the backtesting engine (and the live strategy's
+per-minute RSI update).
+
+Compiled with numba when it is installed; otherwise the same functions
+run as plain Python over numpy arrays (slower, identical results).
+"""
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except ImportError:  # numba is optional
+    HAVE_NUMBA = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+# Compile options shared by all kernels. Signatures are pinned so each
+# kernel compiles (or loads from cache) at import, not on first call.
+# fastmath is left off: it allows reassociation/FMA, and the prices
+# and RSI here must match the pure Python/pandas results bit for bit.
+_JIT = dict(cache=True, nogil=True, boundscheck=False)
+
+
+def _sigs(template: str, dtypes=('float64',)) -> list:
+    """
+    Expand a signature template where {a} is an input array of each of
+    `dtypes`: one variant for writable C arrays and one for read-only
+    arrays (pandas hands out read-only views from to_numpy()).
+    """
+    sigs = []
+    for dt in dtypes:
+        sigs.append(template.format(a=f'{dt}[::1]'))
+        sigs.append(template.format(a=f"Array({dt}, 1, 'A', readonly=True)"))
+    return sigs
+
+
+# ============================================
+# EXIT CODES (returned by simulate_trade)
+# ============================================
+EXIT_NONE = 0        # still open at the last bar (caller handles EOD)
+EXIT_STOP_LOSS = 1
+EXIT_TARGET = 2
+EXIT_EOD = 3
+
+# Size of each staggered part, in % of the position
+PART_SIZES = (33.33, 33.33, 33.34)
+
+
+# ============================================
+# ROLLING MEAN (RSI)
+# ============================================
+@njit(cache=True, nogil=True, boundscheck=False)
+def _rolling_mean_into(values, window, out):
+    """rolling_mean() writing into `out` (same length as values)."""
+    n = len(values)
+    if n == 0:
+        return
+
+    nobs = 0
+    neg_ct = 0
+    sum_x = 0.0
+    comp_add = 0.0
+    comp_remove = 0.0
+    num_same = 0
+    prev_value = values[0]
+
+    for i in range(n):
+        # Remove the value leaving the window
+        if i >= window:
+            val = values[i - window]
+            if not np.isnan(val):
+                nobs -= 1
+                y = -val - comp_remove
+                t = sum_x + y
+                comp_remove = t - sum_x - y
+                sum_x = t
+                if np.signbit(val):
+                    neg_ct -= 1
+
+        # Add the new value
+        val = values[i]
+        if not np.isnan(val):
+            nobs += 1
+            y = val - comp_add
+            t = sum_x + y
+            comp_add = t - sum_x - y
+            sum_x = t
+            if np.signbit(val):
+                neg_ct += 1
+            if val == prev_value:
+                num_same += 1
+            else:
+                num_same = 1
+            prev_value = val
+
+        if nobs >= window and nobs > 0:
+            result = sum_x / nobs
+            if num_same >= nobs:
+                result = prev_value
+            elif neg_ct == 0 and result < 0:
+                result = 0.0
+            elif neg_ct == nobs and result > 0:
+                result = 0.0
+            out[i] = result
+        else:
+            out[i] = np.nan
+
+
+@njit(_sigs("float64[::1]({a}, int64)"), **_JIT)
+def rolling_mean(values, window):
+    """
+    Fixed-window mean, NaN until a full window of non-NaN values.
+
+    Same algorithm as pandas' rolling(window).mean(): compensated
+    (Kahan) running sums for added and removed values, a run of equal
+    values returns that value exactly, and all-positive / all-negative
+    windows are clipped at 0. Results match pandas bit for bit, which
+    keeps RSI crossings at exactly 70 unchanged.
+    """
+    out = np.empty(len(values))
+    _rolling_mean_into(values, window, out)
+    return out
+
+
+@njit(_sigs("Tuple((float64[::1], int64[:]))({a}, int64, float64)"),
+      error_model='numpy', **_JIT)
+def rsi_cross_above(prices, period, threshold):
+    """
+    RSI of a price series plus the indices where it crosses above
+    threshold (previous RSI <= threshold < current RSI).
+
+    Gains/losses are built in one pass over the prices, and RSI and the
+    crossing test share one pass carrying the previous RSI as a scalar.
+    Same formula as RSICalculator.calculate_rsi().
+    """
+    n = len(prices)
+    gain = np.zeros(n)
+    loss = np.zeros(n)
+    for i in range(1, n):
+        d = prices[i] - prices[i - 1]
+        if d > 0:
+            gain[i] = d
+        elif d < 0:
+            loss[i] = -d
+
+    avg_gain = rolling_mean(gain, period)
+    avg_loss = rolling_mean(loss, period)
+
+    rsi = np.empty(n)
+    cross_idx = np.empty(n, dtype=np.int64)
+    count = 0
+    prev = np.nan
+    for i in range(n):
+        r = 100 - 100 / (1 + avg_gain[i] / avg_loss[i])
+        rsi[i] = r
+        # NaN on either side never compares true
+        if prev <= threshold and r > threshold:
+            cross_idx[count] = i
+            count += 1
+        prev = r
+    return rsi, cross_idx[:count]
+
+
+@njit(_sigs("Tuple((float64[::1], boolean[::1]))({a}, int64[::1], int64, float64)"),
+      error_model='numpy', **_JIT)
+def rsi_cross_above_batch(prices, offsets, period, threshold):
+    """
+    rsi_cross_above() over many series stored back to back in one array:
+    series k is prices[offsets[k]:offsets[k + 1]].
+    Returns (rsi, cross) where cross[i] marks a crossing bar.
+
+    Each series is processed in one go through scratch buffers sized
+    for the longest series, so nothing is allocated per series and the
+    working set of one series stays in cache.
+    """
+    n = len(prices)
+    rsi = np.empty(n)
+    cross = np.zeros(n, dtype=np.bool_)
+    max_len = 0
+    for k in range(len(offsets) - 1):
+        max_len = max(max_len, offsets[k + 1] - offsets[k])
+    gain = np.empty(max_len)
+    loss = np.empty(max_len)
+    avg_gain = np.empty(max_len)
+    avg_loss = np.empty(max_len)
+
+    for k in range(len(offsets) - 1):
+        a = offsets[k]
+        m = offsets[k + 1] - a
+        if m == 0:
+            continue
+        gain[0] = 0.0
+        loss[0] = 0.0
+        for j in range(1, m):
+            d = prices[a + j] - prices[a + j - 1]
+            gain[j] = d if d > 0 else 0.0
+            loss[j] = -d if d < 0 else 0.0
+        _rolling_mean_into(gain[:m], period, avg_gain[:m])
+        _rolling_mean_into(loss[:m], period, avg_loss[:m])
+
+        prev = np.nan
+        for j in range(m):
+            r = 100 - 100 / (1 + avg_gain[j] / avg_loss[j])
+            rsi[a + j] = r
+            # NaN on either side never compares true
+            cross[a + j] = prev <= threshold and r > threshold
+            prev = r
+    return rsi, cross
+
+
+# ============================================
+# FIRST-CROSSING SEARCH
+# ============================================
+@njit(cache=True, nogil=True, boundscheck=False)
+def running_max(x):
+    """Running maximum of x (NaNs are skipped); non-decreasing."""
+    cmax = np.empty_like(x)
+    m = -np.inf
+    for i in range(len(x)):
+        if x[i] > m:
+            m = x[i]
+        cmax[i] = m
+    return cmax
+
+
+@njit(_sigs("int64({a}, float64)", ('float64', 'float32')), **_JIT)
+def first_at_or_above(x, level):
+    """
+    Index of the first x[i] >= level (len(x) if none).
+    Binary search on the running max, which is non-decreasing.
+    """
+    return np.searchsorted(running_max(x), level)
+
+
+@njit(_sigs("int64({a}, float64)", ('float64', 'float32')), **_JIT)
+def first_at_or_below(x, level):
+    """Index of the first x[i] <= level (len(x) if none)."""
+    return first_at_or_above(-x, -level)
+
+
+# ============================================
+# STAGGERED ENTRY + SL/TP SIMULATION
+# ============================================
+@njit(_sigs("Tuple((int64[::1], float64[::1], int64, float64, int64))"
+            "({a}, {a}, {a}, int64, int64, float64, float64, float64, float64, float64)",
+            ('float64', 'float32')),
+      **_JIT)
+def simulate_trade(high, low, close, start_i, eod_i,
+                   lvl1, lvl2, lvl3, sl_mult, tp_mult):
+    """
+    Resolve one trade over a contract's bars, starting at the signal bar.
+
+    Bars [start_i, eod_i) are regular session bars: entry levels are
+    checked first (part N only after part N-1, several parts may fill on
+    the same bar), then SL on the high and TP on the low against the
+    running average entry. Bar eod_i, if present, is the exit-time bar:
+    no new entries, SL/TP still apply, otherwise close at its close.
+
+    Levels are fixed at signal time, so each fill bar is one binary search
+    on a single running max of the highs. The average entry only changes
+    at fill bars, so SL/TP are searched once per stretch between fills.
+
+    Returns (fill_i[3], fill_px[3], exit_i, exit_px, exit_code).
+    Unfilled parts have fill_i = -1; exit_i = -1 with EXIT_NONE if the
+    trade is still open after the last bar.
+
+    Bars may be float32 or float64; levels, the average entry and the
+    returned prices are always float64.
+
+    Note: the average entry is accumulated in the same order as
+    Trade.get_avg_entry_price() so prices match it bit for bit.
+    """
+    n = len(high)
+    fill_i = np.full(3, -1, dtype=np.int64)
+    fill_px = np.full(3, np.nan)
+    if start_i >= eod_i:
+        return fill_i, fill_px, -1, np.nan, EXIT_NONE
+
+    # Fill bars: first bar (not before the previous part's) at or above each
+    # level, all three searched on one running max of the session highs
+    levels = (lvl1, lvl2, lvl3)
+    entry_max = running_max(high[start_i:eod_i])
+    n_filled = 0
+    prev_i = start_i
+    for k in range(3):
+        rel = np.searchsorted(entry_max, levels[k])
+        if rel == len(entry_max):
+            break
+        prev_i = max(start_i + rel, prev_i)
+        fill_i[k] = prev_i
+        fill_px[k] = levels[k]
+        n_filled += 1
+
+    # Exits: one SL/TP search per stretch of constant average entry
+    end_i = min(n, eod_i + 1)
+    weighted_sum = 0.0
+    weight_sum = 0.0
+    k = 0
+    while k < n_filled:
+        seg_start = fill_i[k]
+        while k < n_filled and fill_i[k] == seg_start:
+            weighted_sum += fill_px[k] * PART_SIZES[k]
+            weight_sum += PART_SIZES[k]
+            k += 1
+        seg_end = fill_i[k] if k < n_filled else end_i
+
+        avg_entry = weighted_sum / weight_sum
+        sl_price = avg_entry * sl_mult
+        tp_price = avg_entry * tp_mult
+        sl_i = seg_start + first_at_or_above(high[seg_start:seg_end], sl_price)
+        tp_i = seg_start + first_at_or_below(low[seg_start:seg_end], tp_price)
+        if sl_i < seg_end or tp_i < seg_end:
+            # Parts that would fill after the exit never fill
+            fill_i[k:] = -1
+            fill_px[k:] = np.nan
+        # SL is checked before TP on the same bar
+        if sl_i < seg_end and sl_i <= tp_i:
+            return fill_i, fill_px, sl_i, sl_price, EXIT_STOP_LOSS
+        if tp_i < seg_end:
+            return fill_i, fill_px, tp_i, tp_price, EXIT_TARGET
+
+    if n_filled > 0 and eod_i < n:
+        return fill_i, fill_px, eod_i, close[eod_i], EXIT_EOD
+    return fill_i, fill_px, -1, np.nan, EXIT_NONE
+
+
+# ============================================
+# WHOLE-BACKTEST SIMULATION (no minute loop)
+# ============================================
+_NEVER = np.iinfo(np.int64).max   # track stays busy for the rest of the day
+
+
+@njit(_sigs("Tuple((boolean[::1], int64[::1], int64[::1], int64[:, ::1], float64[:, ::1], "
+            "int64[::1], float64[::1], int64[::1]))"
+            "({a}, {a}, {a}, int64[::1], int64[::1], int64[::1], int64[::1], int64[::1], "
+            "float64[:, ::1], int64[::1], float64, float64)",
+            ('float64', 'float32')),
+      parallel=True, **_JIT)
+def simulate_signals(high, low, close, times, seg_start, seg_end, sig_t, sig_exit_t,
+                     levels, group_offsets, sl_mult, tp_mult):
+    """
+    Run the CE/PE track state machine over every signal of the backtest.
+
+    Bars are stored contract by contract (each contract's bars time
+    ordered, `times` as int64). Signal k belongs to the contract in
+    bars [seg_start[k], seg_end[k]), fires at sig_t[k] with entry levels
+    levels[k] and exit time sig_exit_t[k] (exit time of its day).
+    Signals are grouped by (day, track) via group_offsets, time ordered
+    within a group. Groups are independent (both tracks reset at EOD),
+    so they run in parallel; each writes only its own signals' outputs.
+
+    A track takes a signal only when idle: a signal is skipped while the
+    previous trade of the track is open, including on its exit minute
+    (signals are checked before exits). A trade that never fills, or
+    that has no exit bar, keeps the track busy until the end of the day.
+
+    Returns per signal: (taken, lo, hi, fill_i[k, 3], fill_px[k, 3],
+    exit_i, exit_px, exit_code), the last five as in simulate_trade()
+    over bars [lo, hi) (signal minute to exit time).
+    """
+    n = len(sig_t)
+    taken = np.zeros(n, dtype=np.bool_)
+    lo_out = np.full(n, -1, dtype=np.int64)
+    hi_out = np.full(n, -1, dtype=np.int64)
+    fill_i = np.full((n, 3), -1, dtype=np.int64)
+    fill_px = np.full((n, 3), np.nan)
+    exit_i = np.full(n, -1, dtype=np.int64)
+    exit_px = np.full(n, np.nan)
+    exit_code = np.zeros(n, dtype=np.int64)
+
+    for g in prange(len(group_offsets) - 1):
+        busy_until = np.iinfo(np.int64).min
+        for k in range(group_offsets[g], group_offsets[g + 1]):
+            if sig_t[k] <= busy_until:
+                continue
+
+            # Bars from the signal minute up to and including exit time
+            a = seg_start[k]
+            seg_times = times[a:seg_end[k]]
+            lo = a + np.searchsorted(seg_times, sig_t[k])
+            hi = a + np.searchsorted(seg_times, sig_exit_t[k], side='right')
+            bars = hi - lo
+            eod_i = bars - 1 if bars > 0 and times[hi - 1] == sig_exit_t[k] else bars
+
+            f_i, f_px, e_i, e_px, e_code = simulate_trade(
+                high[lo:hi], low[lo:hi], close[lo:hi], 0, eod_i,
+                levels[k, 0], levels[k, 1], levels[k, 2], sl_mult, tp_mult)
+
+            taken[k] = True
+            lo_out[k] = lo
+            hi_out[k] = hi
+            fill_i[k] = f_i
+            fill_px[k] = f_px
+            exit_i[k] = e_i
+            exit_px[k] = e_px
+            exit_code[k] = e_code
+
+            if f_i[0] < 0 or e_i < 0:
+                busy_until = _NEVER
+            else:
+                busy_until = times[lo + e_i]
+    return taken, lo_out, hi_out, fill_i, fill_px, exit_i, exit_px, exit_code
+
+
+# ============================================
+# LIVE RSI (strategy channels)
+# ============================================
+@njit("void(int64[::1], float64[::1], float64[::1], float64[:, ::1], float64[:, ::1], "
+      "int64[::1], boolean[::1], float64[::1], boolean[::1])", **_JIT)
+def update_rsi_channels(idx, prices, last_price, gain_window, loss_window,
+                        n_deltas, above70, rsi, crossed):
+    """
+    Push one new price into each of the channels idx of the live
+    strategy's RSI state (RSIOptionsStrategy._update_channels).
+
+    State arrays have one row per channel: previous price (NaN before
+    the first price), gains/losses of the last `period` price changes
+    (oldest first, period = window width), number of changes seen,
+    whether the last RSI was above 70, and the last RSI (NaN until the
+    window is full). crossed[k] is set when channel idx[k] crossed
+    above 70 (previous RSI <= 70 < current RSI).
+
+    Same simple-average formula as RSICalculator.calculate_rsi(); the
+    window sums add oldest to newest like Python's sum().
+    """
+    period = gain_window.shape[1]
+    for k in range(len(idx)):
+        i = idx[k]
+        crossed[k] = False
+        prev = last_price[i]
+        last_price[i] = prices[k]
+        # A channel's first price has no change to record yet
+        if np.isnan(prev):
+            continue
+
+        # Shift the windows left (the oldest drops out), append the change
+        d = prices[k] - prev
+        for j in range(period - 1):
+            gain_window[i, j] = gain_window[i, j + 1]
+            loss_window[i, j] = loss_window[i, j + 1]
+        gain_window[i, period - 1] = d if d > 0 else 0.0
+        loss_window[i, period - 1] = -d if d < 0 else 0.0
+        n_deltas[i] += 1
+        if n_deltas[i] < period:
+            continue
+
+        sum_gain = 0.0
+        sum_loss = 0.0
+        for j in range(period):
+            sum_gain += gain_window[i, j]
+            sum_loss += loss_window[i, j]
+        avg_loss = sum_loss / period
+        if avg_loss == 0:
+            r = 100.0
+        else:
+            r = 100 - (100 / (1 + (sum_gain / period) / avg_loss))
+
+        # A channel's first RSI has no previous one, so it cannot cross
+        above = r > 70
+        crossed[k] = n_deltas[i] > period and not above70[i] and above
+        above70[i] = above
+        rsi[i] = r
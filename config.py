@@ -24,6 +24,11 @@ STRATEGY_CONFIG = {
     'target_pct': 10,       # TP: exit if price drops 10% below avg entry
 }
 
+# Same values as plain module attributes
+RSI_LENGTH = STRATEGY_CONFIG['rsi_length']
+STOP_LOSS_PCT = STRATEGY_CONFIG['stop_loss_pct']
+TARGET_PCT = STRATEGY_CONFIG['target_pct']
+
 
 # ============================================
 # STAGGERED ENTRY LEVELS
@@ -81,12 +86,30 @@ BACKTEST_START_DATE = "2025-01-01"
 BACKTEST_END_DATE = "2025-12-31"
 BACKTEST_INITIAL_CAPITAL = 200000  # Rs 2,00,000
 
-# Data paths (parquet files with 1-min options OHLC)
+# Data paths (parquet files with 1-min options OHLC, or dataset
+# directories partitioned by expiry -- see partition_data.py)
 BACKTEST_DATA_PATH = {
     'NIFTY': 'data/options/nifty/NIFTY_OPTIONS_1m.parquet',
     'SENSEX': 'data/options/sensex/SENSEX_OPTIONS_1m.parquet',
 }
 
+# RSI cache per contract price series (None = in-memory only)
+BACKTEST_RSI_CACHE_DIR = "cache/rsi"
+
+# Write backtest_detailed_<INSTRUMENT>.log, a minute-by-minute status log
+# for manual verification. Off: the same trades are resolved in one kernel
+# call without the minute loop (much faster).
+BACKTEST_DETAILED_LOG = False
+
+# Trades are saved as backtest_results_<INSTRUMENT>.parquet (zstd).
+# True also writes the same trades as backtest_results_<INSTRUMENT>.csv.
+BACKTEST_WRITE_CSV = False
+
+# Dtype of the per-trade bar arrays fed to the simulation kernel.
+# "float32" halves their memory, but bar prices are then rounded to
+# float32, which can move a fill or exit that lands exactly on a level.
+BACKTEST_KERNEL_DTYPE = "float64"
+
 
 # ============================================
 # LIVE TRADING SETTINGS
@@ -4,16 +4,202 @@ Handles live data feed for options and spot prices
 Updated for dhanhq v2.0.2 API
 """
 
-from dhanhq import dhanhq
+from dhanhq import dhanhq, marketfeed
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
-import pytz
+import asyncio
+import atexit
+import glob
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
 import logging
 from typing import Dict, List, Optional, Tuple
 import time
 
+from rate_limiter import TokenBucket
+
+try:
+    import orjson
+except ImportError:  # orjson is optional
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+IST = ZoneInfo('Asia/Kolkata')
+
+# dhanhq decodes every response with json.loads(response.content); orjson
+# parses the same bytes 2-3x faster, which matters for option chain payloads
+_dhan_sdk = sys.modules.get(dhanhq.__module__)
+if orjson is not None and hasattr(_dhan_sdk, 'json_loads'):
+    _dhan_sdk.json_loads = orjson.loads
+
+# Upper-case month names for the DD-MMM-YYYY expiry format, so expiries are
+# built and parsed without locale-dependent strftime/strptime('%b')
+_MONTHS = ('JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN',
+           'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC')
+_MONTH_NUMBERS = {name: number for number, name in enumerate(_MONTHS, 1)}
+
+
+def _format_expiry(d: date) -> str:
+    """Format a date as DD-MMM-YYYY (e.g. '19-FEB-2026')"""
+    return f"{d.day:02d}-{_MONTHS[d.month - 1]}-{d.year}"
+
+
+def _expiry_to_iso(expiry: str) -> str:
+    """Convert DD-MMM-YYYY to YYYY-MM-DD (e.g. '19-FEB-2026' -> '2026-02-19')"""
+    day, month, year = expiry.split('-')
+    return f"{int(year):04d}-{_MONTH_NUMBERS[month.upper()]:02d}-{int(day):02d}"
+
+
+# Option chain frame layout: one row per strike and option type
+OPTION_CHAIN_COLUMNS = [
+    'strike', 'option_type', 'last_price', 'oi', 'volume', 'implied_volatility',
+    'delta', 'theta', 'gamma', 'vega', 'top_bid_price', 'top_ask_price'
+]
+OPTION_CHAIN_DTYPES = {
+    'strike': 'float64',
+    'option_type': pd.CategoricalDtype(['CE', 'PE']),
+    'last_price': 'float64',
+    'oi': 'int64',
+    'volume': 'int64',
+    'implied_volatility': 'float64',
+    'delta': 'float64',
+    'theta': 'float64',
+    'gamma': 'float64',
+    'vega': 'float64',
+    'top_bid_price': 'float64',
+    'top_ask_price': 'float64',
+}
+
+
+class LRUCache(OrderedDict):
+    """
+    Dict that keeps at most `maxsize` entries, evicting the least recently used
+    
+    Reads (`[]`, get) and writes mark an entry as recently used. Thread-safe:
+    lookups run concurrently from AsyncDhanDataFeed's worker threads, so
+    each read/write and its reordering happen under one lock
+    """
+    
+    def __init__(self, maxsize: int):
+        super().__init__()
+        self.maxsize = maxsize
+        self._lock = threading.RLock()
+    
+    def __getitem__(self, key):
+        with self._lock:
+            value = super().__getitem__(key)
+            self.move_to_end(key)
+            return value
+    
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+    
+    def __setitem__(self, key, value):
+        with self._lock:
+            super().__setitem__(key, value)
+            self.move_to_end(key)
+            if len(self) > self.maxsize:
+                self.popitem(last=False)
+    
+    def snapshot(self) -> Dict:
+        """Plain dict copy of the entries, consistent under concurrent writes"""
+        with self._lock:
+            return dict(super().items())
+
+
+class OptionTickStream:
+    """
+    Live option LTPs pushed over Dhan's market feed websocket (ticker mode)
+    
+    A daemon thread owns the dhanhq DhanFeed and its asyncio loop: it
+    connects, subscribes once and hands every ticker packet to
+    on_tick(contract, ltp) until stop(). A dropped connection is reopened
+    with exponential backoff.
+    """
+    
+    RECONNECT_DELAY = 1.0       # Seconds before the first reconnect attempt
+    MAX_RECONNECT_DELAY = 30.0  # Backoff ceiling
+    
+    def __init__(self, client_id: str, access_token: str,
+                 contracts: Dict[Tuple[int, int], Tuple], on_tick):
+        """
+        Args:
+            client_id: Dhan client ID
+            access_token: Dhan access token
+            contracts: (feed exchange segment, security ID) -> contract tuple
+            on_tick: Called as on_tick(contract, ltp) from the feed thread
+        """
+        self._client_id = client_id
+        self._access_token = access_token
+        self._contracts = contracts
+        self._on_tick = on_tick
+        self._feed = None
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='dhan-feed', daemon=True)
+        self._thread.start()
+    
+    def _run(self):
+        """Feed thread: connect, subscribe and dispatch ticks until stopped"""
+        # DhanFeed picks up the thread's event loop in its constructor
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        instruments = [
+            (segment, str(security_id), marketfeed.Ticker)
+            for segment, security_id in self._contracts
+        ]
+        delay = self.RECONNECT_DELAY
+        
+        while not self._stopped.is_set():
+            try:
+                feed = marketfeed.DhanFeed(self._client_id, self._access_token,
+                                           instruments, version='v2')
+                self._feed = feed
+                feed.run_forever()  # Connects and subscribes
+                logger.info("Dhan feed connected (%d contracts)", len(instruments))
+                delay = self.RECONNECT_DELAY
+                
+                while not self._stopped.is_set():
+                    packet = feed.get_data()
+                    if not packet or packet.get('type') != 'Ticker Data':
+                        continue
+                    contract = self._contracts.get(
+                        (packet['exchange_segment'], packet['security_id'])
+                    )
+                    if contract is not None:
+                        self._on_tick(contract, float(packet['LTP']))
+            
+            except Exception as e:
+                if self._stopped.is_set():
+                    break
+                logger.warning("Dhan feed dropped (%s), reconnecting in %.0fs", e, delay)
+                self._stopped.wait(delay)
+                delay = min(delay * 2, self.MAX_RECONNECT_DELAY)
+        
+        loop.close()
+    
+    def stop(self):
+        """Close the websocket and end the feed thread; later ticks are dropped"""
+        self._stopped.set()
+        feed = self._feed
+        if feed is not None and feed.ws is not None:
+            # The feed thread is blocked in ws.recv() on its own loop;
+            # closing the socket there wakes it up
+            try:
+                asyncio.run_coroutine_threadsafe(feed.ws.close(), feed.loop)
+            except RuntimeError:  # Loop already closed
+                pass
+        self._thread.join(timeout=5)
+
 
 class DhanDataFeed:
     """
@@ -35,6 +221,36 @@ class DhanDataFeed:
         'RELIANCE': {'exchange': 'NSE_EQ', 'security_id': 2885},  # Reliance Stock
         'HDFCBANK': {'exchange': 'NSE_EQ', 'security_id': 1333}   # HDFC Bank Stock
     }
+    # Responses key securities by the string ID; precompute it once
+    for _info in SECURITY_IDS.values():
+        _info['security_id_str'] = str(_info['security_id'])
+    del _info
+    
+    # Strike rounding intervals
+    STRIKE_STEPS = {
+        'NIFTY': 50,
+        'BANKNIFTY': 100,
+        'SENSEX': 100,
+        'RELIANCE': 5,
+        'HDFCBANK': 10
+    }
+    
+    # Scrip master columns kept after load (the rest are never read)
+    SECURITY_LIST_COLUMNS = [
+        'SEM_EXM_EXCH_ID', 'SEM_SMST_SECURITY_ID', 'SEM_TRADING_SYMBOL',
+        'SEM_EXPIRY_DATE', 'SEM_STRIKE_PRICE', 'SEM_OPTION_TYPE'
+    ]
+    
+    # Market feed exchange segment codes for option exchanges
+    FEED_SEGMENTS = {'NSE_FNO': marketfeed.NSE_FNO, 'BSE_FNO': marketfeed.BSE_FNO}
+    
+    # requests HTTPAdapter settings for the Dhan client's session
+    HTTP_POOL = {'pool_connections': 4, 'pool_maxsize': 10}
+    
+    # On-disk cache of the scrip master and option security IDs between runs
+    CACHE_DIR = 'cache'
+    CACHE_MAX_AGE = 24 * 60 * 60  # Seconds before the ID cache is refetched
+    SYMBOLS_CACHE_SIZE = 10000    # Max option security IDs kept in memory
     
     def __init__(self, client_id: str, access_token: str):
         """
@@ -45,35 +261,77 @@ class DhanDataFeed:
             access_token: Dhan access token
         """
         # Initialize Dhan client with v2.0.2 API (no DhanContext needed)
-        self.dhan = dhanhq(client_id, access_token)
-        self.ist = pytz.timezone('Asia/Kolkata')
+        # The client keeps one requests.Session (keep-alive); the pool is sized
+        # so concurrent callers each reuse a warm connection
+        self.dhan = dhanhq(client_id, access_token, pool=self.HTTP_POOL)
+        # Kept for the market feed websocket, which authenticates separately
+        self.client_id = client_id
+        self.access_token = access_token
         
-        # Cache for option symbols and security IDs
-        self.option_symbols_cache = {}
+        # Cache for option symbols and security IDs (persisted across runs,
+        # bounded so long sessions scanning many strikes don't grow it forever)
+        self.option_symbols_cache = LRUCache(self.SYMBOLS_CACHE_SIZE)
+        self.option_symbols_cache.update(self._load_symbols_cache())
+        atexit.register(self._save_symbols_cache)
         
         # Security list DataFrame (loaded on demand)
         self.security_list_df = None
         self.security_list_loaded = False
+        # (underlying, strike, 'YYYY-MM-DD' expiry, CE/PE) -> security ID
+        self._opt_index = {}
+        
+        # Weekly expiry per (instrument, IST trading date) - changes at most daily
+        self._expiry_cache: Dict[Tuple[str, date], str] = {}
         
-        # Rate limiting - track last API call time
-        self.last_api_call = 0
-        self.min_api_interval = 1.0  # Minimum 1 second between API calls
+        # Rate limiting - one token bucket per endpoint group
+        self.min_api_interval = 1.0  # Long-run 1 request per second per endpoint
+        self.api_burst = 5           # Requests that may go out back-to-back after idle time
+        self._buckets = {}
+        self._buckets_lock = threading.Lock()
         
         logger.info("Dhan API client initialized (v2.0.2)")
+        
+        # Download the security list in the background, overlapping the first
+        # spot/expiry calls; option ID lookups wait on the event
+        self._security_list_lock = threading.Lock()
+        self._security_list_ready = threading.Event()
+        threading.Thread(target=self._load_security_list_background, daemon=True).start()
     
-    def _rate_limit(self):
+    def _rate_limit(self, endpoint: str = 'quote'):
         """
         Enforce rate limiting - wait if needed
-        API limit: 1 request per second
+        API limit: 1 request per second per endpoint group
+        
+        Each endpoint group ('quote', 'option_chain', 'historical') has its
+        own bucket, so unrelated calls don't wait on each other, and tokens
+        saved up while idle allow a short burst of api_burst calls.
+        Thread-safe.
+        
+        Args:
+            endpoint: Endpoint group the next request belongs to
         """
-        current_time = time.time()
-        time_since_last_call = current_time - self.last_api_call
+        if self.min_api_interval <= 0:
+            return
         
-        if time_since_last_call < self.min_api_interval:
-            sleep_time = self.min_api_interval - time_since_last_call
-            time.sleep(sleep_time)
+        with self._buckets_lock:
+            bucket = self._buckets.get(endpoint)
+            if bucket is None:
+                bucket = TokenBucket(1.0 / self.min_api_interval, self.api_burst)
+                self._buckets[endpoint] = bucket
         
-        self.last_api_call = time.time()
+        bucket.consume()
+    
+    @staticmethod
+    def _security_data(response: Dict, exchange: str, security_id: str) -> Optional[Dict]:
+        """
+        One security's entry from a ticker/ohlc response, or None if absent
+        
+        Response structure: {'data': {'data': {exchange: {security_id: {...}}}}}
+        """
+        try:
+            return response['data']['data'][exchange][security_id]
+        except (KeyError, TypeError):
+            return None
     
     def get_spot_price(self, instrument: str) -> Optional[float]:
         """
@@ -89,7 +347,7 @@ class DhanDataFeed:
             # Get security info
             security_info = self.SECURITY_IDS.get(instrument)
             if not security_info:
-                logger.error(f"Security ID not found for {instrument}")
+                logger.error("Security ID not found for %s", instrument)
                 return None
             
             # Apply rate limiting
@@ -107,23 +365,79 @@ class DhanDataFeed:
             # {'status': 'success', 'remarks': '', 'data': {'data': {'IDX_I': {'13': {'last_price': 25471.1}}}, 'status': 'success'}}
             if response and response.get('status') == 'success':
                 # Navigate through nested 'data' structure
-                outer_data = response.get('data', {})
-                inner_data = outer_data.get('data', {})
-                exchange_data = inner_data.get(security_info['exchange'], {})
-                security_data = exchange_data.get(str(security_info['security_id']), {})
-                ltp = security_data.get('last_price')
+                security_data = self._security_data(
+                    response, security_info['exchange'], security_info['security_id_str']
+                )
+                ltp = security_data.get('last_price') if security_data else None
                 
                 if ltp:
-                    logger.info(f"Fetched {instrument} spot price: ₹{ltp}")
+                    logger.info("Fetched %s spot price: ₹%s", instrument, ltp)
                     return float(ltp)
             
-            logger.warning(f"No LTP data found for {instrument}. Response: {response}")
+            logger.warning("No LTP data found for %s. Response: %s", instrument, response)
             return None
             
         except Exception as e:
-            logger.error(f"Error fetching spot price for {instrument}: {e}")
+            logger.error("Error fetching spot price for %s: %s", instrument, e)
             return None
     
+    def get_spot_prices(self, instruments: List[str]) -> Dict[str, float]:
+        """
+        Get current spot prices for several instruments in one API call
+        
+        ticker_data accepts several security IDs per exchange, so all
+        instruments share one request (and one rate-limit wait)
+        
+        Args:
+            instruments: Instrument names (NIFTY, SENSEX, BANKNIFTY, etc.)
+            
+        Returns:
+            Dict of instrument -> spot price (instruments without data are left out)
+        """
+        # Group security IDs by exchange: {'IDX_I': [13, 51], 'NSE_EQ': [2885]}
+        securities = defaultdict(list)
+        known = []
+        for instrument in instruments:
+            security_info = self.SECURITY_IDS.get(instrument)
+            if not security_info:
+                logger.error("Security ID not found for %s", instrument)
+                continue
+            securities[security_info['exchange']].append(security_info['security_id'])
+            known.append(instrument)
+        
+        if not known:
+            return {}
+        
+        try:
+            # Apply rate limiting (once for the whole batch)
+            self._rate_limit()
+            
+            response = self.dhan.ticker_data(securities=dict(securities))
+            
+            # Same nested structure as get_spot_price, one entry per security
+            prices = {}
+            if response and response.get('status') == 'success':
+                for instrument in known:
+                    security_info = self.SECURITY_IDS[instrument]
+                    security_data = self._security_data(
+                        response, security_info['exchange'], security_info['security_id_str']
+                    )
+                    ltp = security_data.get('last_price') if security_data else None
+                    if ltp:
+                        prices[instrument] = float(ltp)
+            
+            if prices and logger.isEnabledFor(logging.INFO):
+                logger.info("Fetched spot prices: %s",
+                            ", ".join(f"{inst} ₹{ltp}" for inst, ltp in prices.items()))
+            missing = [inst for inst in known if inst not in prices]
+            if missing:
+                logger.warning("No LTP data found for %s. Response: %s", ', '.join(missing), response)
+            return prices
+            
+        except Exception as e:
+            logger.error("Error fetching spot prices for %s: %s", ', '.join(known), e)
+            return {}
+    
     def get_weekly_expiry(self, instrument: str) -> str:
         """
         Get next weekly expiry date from Dhan API
@@ -136,16 +450,23 @@ class DhanDataFeed:
             
         Returns:
             Expiry date in DD-MMM-YYYY format (e.g., '17-FEB-2026')
+            
+        The API result is cached for the rest of the IST trading day
         """
+        today = datetime.now(IST).date()
+        cached = self._expiry_cache.get((instrument, today))
+        if cached:
+            return cached
+        
         try:
             # Get security info for the underlying
             security_info = self.SECURITY_IDS.get(instrument)
             if not security_info:
-                logger.error(f"Security ID not found for {instrument}")
+                logger.error("Security ID not found for %s", instrument)
                 return self._calculate_expiry_fallback(instrument)
             
             # Apply rate limiting
-            self._rate_limit()
+            self._rate_limit('option_chain')
             
             # Get expiry list from Dhan API
             response = self.dhan.expiry_list(
@@ -160,15 +481,16 @@ class DhanDataFeed:
                     # Get the first (nearest) expiry date
                     # Format is 'YYYY-MM-DD', convert to 'DD-MMM-YYYY'
                     next_expiry = expiry_dates[0]
-                    expiry_date = datetime.strptime(next_expiry, '%Y-%m-%d')
-                    return expiry_date.strftime('%d-%b-%Y').upper()
+                    expiry = _format_expiry(date.fromisoformat(next_expiry))
+                    self._expiry_cache[(instrument, today)] = expiry
+                    return expiry
             
             # Fallback to calculation if API fails
-            logger.warning(f"Could not fetch expiry from API, using calculation")
+            logger.warning("Could not fetch expiry from API, using calculation")
             return self._calculate_expiry_fallback(instrument)
             
         except Exception as e:
-            logger.error(f"Error fetching expiry for {instrument}: {e}")
+            logger.error("Error fetching expiry for %s: %s", instrument, e)
             return self._calculate_expiry_fallback(instrument)
     
     def _calculate_expiry_fallback(self, instrument: str) -> str:
@@ -183,7 +505,7 @@ class DhanDataFeed:
         Returns:
             Expiry date in DD-MMM-YYYY format
         """
-        today = datetime.now(self.ist).date()
+        today = datetime.now(IST).date()
         
         # Different expiry days for different instruments
         if instrument in ['NIFTY', 'BANKNIFTY']:
@@ -201,14 +523,14 @@ class DhanDataFeed:
         
         # If today is expiry day and time is past 3:30 PM, get next week
         if days_ahead == 0:
-            current_time = datetime.now(self.ist).time()
+            current_time = datetime.now(IST).time()
             if current_time.hour >= 15 and current_time.minute >= 30:
                 days_ahead = 7
         
         expiry_date = today + timedelta(days=days_ahead)
         
         # Format: DD-MMM-YYYY (e.g., 15-FEB-2026)
-        return expiry_date.strftime('%d-%b-%Y').upper()
+        return _format_expiry(expiry_date)
     
     def get_monthly_expiry(self) -> str:
         """
@@ -217,7 +539,7 @@ class DhanDataFeed:
         Returns:
             Expiry date in DD-MMM-YYYY format
         """
-        today = datetime.now(self.ist).date()
+        today = datetime.now(IST).date()
         
         # Get last day of current month
         if today.month == 12:
@@ -225,11 +547,10 @@ class DhanDataFeed:
         else:
             last_day = datetime(today.year, today.month + 1, 1).date() - timedelta(days=1)
         
-        # Find last Thursday
-        while last_day.weekday() != 3:  # Thursday = 3
-            last_day -= timedelta(days=1)
+        # Step back to the last Thursday (Thursday = 3)
+        last_day -= timedelta(days=(last_day.weekday() - 3) % 7)
         
-        return last_day.strftime('%d-%b-%Y').upper()
+        return _format_expiry(last_day)
     
     def get_atm_strike(self, spot_price: float, instrument: str) -> int:
         """
@@ -242,37 +563,194 @@ class DhanDataFeed:
         Returns:
             ATM strike price
         """
-        # Strike rounding intervals
-        rounding_map = {
-            'NIFTY': 50,
-            'BANKNIFTY': 100,
-            'SENSEX': 100,
-            'RELIANCE': 5,
-            'HDFCBANK': 10
-        }
-        
-        rounding = rounding_map.get(instrument, 50)
+        rounding = self.STRIKE_STEPS.get(instrument, 50)
         atm_strike = round(spot_price / rounding) * rounding
         
         return int(atm_strike)
     
+    def get_strike_ladder(self, spot_price: float, instrument: str,
+                          num_strikes: int = 5) -> np.ndarray:
+        """
+        Calculate the ATM strike and num_strikes strikes either side of it
+        
+        Args:
+            spot_price: Current spot price
+            instrument: Instrument name
+            num_strikes: Number of strikes above and below ATM
+            
+        Returns:
+            Integer array of 2 * num_strikes + 1 ascending strikes, ATM in the middle
+        """
+        step = self.STRIKE_STEPS.get(instrument, 50)
+        atm_strike = self.get_atm_strike(spot_price, instrument)
+        
+        return atm_strike + np.arange(-num_strikes, num_strikes + 1) * step
+    
+    def _symbols_cache_path(self) -> str:
+        return os.path.join(self.CACHE_DIR, 'option_symbols_cache.json')
+    
+    def _load_symbols_cache(self) -> Dict[str, int]:
+        """
+        Load the option security ID cache saved by a previous run
+        
+        Ignored if saved more than CACHE_MAX_AGE ago, so IDs follow the
+        scrip master. The age comes from the 'saved_at' stamp in the file
+        (not its mtime, which every save refreshes)
+        """
+        # Stamp kept when loaded entries are saved again, so they still expire
+        self._symbols_saved_at = None
+        path = self._symbols_cache_path()
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            saved_at = data.get('saved_at')
+            if not isinstance(saved_at, (int, float)) or time.time() - saved_at > self.CACHE_MAX_AGE:
+                return {}
+            cache = data.get('ids', {})
+            self._symbols_saved_at = saved_at
+            logger.info("Loaded %s cached option security IDs", len(cache))
+            return cache
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning("Could not read option security ID cache: %s", e)
+            return {}
+    
+    def _save_symbols_cache(self):
+        """Persist the option security ID cache for the next run (atexit)"""
+        if not self.option_symbols_cache:
+            return
+        try:
+            os.makedirs(self.CACHE_DIR, exist_ok=True)
+            saved_at = self._symbols_saved_at or time.time()
+            with open(self._symbols_cache_path(), 'w') as f:
+                json.dump({'saved_at': saved_at, 'ids': self.option_symbols_cache.snapshot()}, f)
+        except Exception as e:
+            logger.warning("Could not save option security ID cache: %s", e)
+    
     def _load_security_list(self):
         """
         Load security list from Dhan API
-        This is called on-demand and cached for the session
+        This runs in a background thread at startup (again on demand if that
+        failed) and is cached for the session
+        
+        The list is also saved as cache/dhan_scrip_YYYYMMDD.parquet, so
+        later runs on the same day skip the download
         """
-        if self.security_list_loaded:
-            return
+        with self._security_list_lock:
+            if not self.security_list_loaded:
+                self._load_security_list_locked()
+    
+    def _load_security_list_background(self):
+        """Load the security list at startup (daemon thread), then signal readiness"""
+        try:
+            self._load_security_list()
+        finally:
+            self._security_list_ready.set()
+    
+    def _wait_for_security_list(self):
+        """
+        Wait for the background load; retry in this thread if it failed
+        """
+        self._security_list_ready.wait()
+        if not self.security_list_loaded:
+            self._load_security_list()
+    
+    def _load_security_list_locked(self):
+        """Body of _load_security_list, called with the lock held"""
+        path = os.path.join(
+            self.CACHE_DIR, f"dhan_scrip_{datetime.now(IST):%Y%m%d}.parquet"
+        )
+        if os.path.exists(path):
+            try:
+                self.security_list_df = self._normalize_security_list(pd.read_parquet(path))
+                self._build_option_index()
+                self.security_list_loaded = True
+                logger.info("Security list loaded from %s: %s instruments", path, len(self.security_list_df))
+                return
+            except Exception as e:
+                logger.warning("Could not read cached security list %s: %s", path, e)
         
         try:
             logger.info("Loading security list from Dhan API (this may take a few seconds)...")
             # Fetch security list - returns a DataFrame
-            self.security_list_df = self.dhan.fetch_security_list('compact')
+            self.security_list_df = self._normalize_security_list(
+                self.dhan.fetch_security_list('compact')
+            )
+            self._build_option_index()
             self.security_list_loaded = True
-            logger.info(f"Security list loaded: {len(self.security_list_df)} instruments")
+            logger.info("Security list loaded: %s instruments", len(self.security_list_df))
         except Exception as e:
-            logger.error(f"Error loading security list: {e}")
+            logger.error("Error loading security list: %s", e)
             self.security_list_loaded = False
+            return
+        
+        try:
+            os.makedirs(self.CACHE_DIR, exist_ok=True)
+            # Previous days' lists are stale
+            for old_path in glob.glob(os.path.join(self.CACHE_DIR, 'dhan_scrip_*.parquet')):
+                os.remove(old_path)
+            self.security_list_df.to_parquet(path, compression='snappy')
+        except Exception as e:
+            logger.warning("Could not cache security list: %s", e)
+    
+    @classmethod
+    def _normalize_security_list(cls, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Keep only the scrip master columns used for lookups, with efficient dtypes
+        
+        - SECURITY_LIST_COLUMNS (+ UNDERLYING): all other columns are dropped
+        - SEM_EXM_EXCH_ID: category
+        - SEM_STRIKE_PRICE: float64 (the CSV can leave it as object)
+        - SEM_EXPIRY_DATE: datetime64, normalized to the date
+        - SEM_OPTION_TYPE: category
+        - UNDERLYING (added): category of the trading symbol's leading letters
+          (e.g. 'NIFTY-Feb2026-25500-CE' -> 'NIFTY'), so filters by underlying
+          are an equality on category codes, not a regex scan
+        
+        Idempotent, so the cached parquet can be passed through again
+        """
+        columns = cls.SECURITY_LIST_COLUMNS + (['UNDERLYING'] if 'UNDERLYING' in df.columns else [])
+        df = df[columns].copy()
+        df['SEM_EXM_EXCH_ID'] = df['SEM_EXM_EXCH_ID'].astype('category')
+        df['SEM_STRIKE_PRICE'] = pd.to_numeric(df['SEM_STRIKE_PRICE'], errors='coerce').astype('float64')
+        if not pd.api.types.is_datetime64_any_dtype(df['SEM_EXPIRY_DATE']):
+            df['SEM_EXPIRY_DATE'] = pd.to_datetime(df['SEM_EXPIRY_DATE'], errors='coerce')
+        df['SEM_EXPIRY_DATE'] = df['SEM_EXPIRY_DATE'].dt.normalize()
+        df['SEM_OPTION_TYPE'] = df['SEM_OPTION_TYPE'].astype('category')
+        if 'UNDERLYING' not in df.columns:
+            df['UNDERLYING'] = (
+                df['SEM_TRADING_SYMBOL'].str.extract(r'^([A-Z]+)', expand=False).astype('category')
+            )
+        return df
+    
+    def _build_option_index(self):
+        """
+        Index the option rows of security_list_df for O(1) lookups
+        
+        Key: (underlying, strike, expiry 'YYYY-MM-DD', option type). Where a
+        contract is listed on several exchanges, the first NSE row wins,
+        else the first row.
+        """
+        df = self.security_list_df
+        options = df[df['SEM_OPTION_TYPE'].isin(['CE', 'PE'])]
+        keys = pd.DataFrame({
+            'underlying': options['UNDERLYING'].astype(object),
+            'strike': options['SEM_STRIKE_PRICE'],
+            'expiry': options['SEM_EXPIRY_DATE'].dt.strftime('%Y-%m-%d'),
+            'option_type': options['SEM_OPTION_TYPE'].astype(object),
+            'is_nse': options['SEM_EXM_EXCH_ID'] == 'NSE',
+            'security_id': options['SEM_SMST_SECURITY_ID'].astype(int),
+        }).dropna()
+        
+        # NSE rows first (stable), then keep the first row per contract
+        keys = keys.sort_values('is_nse', ascending=False, kind='stable')
+        keys = keys.drop_duplicates(['underlying', 'strike', 'expiry', 'option_type'])
+        
+        self._opt_index = dict(zip(
+            zip(keys['underlying'], keys['strike'], keys['expiry'], keys['option_type']),
+            keys['security_id'].tolist()
+        ))
     
     def get_option_security_id(self, instrument: str, strike: int, 
                                 expiry: str, option_type: str) -> Optional[int]:
@@ -295,11 +773,12 @@ class DhanDataFeed:
         cache_key = f"{instrument}_{strike}_{expiry}_{option_type}"
         
         # Check cache first
-        if cache_key in self.option_symbols_cache:
-            return self.option_symbols_cache[cache_key]
+        security_id = self.option_symbols_cache.get(cache_key)
+        if security_id is not None:
+            return security_id
         
-        # Load security list if not already loaded
-        self._load_security_list()
+        # Wait for the security list (loaded in the background at startup)
+        self._wait_for_security_list()
         
         if self.security_list_df is None:
             logger.error("Security list not available")
@@ -308,41 +787,109 @@ class DhanDataFeed:
         try:
             # Convert expiry from DD-MMM-YYYY to YYYY-MM-DD for matching
             # e.g., '19-FEB-2026' -> '2026-02-19'
-            expiry_date = datetime.strptime(expiry, '%d-%b-%Y')
-            expiry_str = expiry_date.strftime('%Y-%m-%d')
-            
-            # Search for the option in security list
-            # Filter by: instrument name, strike price, expiry date, option type
-            filtered = self.security_list_df[
-                (self.security_list_df['SEM_TRADING_SYMBOL'].str.contains(instrument, na=False, case=False)) &
-                (self.security_list_df['SEM_STRIKE_PRICE'] == float(strike)) &
-                (self.security_list_df['SEM_EXPIRY_DATE'].str.contains(expiry_str, na=False)) &
-                (self.security_list_df['SEM_OPTION_TYPE'] == option_type)
-            ]
-            
-            if len(filtered) == 0:
-                logger.warning(f"No security found for {instrument} {strike} {expiry} {option_type}")
-                return None
+            expiry_str = _expiry_to_iso(expiry)
             
-            # If multiple matches, take the first one (usually NSE)
-            if len(filtered) > 1:
-                # Prefer NSE over BSE
-                nse_options = filtered[filtered['SEM_EXM_EXCH_ID'] == 'NSE']
-                if len(nse_options) > 0:
-                    filtered = nse_options
+            # Look up by: instrument name, strike price, expiry date, option type
+            security_id = self._opt_index.get(
+                (instrument.upper(), float(strike), expiry_str, option_type)
+            )
             
-            security_id = int(filtered.iloc[0]['SEM_SMST_SECURITY_ID'])
+            if security_id is None:
+                logger.warning("No security found for %s %s %s %s", instrument, strike, expiry, option_type)
+                return None
             
             # Cache the result
             self.option_symbols_cache[cache_key] = security_id
             
-            logger.info(f"Found security ID {security_id} for {instrument} {strike} {expiry} {option_type}")
+            logger.info("Found security ID %s for %s %s %s %s", security_id, instrument, strike, expiry, option_type)
             return security_id
             
         except Exception as e:
-            logger.error(f"Error looking up security ID for {cache_key}: {e}")
+            logger.error("Error looking up security ID for %s: %s", cache_key, e)
             return None
     
+    def get_option_security_ids(self, instrument: str, strikes: List[int], expiry: str,
+                                option_types: Tuple[str, ...] = ('CE', 'PE')) -> Dict[Tuple[int, str], int]:
+        """
+        Get security IDs for a ladder of strikes of one instrument and expiry
+        
+        Same lookup as get_option_security_id, with the expiry conversion and
+        security list check done once for the whole ladder
+        
+        Args:
+            instrument: Instrument name (NIFTY, BANKNIFTY, etc.)
+            strikes: Strike prices (e.g. from get_strike_ladder)
+            expiry: Expiry date in DD-MMM-YYYY format (e.g., '19-FEB-2026')
+            option_types: Option types to resolve for each strike
+            
+        Returns:
+            Dict of (strike, option_type) -> security ID (contracts not found are left out)
+        """
+        self._wait_for_security_list()
+        
+        if self.security_list_df is None:
+            logger.error("Security list not available")
+            return {}
+        
+        try:
+            expiry_str = _expiry_to_iso(expiry)
+        except Exception as e:
+            logger.error("Invalid expiry %s: %s", expiry, e)
+            return {}
+        
+        underlying = instrument.upper()
+        security_ids = {}
+        missing = []
+        for strike in strikes:
+            strike = int(strike)
+            for option_type in option_types:
+                cache_key = f"{instrument}_{strike}_{expiry}_{option_type}"
+                security_id = self.option_symbols_cache.get(cache_key)
+                if security_id is None:
+                    security_id = self._opt_index.get((underlying, float(strike), expiry_str, option_type))
+                    if security_id is None:
+                        missing.append(f"{strike} {option_type}")
+                        continue
+                    self.option_symbols_cache[cache_key] = security_id
+                security_ids[(strike, option_type)] = security_id
+        
+        if missing:
+            logger.warning("No security found for %s %s: %s", instrument, expiry, ', '.join(missing))
+        return security_ids
+    
+    @staticmethod
+    def _option_exchange(instrument: str) -> str:
+        """
+        Exchange segment for an instrument's options
+        
+        NSE_FNO = NSE Futures & Options
+        BSE_FNO = BSE Futures & Options
+        """
+        if instrument in ['NIFTY', 'BANKNIFTY', 'FINNIFTY', 'MIDCPNIFTY']:
+            return 'NSE_FNO'
+        elif instrument == 'SENSEX':
+            return 'BSE_FNO'
+        else:
+            # Stock options are on NSE_FNO
+            return 'NSE_FNO'
+    
+    @staticmethod
+    def _parse_option_quote(security_data: Dict) -> Dict:
+        """
+        Convert one security's ohlc_data entry into the option price dict
+        """
+        ohlc = security_data.get('ohlc', {})
+        ltp = security_data.get('last_price', 0)
+        
+        return {
+            'ltp': float(ltp) if ltp else 0.0,
+            'high': float(ohlc.get('high', 0)),
+            'low': float(ohlc.get('low', 0)),
+            'open': float(ohlc.get('open', 0)),
+            'volume': 0,  # Not available in ohlc_data, use quote_data for this
+            'oi': 0       # Not available in ohlc_data, use quote_data for this
+        }
+    
     def get_option_price(self, instrument: str, strike: int, 
                         expiry: str, option_type: str) -> Optional[Dict]:
         """
@@ -364,19 +911,10 @@ class DhanDataFeed:
             security_id = self.get_option_security_id(instrument, strike, expiry, option_type)
             
             if not security_id:
-                logger.error(f"Could not find security ID for {instrument} {strike} {expiry} {option_type}")
+                logger.error("Could not find security ID for %s %s %s %s", instrument, strike, expiry, option_type)
                 return None
             
-            # Determine exchange segment for options
-            # NSE_FNO = NSE Futures & Options
-            # BSE_FNO = BSE Futures & Options
-            if instrument in ['NIFTY', 'BANKNIFTY', 'FINNIFTY', 'MIDCPNIFTY']:
-                exchange = 'NSE_FNO'
-            elif instrument == 'SENSEX':
-                exchange = 'BSE_FNO'
-            else:
-                # Stock options are on NSE_FNO
-                exchange = 'NSE_FNO'
+            exchange = self._option_exchange(instrument)
             
             # Apply rate limiting
             self._rate_limit()
@@ -389,34 +927,101 @@ class DhanDataFeed:
             # Parse response
             # Response structure: {'status': 'success', 'data': {'data': {'NSE_FNO': {'48211': {'last_price': 100.5, 'ohlc': {...}}}}}}
             if response and response.get('status') == 'success':
-                outer_data = response.get('data', {})
-                inner_data = outer_data.get('data', {})
-                exchange_data = inner_data.get(exchange, {})
-                security_data = exchange_data.get(str(security_id), {})
+                security_data = self._security_data(response, exchange, str(security_id))
                 
                 if security_data:
-                    ohlc = security_data.get('ohlc', {})
-                    ltp = security_data.get('last_price', 0)
-                    
-                    return {
-                        'ltp': float(ltp) if ltp else 0.0,
-                        'high': float(ohlc.get('high', 0)),
-                        'low': float(ohlc.get('low', 0)),
-                        'open': float(ohlc.get('open', 0)),
-                        'volume': 0,  # Not available in ohlc_data, use quote_data for this
-                        'oi': 0       # Not available in ohlc_data, use quote_data for this
-                    }
+                    return self._parse_option_quote(security_data)
                 else:
-                    logger.warning(f"No data found for security ID {security_id}")
+                    logger.warning("No data found for security ID %s", security_id)
             else:
-                logger.warning(f"API returned failure: {response}")
+                logger.warning("API returned failure: %s", response)
             
             return None
             
         except Exception as e:
-            logger.error(f"Error fetching option price: {e}", exc_info=True)
+            logger.error("Error fetching option price: %s", e, exc_info=True)
             return None
     
+    def get_option_prices(self, contracts: List[Tuple[str, int, str, str]]) -> Dict[Tuple, Dict]:
+        """
+        Get option prices for several contracts in one API call
+        
+        Security IDs are resolved first (cached), then all contracts are
+        grouped by exchange segment into a single ohlc_data request
+        
+        Args:
+            contracts: (instrument, strike, expiry, option_type) tuples,
+                       expiry in DD-MMM-YYYY format, option_type 'CE' / 'PE'
+            
+        Returns:
+            Dict of contract tuple -> price dict (same shape as get_option_price);
+            contracts without data are left out
+        """
+        # Resolve security IDs and group by exchange: {'NSE_FNO': [...], 'BSE_FNO': [...]}
+        securities = defaultdict(list)
+        resolved = {}
+        for contract in contracts:
+            security_id = self.get_option_security_id(*contract)
+            if not security_id:
+                logger.error("Could not find security ID for %s", ' '.join(map(str, contract)))
+                continue
+            exchange = self._option_exchange(contract[0])
+            securities[exchange].append(security_id)
+            resolved[contract] = (exchange, security_id)
+        
+        if not resolved:
+            return {}
+        
+        try:
+            # Apply rate limiting (once for the whole batch)
+            self._rate_limit()
+            
+            response = self.dhan.ohlc_data(securities=dict(securities))
+            
+            # Same nested structure as get_option_price, one entry per security
+            prices = {}
+            if response and response.get('status') == 'success':
+                for contract, (exchange, security_id) in resolved.items():
+                    security_data = self._security_data(response, exchange, str(security_id))
+                    if security_data:
+                        prices[contract] = self._parse_option_quote(security_data)
+                    else:
+                        logger.warning("No data found for security ID %s", security_id)
+            else:
+                logger.warning("API returned failure: %s", response)
+            
+            return prices
+            
+        except Exception as e:
+            logger.error("Error fetching option prices: %s", e, exc_info=True)
+            return {}
+    
+    def stream_options(self, contracts: List[Tuple[str, int, str, str]], on_tick) -> OptionTickStream:
+        """
+        Stream live LTPs for several option contracts over the websocket feed
+        
+        Subscribes once instead of polling ohlc_data, so every trade reaches
+        on_tick without per-request latency or rate limiting
+        
+        Args:
+            contracts: (instrument, strike, expiry, option_type) tuples,
+                       expiry in DD-MMM-YYYY format, option_type 'CE' / 'PE'
+            on_tick: Called as on_tick(contract, ltp) from the feed thread
+            
+        Returns:
+            Running OptionTickStream; call stop() to close it
+        """
+        subscribed = {}
+        for contract in contracts:
+            security_id = self.get_option_security_id(*contract)
+            if not security_id:
+                logger.error("Could not find security ID for %s", ' '.join(map(str, contract)))
+                continue
+            segment = self.FEED_SEGMENTS[self._option_exchange(contract[0])]
+            subscribed[(segment, int(security_id))] = contract
+        
+        return OptionTickStream(self.client_id, self.access_token, subscribed, on_tick)
+    
     def get_option_chain(self, instrument: str, spot_price: float, 
                         expiry: str, num_strikes: int = 5) -> Optional[pd.DataFrame]:
         """
@@ -432,17 +1037,18 @@ class DhanDataFeed:
             num_strikes: Number of strikes above and below ATM (not used with Dhan API)
             
         Returns:
-            DataFrame with option chain or None
+            DataFrame with option chain (OPTION_CHAIN_COLUMNS, one row per
+            strike and option type) or None
         """
         try:
             # Get security info for the underlying
             security_info = self.SECURITY_IDS.get(instrument)
             if not security_info:
-                logger.error(f"Security ID not found for {instrument}")
+                logger.error("Security ID not found for %s", instrument)
                 return None
             
             # Apply rate limiting
-            self._rate_limit()
+            self._rate_limit('option_chain')
             
             # Use Dhan's option_chain API
             # Note: expiry should be in YYYY-MM-DD format
@@ -453,18 +1059,76 @@ class DhanDataFeed:
             )
             
             # Parse response and convert to DataFrame
+            # Response structure: {'status': 'success', 'data': {'data': {'last_price': 25471.1,
+            #   'oc': {'25500.000000': {'ce': {'last_price': 100.5, 'oi': 1200, 'greeks': {...}, ...}, 'pe': {...}}}}}}
             if response and response.get('status') == 'success':
-                data = response.get('data', [])
-                if data:
-                    return pd.DataFrame(data)
+                chain = response.get('data', {}).get('data', {})
+                records = []
+                for strike, legs in chain.get('oc', {}).items():
+                    for leg_key, option_type in (('ce', 'CE'), ('pe', 'PE')):
+                        leg = legs.get(leg_key)
+                        if not leg:
+                            continue
+                        greeks = leg.get('greeks', {})
+                        records.append((
+                            strike, option_type, leg.get('last_price', 0), leg.get('oi', 0),
+                            leg.get('volume', 0), leg.get('implied_volatility', 0),
+                            greeks.get('delta', 0), greeks.get('theta', 0),
+                            greeks.get('gamma', 0), greeks.get('vega', 0),
+                            leg.get('top_bid_price', 0), leg.get('top_ask_price', 0)
+                        ))
+                if records:
+                    # Explicit dtypes instead of per-cell inference
+                    df = pd.DataFrame.from_records(records, columns=OPTION_CHAIN_COLUMNS)
+                    return df.astype(OPTION_CHAIN_DTYPES, copy=False)
             
-            logger.warning(f"No option chain data found for {instrument}")
+            logger.warning("No option chain data found for %s", instrument)
             return None
             
         except Exception as e:
-            logger.error(f"Error fetching option chain for {instrument}: {e}")
+            logger.error("Error fetching option chain for %s: %s", instrument, e)
             return None
     
+    def warmup(self, instruments: List[str], need_chain: bool = True) -> Dict[str, Dict]:
+        """
+        Fetch the start-of-session data for several instruments concurrently
+        
+        Spot prices (one batch call) and each instrument's weekly expiry are
+        independent, so they run on a small thread pool; the option chains
+        follow once their spot and expiry are known. All calls still go
+        through _rate_limit
+        
+        Args:
+            instruments: Instrument names (NIFTY, SENSEX, BANKNIFTY, etc.)
+            need_chain: Also fetch each instrument's option chain
+            
+        Returns:
+            {'spots': {instrument: spot}, 'expiries': {instrument: 'DD-MMM-YYYY'},
+             'chains': {instrument: DataFrame or None}}
+        """
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            spots_future = executor.submit(self.get_spot_prices, instruments)
+            expiry_futures = {
+                instrument: executor.submit(self.get_weekly_expiry, instrument)
+                for instrument in instruments
+            }
+            
+            expiries = {instrument: future.result() for instrument, future in expiry_futures.items()}
+            spots = spots_future.result()
+            
+            chain_futures = {}
+            if need_chain:
+                chain_futures = {
+                    instrument: executor.submit(
+                        self.get_option_chain, instrument, spots[instrument],
+                        _expiry_to_iso(expiries[instrument])
+                    )
+                    for instrument in instruments if instrument in spots
+                }
+            chains = {instrument: future.result() for instrument, future in chain_futures.items()}
+        
+        return {'spots': spots, 'expiries': expiries, 'chains': chains}
+    
     def get_historical_data(self, instrument: str, strike: int, 
                            expiry: str, option_type: str,
                            from_date: str, to_date: str,
@@ -491,7 +1155,7 @@ class DhanDataFeed:
             security_id = self.get_option_security_id(instrument, strike, expiry, option_type)
             
             if not security_id:
-                logger.error(f"Could not find security ID for option")
+                logger.error("Could not find security ID for option")
                 return None
             
             # Determine exchange and instrument type
@@ -506,7 +1170,7 @@ class DhanDataFeed:
                 instrument_type = 'OPTSTK'
             
             # Apply rate limiting
-            self._rate_limit()
+            self._rate_limit('historical')
             
             # Get historical data using intraday_minute_data API
             response = self.dhan.intraday_minute_data(
@@ -529,10 +1193,66 @@ class DhanDataFeed:
             return None
             
         except Exception as e:
-            logger.error(f"Error fetching historical data: {e}")
+            logger.error("Error fetching historical data: %s", e)
             return None
 
 
+class AsyncDhanDataFeed(DhanDataFeed):
+    """
+    Asyncio front-end for DhanDataFeed
+    
+    The dhanhq SDK is blocking, so each call runs in a worker thread
+    (asyncio.to_thread). A semaphore caps how many requests are in flight,
+    and the shared _rate_limit still paces request starts, so
+    asyncio.gather over several instruments overlaps the network waits
+    instead of paying each round-trip in turn.
+    """
+    
+    CONCURRENCY_LIMIT = 4  # Max requests in flight at once
+    
+    def __init__(self, client_id: str, access_token: str):
+        super().__init__(client_id, access_token)
+        self._semaphore = asyncio.Semaphore(self.CONCURRENCY_LIMIT)
+    
+    async def _call(self, func, *args):
+        """Run a blocking data feed method in a thread, under the semaphore"""
+        async with self._semaphore:
+            return await asyncio.to_thread(func, *args)
+    
+    async def get_spot_price_async(self, instrument: str) -> Optional[float]:
+        """Async version of get_spot_price"""
+        return await self._call(self.get_spot_price, instrument)
+    
+    async def get_weekly_expiry_async(self, instrument: str) -> str:
+        """Async version of get_weekly_expiry"""
+        return await self._call(self.get_weekly_expiry, instrument)
+    
+    async def get_option_price_async(self, instrument: str, strike: int,
+                                     expiry: str, option_type: str) -> Optional[Dict]:
+        """Async version of get_option_price"""
+        return await self._call(self.get_option_price, instrument, strike, expiry, option_type)
+    
+    async def get_option_chain_async(self, instrument: str, spot_price: float,
+                                     expiry: str, num_strikes: int = 5) -> Optional[pd.DataFrame]:
+        """Async version of get_option_chain"""
+        return await self._call(self.get_option_chain, instrument, spot_price, expiry, num_strikes)
+    
+    async def get_weekly_expiries_async(self, instruments: List[str]) -> Dict[str, str]:
+        """
+        Fetch the weekly expiry of several instruments concurrently
+        
+        Args:
+            instruments: Instrument names (NIFTY, SENSEX, BANKNIFTY, etc.)
+            
+        Returns:
+            Dict of instrument -> expiry in DD-MMM-YYYY format
+        """
+        expiries = await asyncio.gather(
+            *(self.get_weekly_expiry_async(instrument) for instrument in instruments)
+        )
+        return dict(zip(instruments, expiries))
+
+
 # Example usage and testing
 if __name__ == "__main__":
     import os
@@ -0,0 +1,53 @@
+"""
+One-shot migration of the 1-minute options parquet files into
+Hive-partitioned datasets on expiry_type / expiry_code:
+
+    data/options/nifty/NIFTY_OPTIONS_1m/expiry_type=WEEK/expiry_code=1/...
+
+The backtest only reads expiry_type=WEEK, expiry_code=1. With the data
+partitioned, pyarrow prunes every other directory from the path alone,
+without opening any of its files.
+
+Usage:
+    python partition_data.py
+Then point config.BACKTEST_DATA_PATH at the dataset directories
+(backtest_engine.py reads a single file or a dataset directory).
+"""
+
+import logging
+import os
+
+import pyarrow.dataset as ds
+
+import config
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+)
+logger = logging.getLogger(__name__)
+
+PARTITION_KEYS = ['expiry_type', 'expiry_code']
+
+
+def partition_file(src: str, dst: str):
+    """Rewrite one parquet file as a Hive-partitioned dataset at dst."""
+    source = ds.dataset(src, format='parquet')
+    partitioning = ds.partitioning(
+        source.schema.empty_table().select(PARTITION_KEYS).schema, flavor='hive')
+    ds.write_dataset(
+        source, dst, format='parquet',
+        partitioning=partitioning,
+        existing_data_behavior='delete_matching',
+        max_rows_per_group=1_000_000,
+        file_options=ds.ParquetFileFormat().make_write_options(compression='zstd'),
+    )
+    logger.info(f"Partitioned {src} -> {dst}")
+
+
+if __name__ == "__main__":
+    for instrument, src in config.BACKTEST_DATA_PATH.items():
+        if not src.endswith('.parquet') or not os.path.isfile(src):
+            logger.warning(f"{instrument}: {src} is not a parquet file, skipping")
+            continue
+        partition_file(src, src[:-len('.parquet')])
@@ -0,0 +1,38 @@
+"""
+Rate Limiting Module
+Token bucket shared by the Dhan data feed and the Telegram notifier
+"""
+
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter
+    
+    Refills at `rate` tokens per second up to `capacity`; consume() blocks
+    until a token is available. Refill is computed on demand, no thread.
+    """
+    
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.last_refill = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def consume(self, tokens: int = 1):
+        """Take `tokens` from the bucket, sleeping until they have refilled if needed"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+            self.last_refill = now
+            
+            if self.tokens < tokens:
+                # Holding the lock while sleeping keeps waiters in order
+                time.sleep((tokens - self.tokens) / self.rate)
+                self.tokens = float(tokens)
+                self.last_refill = time.monotonic()
+            
+            self.tokens -= tokens
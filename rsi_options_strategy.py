@@ -6,11 +6,13 @@ Generates signals when option price RSI crosses above 70
 
 import pandas as pd
 import numpy as np
+from itertools import islice
 from datetime import datetime, time, timedelta
-import pytz
+from zoneinfo import ZoneInfo
 import logging
 from typing import Dict, List, Optional, Tuple
-import time as time_module
+
+from backtest_kernels import update_rsi_channels
 
 # Configure logging
 logging.basicConfig(
@@ -24,6 +26,62 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def _micros_since_midnight(t) -> int:
+    """Wall-clock time of a datetime/time as integer microseconds since midnight"""
+    return ((t.hour * 60 + t.minute) * 60 + t.second) * 1_000_000 + t.microsecond
+
+
+def _fmt(dt) -> str:
+    """Format a datetime as 'YYYY-MM-DD HH:MM:SS' (same as strftime, without the locale layer)"""
+    return f"{dt.year:04d}-{dt.month:02d}-{dt.day:02d} {dt.hour:02d}:{dt.minute:02d}:{dt.second:02d}"
+
+
+def _log_banner(char: str, title: str, *lines: str):
+    """Log a banner (title and lines between rules of `char`) as a single record"""
+    rule = char * 60
+    logger.info(f"\n{rule}\n{title}\n{rule}\n" + "\n".join(lines) + f"\n{rule}\n")
+
+
+class PositionState:
+    """
+    State of the current trade cycle (one position at a time).
+    
+    A fresh PositionState() is an idle cycle; generate_signal starts a new
+    one and check_entry_levels records each part entry.
+    """
+    
+    __slots__ = ('instrument', 'option_type', 'base_price', 'entry_thresholds',
+                 'entry_prices', 'quantities', 'qty_total', 'pq_total',
+                 'avg_price', 'stop_price', 'target_price',
+                 'part1_taken', 'part2_taken', 'part3_taken',
+                 'cycle_active', 'start_time')
+    
+    def __init__(self, instrument: Optional[str] = None, option_type: Optional[str] = None,
+                 base_price: Optional[float] = None,
+                 entry_thresholds: Optional[Tuple[float, float, float]] = None,
+                 cycle_active: bool = False, start_time: Optional[datetime] = None):
+        self.instrument = instrument
+        self.option_type = option_type        # 'call' or 'put'
+        self.base_price = base_price          # option price at the signal
+        self.entry_thresholds = entry_thresholds  # part 1/2/3 prices (+5/+10/+15%)
+        self.entry_prices: List[float] = []
+        self.quantities: List[float] = []
+        
+        # Running totals for the weighted avg entry, and the avg entry with
+        # its stop/target levels (None until the first part is taken)
+        self.qty_total = 0.0
+        self.pq_total = 0.0
+        self.avg_price: Optional[float] = None
+        self.stop_price: Optional[float] = None
+        self.target_price: Optional[float] = None
+        
+        self.part1_taken = False
+        self.part2_taken = False
+        self.part3_taken = False
+        self.cycle_active = cycle_active
+        self.start_time = start_time
+
+
 class RSIOptionsStrategy:
     """
     RSI-based options trading strategy
@@ -52,35 +110,44 @@ class RSIOptionsStrategy:
         self.target_pct = config.get('target_pct', 10) / 100
         
         # Trading hours (IST)
-        self.ist = pytz.timezone('Asia/Kolkata')
+        self.ist = ZoneInfo('Asia/Kolkata')
         self.start_time = time(9, 18)
         self.end_time = time(15, 15)
+        # Same bounds as integers, so the per-tick checks skip building time objects
+        self._start_us = _micros_since_midnight(self.start_time)
+        self._end_us = _micros_since_midnight(self.end_time)
         
         # Instruments to monitor
         self.instruments = ['NIFTY', 'SENSEX', 'BANKNIFTY', 'RELIANCE', 'HDFCBANK']
         
-        # Data storage for each instrument
-        self.option_data = {
-            instrument: {
-                'call': {'prices': [], 'timestamps': [], 'rsi': []},
-                'put': {'prices': [], 'timestamps': [], 'rsi': []}
-            }
-            for instrument in self.instruments
-        }
+        # One RSI channel per (instrument, side), in a fixed order
+        self.channels = [(instrument, side)
+                         for instrument in self.instruments
+                         for side in ('call', 'put')]
+        self.channel_index = {key: idx for idx, key in enumerate(self.channels)}
+        
+        # Incremental RSI state of all channels, one row per channel:
+        # previous price (NaN before the first tick), gains/losses of the
+        # last rsi_length price changes (oldest first), number of price
+        # changes seen, and whether the last RSI was above 70
+        n_channels = len(self.channels)
+        self._last_price = np.full(n_channels, np.nan)
+        self._gain_window = np.zeros((n_channels, self.rsi_length))
+        self._loss_window = np.zeros((n_channels, self.rsi_length))
+        self._n_deltas = np.zeros(n_channels, dtype=np.int64)
+        self._rsi = np.full(n_channels, np.nan)
+        self._above70 = np.zeros(n_channels, dtype=bool)
         
         # Position tracking
         self.active_position = None  # Only one position at a time
-        self.position_state = {
-            'instrument': None,
-            'option_type': None,  # 'call' or 'put'
-            'base_price': None,
-            'entry_prices': [],
-            'quantities': [],
-            'part1_taken': False,
-            'part2_taken': False,
-            'part3_taken': False,
-            'cycle_active': False
-        }
+        self.position_state = PositionState()
+        
+        # 1-minute candles being built from live ticks (see on_tick):
+        # channel index -> [minute, high, close]
+        self._candles = {}
+        
+        # Weekly expiry for the day it was computed: (date, 'YYYY-MM-DD')
+        self._expiry_cache = (None, None)
         
         # Strike selection parameters
         self.strike_rounding = {
@@ -102,9 +169,10 @@ class RSIOptionsStrategy:
         Returns:
             ATM strike price
         """
+        # Divide rather than multiply by a cached 1/rounding: the reciprocal
+        # is inexact and could move a spot near a half step to the other strike
         rounding = self.strike_rounding.get(instrument, 50)
-        atm_strike = round(spot_price / rounding) * rounding
-        return int(atm_strike)
+        return int(round(spot_price / rounding) * rounding)
     
     def get_weekly_expiry(self) -> str:
         """
@@ -113,22 +181,34 @@ class RSIOptionsStrategy:
         Returns:
             Expiry date in 'YYYY-MM-DD' format
         """
-        today = datetime.now(self.ist).date()
+        now = datetime.now(self.ist)
+        today = now.date()
+        if self._expiry_cache[0] == today:
+            return self._expiry_cache[1]
+        
         # For Nifty/BankNifty: Thursday expiry
         # For others: check exchange calendar
         days_until_thursday = (3 - today.weekday()) % 7
-        if days_until_thursday == 0 and datetime.now(self.ist).time() > time(15, 30):
+        if days_until_thursday == 0 and now.time() > time(15, 30):
             days_until_thursday = 7
         
-        expiry = today + timedelta(days=days_until_thursday)
-        return expiry.strftime('%Y-%m-%d')
+        expiry = (today + timedelta(days=days_until_thursday)).strftime('%Y-%m-%d')
+        
+        # On expiry day the answer moves to next week at 3:30 PM, so it is
+        # only cached for the rest of the day once that has happened
+        if days_until_thursday != 0:
+            self._expiry_cache = (today, expiry)
+        return expiry
     
-    def calculate_rsi(self, prices: List[float], period: int = 14) -> float:
+    def calculate_rsi(self, prices, period: int = 14) -> float:
         """
         Calculate RSI for given price series
         
+        One-shot version of the incremental update in _update_channels
+        (simple average of the last `period` gains and losses)
+        
         Args:
-            prices: List of prices
+            prices: Sequence of prices (list or deque)
             period: RSI period (default 14)
             
         Returns:
@@ -137,7 +217,10 @@ class RSIOptionsStrategy:
         if len(prices) < period + 1:
             return None
         
-        prices_array = np.array(prices)
+        # Only the last period + 1 prices (period deltas) enter the averages
+        prices_array = np.fromiter(
+            islice(prices, len(prices) - period - 1, None), dtype=np.float64, count=period + 1
+        )
         deltas = np.diff(prices_array)
         
         gains = np.where(deltas > 0, deltas, 0)
@@ -154,61 +237,37 @@ class RSIOptionsStrategy:
         
         return rsi
     
-    def is_trading_hours(self) -> bool:
-        """Check if current time is within trading hours"""
-        now = datetime.now(self.ist).time()
-        return self.start_time <= now <= self.end_time
-    
-    def update_option_data(self, instrument: str, option_type: str, 
-                          price: float, timestamp: datetime):
-        """
-        Update option price data and calculate RSI
-        
-        Args:
-            instrument: Instrument name
-            option_type: 'call' or 'put'
-            price: Option price
-            timestamp: Price timestamp
-        """
-        data = self.option_data[instrument][option_type]
-        
-        # Add new price
-        data['prices'].append(price)
-        data['timestamps'].append(timestamp)
-        
-        # Keep only last 100 prices (enough for RSI calculation)
-        if len(data['prices']) > 100:
-            data['prices'] = data['prices'][-100:]
-            data['timestamps'] = data['timestamps'][-100:]
-        
-        # Calculate RSI
-        rsi = self.calculate_rsi(data['prices'], self.rsi_length)
-        if rsi is not None:
-            data['rsi'].append(rsi)
-            if len(data['rsi']) > 100:
-                data['rsi'] = data['rsi'][-100:]
+    def is_trading_hours(self, now: Optional[datetime] = None) -> bool:
+        """Check if current (or the given IST) time is within trading hours"""
+        if now is None:
+            now = datetime.now(self.ist)
+        return self._start_us <= _micros_since_midnight(now) <= self._end_us
     
-    def check_rsi_crossover(self, instrument: str, option_type: str) -> bool:
+    def _update_channels(self, idx: np.ndarray,
+                         prices: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
         """
-        Check if RSI crossed above 70
+        Update the incremental RSI state for a set of channels at once
         
         Args:
-            instrument: Instrument name
-            option_type: 'call' or 'put'
+            idx: Channel indices (into self.channels, no duplicates)
+            prices: New option price for each channel in idx
             
         Returns:
-            True if RSI just crossed above 70
+            (ready, rsi, crossed): the channels of idx that have an RSI,
+            their current RSI, and whether it just crossed above 70
         """
-        rsi_values = self.option_data[instrument][option_type]['rsi']
-        
-        if len(rsi_values) < 2:
-            return False
-        
-        # Check for crossover: previous RSI <= 70 and current RSI > 70
-        return rsi_values[-2] <= 70 and rsi_values[-1] > 70
+        # RSI of the channels in one compiled step (see update_rsi_channels)
+        crossed = np.empty(len(idx), dtype=bool)
+        update_rsi_channels(idx, prices, self._last_price, self._gain_window, self._loss_window,
+                            self._n_deltas, self._above70, self._rsi, crossed)
+        
+        # Only channels with a full window have an RSI
+        has_rsi = ~np.isnan(self._rsi[idx])
+        ready = idx[has_rsi]
+        return ready, self._rsi[ready], crossed[has_rsi]
     
     def generate_signal(self, instrument: str, option_type: str, 
-                       current_price: float, rsi: float):
+                       current_price: float, rsi: float, now: Optional[datetime] = None):
         """
         Generate trading signal when RSI crosses 70
         
@@ -217,203 +276,199 @@ class RSIOptionsStrategy:
             option_type: 'call' or 'put'
             current_price: Current option price
             rsi: Current RSI value
+            now: Tick time (IST), defaults to the current time
         """
+        if now is None:
+            now = datetime.now(self.ist)
+        
         # Check if we already have an active position
-        if self.position_state['cycle_active']:
+        if self.position_state.cycle_active:
             logger.info(f"Signal ignored - Position already active on "
-                       f"{self.position_state['instrument']} "
-                       f"{self.position_state['option_type'].upper()}")
+                       f"{self.position_state.instrument} "
+                       f"{self.position_state.option_type.upper()}")
             return
         
-        # Initialize new position
-        self.position_state = {
-            'instrument': instrument,
-            'option_type': option_type,
-            'base_price': current_price,
-            'entry_prices': [],
-            'quantities': [],
-            'part1_taken': False,
-            'part2_taken': False,
-            'part3_taken': False,
-            'cycle_active': True,
-            'start_time': datetime.now(self.ist)
-        }
+        # Entry levels are fixed for the whole cycle
+        price1 = current_price * 1.05
+        price2 = current_price * 1.10
+        price3 = current_price * 1.15
         
-        logger.info(f"\n{'='*60}")
-        logger.info(f"NEW SIGNAL GENERATED")
-        logger.info(f"{'='*60}")
-        logger.info(f"Instrument: {instrument}")
-        logger.info(f"Option Type: {option_type.upper()}")
-        logger.info(f"Base Price: ₹{current_price:.2f}")
-        logger.info(f"RSI: {rsi:.2f}")
-        logger.info(f"Time: {datetime.now(self.ist).strftime('%Y-%m-%d %H:%M:%S')}")
-        logger.info(f"\nEntry Levels:")
-        logger.info(f"  Part 1 (33.33%): ₹{current_price * 1.05:.2f} (+5%)")
-        logger.info(f"  Part 2 (33.33%): ₹{current_price * 1.10:.2f} (+10%)")
-        logger.info(f"  Part 3 (33.33%): ₹{current_price * 1.15:.2f} (+15%)")
-        logger.info(f"{'='*60}\n")
+        # Initialize new position
+        self.position_state = PositionState(
+            instrument=instrument,
+            option_type=option_type,
+            base_price=current_price,
+            entry_thresholds=(price1, price2, price3),
+            cycle_active=True,
+            start_time=now
+        )
+        
+        _log_banner('=', "NEW SIGNAL GENERATED",
+                    f"Instrument: {instrument}",
+                    f"Option Type: {option_type.upper()}",
+                    f"Base Price: ₹{current_price:.2f}",
+                    f"RSI: {rsi:.2f}",
+                    f"Time: {_fmt(now)}",
+                    "\nEntry Levels:",
+                    f"  Part 1 (33.33%): ₹{price1:.2f} (+5%)",
+                    f"  Part 2 (33.33%): ₹{price2:.2f} (+10%)",
+                    f"  Part 3 (33.33%): ₹{price3:.2f} (+15%)")
         
         # Send Telegram notification
         if self.telegram:
             entry_levels = {
-                'part1': current_price * 1.05,
-                'part2': current_price * 1.10,
-                'part3': current_price * 1.15
+                'part1': price1,
+                'part2': price2,
+                'part3': price3
             }
             self.telegram.send_new_signal(
                 instrument, option_type, current_price, rsi, entry_levels
             )
     
-    def check_entry_levels(self, current_price: float, high_price: float):
+    def check_entry_levels(self, current_price: float, high_price: float,
+                           now: Optional[datetime] = None):
         """
         Check if entry levels are hit and generate entry signals
         
         Args:
             current_price: Current option price
             high_price: High of current candle
+            now: Tick time (IST), defaults to the current time
         """
-        if not self.position_state['cycle_active']:
+        if not self.position_state.cycle_active:
             return
         
+        if now is None:
+            now = datetime.now(self.ist)
+        
         state = self.position_state
-        base_price = state['base_price']
         
-        # Calculate entry prices
-        price1 = base_price * 1.05
-        price2 = base_price * 1.10
-        price3 = base_price * 1.15
+        # Entry prices (computed once in generate_signal)
+        price1, price2, price3 = state.entry_thresholds
         
         # Check Part 1
-        if not state['part1_taken'] and high_price >= price1:
-            state['part1_taken'] = True
-            state['entry_prices'].append(price1)
-            state['quantities'].append(33.33)
+        if not state.part1_taken and high_price >= price1:
+            state.part1_taken = True
+            self._record_entry(state, price1, 33.33)
             
-            logger.info(f"\n{'*'*60}")
-            logger.info(f"ENTRY SIGNAL - PART 1")
-            logger.info(f"{'*'*60}")
-            logger.info(f"Instrument: {state['instrument']} {state['option_type'].upper()}")
-            logger.info(f"Entry Price: ₹{price1:.2f}")
-            logger.info(f"Quantity: 33.33% of allocated capital")
-            logger.info(f"Time: {datetime.now(self.ist).strftime('%Y-%m-%d %H:%M:%S')}")
-            logger.info(f"{'*'*60}\n")
+            _log_banner('*', "ENTRY SIGNAL - PART 1",
+                        f"Instrument: {state.instrument} {state.option_type.upper()}",
+                        f"Entry Price: ₹{price1:.2f}",
+                        "Quantity: 33.33% of allocated capital",
+                        f"Time: {_fmt(now)}")
             
             # Send Telegram notification
             if self.telegram:
                 self.telegram.send_entry_signal(
-                    state['instrument'], state['option_type'], 1, price1, 33.33
+                    state.instrument, state.option_type, 1, price1, 33.33
                 )
         
         # Check Part 2
-        if state['part1_taken'] and not state['part2_taken'] and high_price >= price2:
-            state['part2_taken'] = True
-            state['entry_prices'].append(price2)
-            state['quantities'].append(33.33)
+        if state.part1_taken and not state.part2_taken and high_price >= price2:
+            state.part2_taken = True
+            self._record_entry(state, price2, 33.33)
             
-            logger.info(f"\n{'*'*60}")
-            logger.info(f"ENTRY SIGNAL - PART 2")
-            logger.info(f"{'*'*60}")
-            logger.info(f"Instrument: {state['instrument']} {state['option_type'].upper()}")
-            logger.info(f"Entry Price: ₹{price2:.2f}")
-            logger.info(f"Quantity: 33.33% of allocated capital")
-            logger.info(f"Time: {datetime.now(self.ist).strftime('%Y-%m-%d %H:%M:%S')}")
-            logger.info(f"{'*'*60}\n")
+            _log_banner('*', "ENTRY SIGNAL - PART 2",
+                        f"Instrument: {state.instrument} {state.option_type.upper()}",
+                        f"Entry Price: ₹{price2:.2f}",
+                        "Quantity: 33.33% of allocated capital",
+                        f"Time: {_fmt(now)}")
             
             # Send Telegram notification
             if self.telegram:
                 self.telegram.send_entry_signal(
-                    state['instrument'], state['option_type'], 2, price2, 33.33
+                    state.instrument, state.option_type, 2, price2, 33.33
                 )
         
         # Check Part 3
-        if state['part2_taken'] and not state['part3_taken'] and high_price >= price3:
-            state['part3_taken'] = True
-            state['entry_prices'].append(price3)
-            state['quantities'].append(33.34)  # Remaining
+        if state.part2_taken and not state.part3_taken and high_price >= price3:
+            state.part3_taken = True
+            self._record_entry(state, price3, 33.34)  # Remaining
             
-            logger.info(f"\n{'*'*60}")
-            logger.info(f"ENTRY SIGNAL - PART 3 (FINAL)")
-            logger.info(f"{'*'*60}")
-            logger.info(f"Instrument: {state['instrument']} {state['option_type'].upper()}")
-            logger.info(f"Entry Price: ₹{price3:.2f}")
-            logger.info(f"Quantity: 33.34% of allocated capital")
-            logger.info(f"Time: {datetime.now(self.ist).strftime('%Y-%m-%d %H:%M:%S')}")
-            logger.info(f"{'*'*60}\n")
+            _log_banner('*', "ENTRY SIGNAL - PART 3 (FINAL)",
+                        f"Instrument: {state.instrument} {state.option_type.upper()}",
+                        f"Entry Price: ₹{price3:.2f}",
+                        "Quantity: 33.34% of allocated capital",
+                        f"Time: {_fmt(now)}")
             
             # Send Telegram notification
             if self.telegram:
                 self.telegram.send_entry_signal(
-                    state['instrument'], state['option_type'], 3, price3, 33.34
+                    state.instrument, state.option_type, 3, price3, 33.34
                 )
     
-    def check_exit_levels(self, current_price: float):
+    def _record_entry(self, state: 'PositionState', price: float, quantity: float):
+        """Add a part entry and update the average entry and stop/target prices"""
+        state.entry_prices.append(price)
+        state.quantities.append(quantity)
+        
+        # Running totals: same sums, in the same order, as over the lists
+        state.qty_total += quantity
+        state.pq_total += price * quantity
+        avg_price = state.pq_total / state.qty_total
+        state.avg_price = avg_price
+        
+        # For short positions: higher price = loss, lower price = profit
+        state.stop_price = avg_price * (1 + self.stop_loss_pct)
+        state.target_price = avg_price * (1 - self.target_pct)
+    
+    def check_exit_levels(self, current_price: float, now: Optional[datetime] = None):
         """
         Check if stop loss or target is hit
         
         Args:
             current_price: Current option price
+            now: Tick time (IST), defaults to the current time
         """
-        if not self.position_state['cycle_active']:
+        if not self.position_state.cycle_active:
             return
         
         state = self.position_state
         
         # Only check exits if at least one entry is taken
-        if not (state['part1_taken'] or state['part2_taken'] or state['part3_taken']):
-            return
-        
-        # Calculate average entry price
-        total_qty = sum(state['quantities'])
-        if total_qty == 0:
+        # (avg/stop/target are set by check_entry_levels)
+        avg_price = state.avg_price
+        if avg_price is None:
             return
         
-        avg_price = sum(p * q for p, q in zip(state['entry_prices'], state['quantities'])) / total_qty
-        
-        # For short positions: higher price = loss, lower price = profit
-        stop_price = avg_price * (1 + self.stop_loss_pct)
-        target_price = avg_price * (1 - self.target_pct)
+        if now is None:
+            now = datetime.now(self.ist)
         
         # Check stop loss
-        if current_price >= stop_price:
+        if current_price >= state.stop_price:
             loss_pct = ((current_price - avg_price) / avg_price) * 100
             
-            logger.info(f"\n{'!'*60}")
-            logger.info(f"STOP LOSS HIT")
-            logger.info(f"{'!'*60}")
-            logger.info(f"Instrument: {state['instrument']} {state['option_type'].upper()}")
-            logger.info(f"Average Entry: ₹{avg_price:.2f}")
-            logger.info(f"Exit Price: ₹{current_price:.2f}")
-            logger.info(f"Loss: {loss_pct:.2f}%")
-            logger.info(f"Time: {datetime.now(self.ist).strftime('%Y-%m-%d %H:%M:%S')}")
-            logger.info(f"{'!'*60}\n")
+            _log_banner('!', "STOP LOSS HIT",
+                        f"Instrument: {state.instrument} {state.option_type.upper()}",
+                        f"Average Entry: ₹{avg_price:.2f}",
+                        f"Exit Price: ₹{current_price:.2f}",
+                        f"Loss: {loss_pct:.2f}%",
+                        f"Time: {_fmt(now)}")
             
             # Send Telegram notification
             if self.telegram:
                 self.telegram.send_stop_loss_hit(
-                    state['instrument'], state['option_type'],
+                    state.instrument, state.option_type,
                     avg_price, current_price, loss_pct
                 )
             
             self.reset_position()
         
         # Check target
-        elif current_price <= target_price:
+        elif current_price <= state.target_price:
             profit_pct = ((avg_price - current_price) / avg_price) * 100
             
-            logger.info(f"\n{'$'*60}")
-            logger.info(f"TARGET HIT - PROFIT BOOKED")
-            logger.info(f"{'$'*60}")
-            logger.info(f"Instrument: {state['instrument']} {state['option_type'].upper()}")
-            logger.info(f"Average Entry: ₹{avg_price:.2f}")
-            logger.info(f"Exit Price: ₹{current_price:.2f}")
-            logger.info(f"Profit: {profit_pct:.2f}%")
-            logger.info(f"Time: {datetime.now(self.ist).strftime('%Y-%m-%d %H:%M:%S')}")
-            logger.info(f"{'$'*60}\n")
+            _log_banner('$', "TARGET HIT - PROFIT BOOKED",
+                        f"Instrument: {state.instrument} {state.option_type.upper()}",
+                        f"Average Entry: ₹{avg_price:.2f}",
+                        f"Exit Price: ₹{current_price:.2f}",
+                        f"Profit: {profit_pct:.2f}%",
+                        f"Time: {_fmt(now)}")
             
             # Send Telegram notification
             if self.telegram:
                 self.telegram.send_target_hit(
-                    state['instrument'], state['option_type'],
+                    state.instrument, state.option_type,
                     avg_price, current_price, profit_pct
                 )
             
@@ -421,38 +476,72 @@ class RSIOptionsStrategy:
     
     def reset_position(self):
         """Reset position state after exit"""
-        self.position_state = {
-            'instrument': None,
-            'option_type': None,
-            'base_price': None,
-            'entry_prices': [],
-            'quantities': [],
-            'part1_taken': False,
-            'part2_taken': False,
-            'part3_taken': False,
-            'cycle_active': False
-        }
+        self.position_state = PositionState()
     
-    def force_close_eod(self):
-        """Force close position at end of day"""
-        if self.position_state['cycle_active']:
-            logger.info(f"\n{'#'*60}")
-            logger.info(f"FORCE CLOSE - END OF DAY (3:15 PM)")
-            logger.info(f"{'#'*60}")
-            logger.info(f"Instrument: {self.position_state['instrument']} "
-                       f"{self.position_state['option_type'].upper()}")
-            logger.info(f"Time: {datetime.now(self.ist).strftime('%Y-%m-%d %H:%M:%S')}")
-            logger.info(f"{'#'*60}\n")
+    def force_close_eod(self, now: Optional[datetime] = None):
+        """Force close position at end of day (`now`: IST time, defaults to the current time)"""
+        if self.position_state.cycle_active:
+            if now is None:
+                now = datetime.now(self.ist)
+            _log_banner('#', "FORCE CLOSE - END OF DAY (3:15 PM)",
+                        f"Instrument: {self.position_state.instrument} "
+                        f"{self.position_state.option_type.upper()}",
+                        f"Time: {_fmt(now)}")
             
             # Send Telegram notification
             if self.telegram:
                 self.telegram.send_eod_close(
-                    self.position_state['instrument'],
-                    self.position_state['option_type']
+                    self.position_state.instrument,
+                    self.position_state.option_type
                 )
             
             self.reset_position()
     
+    def on_tick(self, instrument: str, option_type: str, ltp: float):
+        """
+        Process one live trade tick (e.g. pushed by the Dhan websocket feed)
+        
+        Ticks are aggregated into 1-minute candles; the first tick of a new
+        minute closes the previous candle, whose close and high then go
+        through the strategy like process_tick.
+        
+        Args:
+            instrument: Instrument name
+            option_type: 'call' or 'put'
+            ltp: Last traded price
+        """
+        now = datetime.now(self.ist)
+        minute = now.replace(second=0, microsecond=0)
+        i = self.channel_index[(instrument, option_type)]
+        candle = self._candles.get(i)
+        
+        # Same minute: extend the current candle
+        if candle is not None and candle[0] == minute:
+            if ltp > candle[1]:
+                candle[1] = ltp
+            candle[2] = ltp
+            return
+        
+        self._candles[i] = [minute, ltp, ltp]
+        if candle is not None:
+            self._process(np.array([i], dtype=np.int64), np.array([candle[2]], dtype=np.float64),
+                          np.array([candle[1]], dtype=np.float64), now)
+    
+    def process_batch(self, prices: np.ndarray, highs: Optional[np.ndarray] = None):
+        """
+        Process one price per channel at once (e.g. all closed 1-minute candles)
+        
+        Args:
+            prices: Option price per channel, in self.channels order
+                    (NaN for channels without a new price)
+            highs: High of each channel's current minute candle
+                   (defaults to prices)
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        highs = prices if highs is None else np.asarray(highs, dtype=np.float64)
+        idx = np.flatnonzero(~np.isnan(prices)).astype(np.int64, copy=False)
+        self._process(idx, prices[idx], highs[idx], datetime.now(self.ist))
+    
     def process_tick(self, instrument: str, option_type: str, 
                      ltp: float, high: float):
         """
@@ -464,36 +553,54 @@ class RSIOptionsStrategy:
             ltp: Last traded price
             high: High of current minute candle
         """
-        now = datetime.now(self.ist)
+        idx = np.array([self.channel_index[(instrument, option_type)]], dtype=np.int64)
+        self._process(idx, np.array([ltp], dtype=np.float64), np.array([high], dtype=np.float64),
+                      datetime.now(self.ist))
+    
+    def _process(self, idx: np.ndarray, prices: np.ndarray, highs: np.ndarray, now: datetime):
+        """
+        Update the given channels, then run signals, entries and exits
         
-        # Update option data
-        self.update_option_data(instrument, option_type, ltp, now)
+        Args:
+            idx: Channel indices (into self.channels)
+            prices: Last traded price per channel in idx
+            highs: High of the current minute candle per channel in idx
+            now: Tick time (IST)
+        """
+        now_us = _micros_since_midnight(now)
         
-        # Get current RSI
-        rsi_values = self.option_data[instrument][option_type]['rsi']
-        if len(rsi_values) == 0:
+        # Force close at 3:15 PM; nothing else trades for the rest of the day
+        if now_us >= self._end_us:
+            self.force_close_eod(now)
             return
         
-        current_rsi = rsi_values[-1]
+        # Before start_time the RSI still warms up, but no new signals
+        can_signal = now_us >= self._start_us
+        
+        ticks = dict(zip(idx.tolist(), zip(prices.tolist(), highs.tolist())))
         
-        # Check for new signal (RSI crossover)
-        if self.check_rsi_crossover(instrument, option_type) and self.is_trading_hours():
-            self.generate_signal(instrument, option_type, ltp, current_rsi)
+        # Update option data and RSI of all channels in one step
+        ready, rsi_values, crossed = self._update_channels(idx, prices)
         
-        # If position is active on this instrument and option type
-        if (self.position_state['cycle_active'] and 
-            self.position_state['instrument'] == instrument and
-            self.position_state['option_type'] == option_type):
+        # Only channels with an RSI go on to signals, entries and exits
+        for i, current_rsi, is_cross in zip(ready.tolist(), rsi_values.tolist(), crossed.tolist()):
+            instrument, option_type = self.channels[i]
+            ltp, high = ticks[i]
             
-            # Check entry levels
-            self.check_entry_levels(ltp, high)
+            # Check for new signal (RSI crossover)
+            if is_cross and can_signal:
+                self.generate_signal(instrument, option_type, ltp, current_rsi, now)
             
-            # Check exit levels
-            self.check_exit_levels(ltp)
-        
-        # Force close at 3:15 PM
-        if now.time() >= self.end_time:
-            self.force_close_eod()
+            # If position is active on this instrument and option type
+            if (self.position_state.cycle_active and 
+                self.position_state.instrument == instrument and
+                self.position_state.option_type == option_type):
+                
+                # Check entry levels
+                self.check_entry_levels(ltp, high, now)
+                
+                # Check exit levels
+                self.check_exit_levels(ltp, now)
 
 
 def main():
@@ -526,35 +633,33 @@ def main():
     logger.info(f"Target: {strategy.target_pct * 100}%")
     logger.info("="*60 + "\n")
     
-    # Main loop - replace with actual data feed integration
-    # This is a placeholder structure
+    # Live ticks: subscribe the ATM call/put contracts on Dhan's websocket
+    # feed (placeholder - replace with actual security IDs and credentials).
+    # Trades are pushed as they happen and go straight to on_tick, which
+    # builds the 1-minute candles, so there is no polling/sleep loop;
+    # outside market hours the feed is simply quiet.
+    # from dhanhq.marketfeed import DhanFeed, NSE_FNO, Ticker
+    # contracts = {'<security_id>': ('NIFTY', 'call'), ...}  # ATM CE/PE per instrument
+    # feed = DhanFeed("client_id", "access_token",
+    #                 [(NSE_FNO, sid, Ticker) for sid in contracts], version='v2')
+    
+    feed = None  # Replace with actual Dhan market feed
+    contracts = {}
+    
+    if feed is None:
+        logger.info("No market feed configured (see main() in rsi_options_strategy.py)")
+        return
+    
     try:
+        feed.run_forever()  # connect and subscribe
         while True:
-            # Check if trading hours
-            if not strategy.is_trading_hours():
-                time_module.sleep(60)
+            tick = feed.get_data()  # waits for the next packet
+            if not tick or tick.get('type') != 'Ticker Data':
                 continue
             
-            # TODO: Fetch live option prices from Dhan API
-            # For each instrument:
-            #   1. Get spot price
-            #   2. Calculate ATM strike
-            #   3. Get ATM call and put option prices
-            #   4. Process the tick data
-            
-            # Example (replace with actual API calls):
-            # for instrument in strategy.instruments:
-            #     spot_price = get_spot_price(instrument)
-            #     atm_strike = strategy.get_atm_strike(spot_price, instrument)
-            #     expiry = strategy.get_weekly_expiry()
-            #     
-            #     call_price = get_option_price(instrument, atm_strike, expiry, 'CE')
-            #     put_price = get_option_price(instrument, atm_strike, expiry, 'PE')
-            #     
-            #     strategy.process_tick(instrument, 'call', call_price, call_price)
-            #     strategy.process_tick(instrument, 'put', put_price, put_price)
-            
-            time_module.sleep(60)  # 1-minute interval
+            channel = contracts.get(str(tick['security_id']))
+            if channel is not None:
+                strategy.on_tick(channel[0], channel[1], float(tick['LTP']))
             
     except KeyboardInterrupt:
         logger.info("\nStrategy stopped by user")
@@ -4,31 +4,235 @@ Sends trading signals and alerts to Telegram
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+import atexit
+import json
 import logging
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future
 from typing import Optional, Dict, List
 from datetime import datetime
-import pytz
+from zoneinfo import ZoneInfo
+
+from rate_limiter import TokenBucket
+
+try:
+    import orjson
+except ImportError:  # orjson is optional
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+_JSON_HEADERS = {'Content-Type': 'application/json'}
+
+IST = ZoneInfo('Asia/Kolkata')
+
+
+# ============================================
+# MESSAGE TEMPLATES (str.format_map fields)
+# ============================================
+_PART_EMOJI = {1: "1️⃣", 2: "2️⃣", 3: "3️⃣"}
+
+NEW_SIGNAL_TMPL = """
+🔔 <b>NEW SIGNAL GENERATED</b> 🔔
+
+📊 <b>Instrument:</b> {instrument}
+📈 <b>Option:</b> {side}
+💰 <b>Base Price:</b> ₹{base_price:.2f}
+📉 <b>RSI:</b> {rsi:.2f}
+⏰ <b>Time:</b> {time_str}
+
+<b>📍 Entry Levels:</b>
+├ Part 1 (33.33%): ₹{entry_levels[part1]:.2f} (+5%)
+├ Part 2 (33.33%): ₹{entry_levels[part2]:.2f} (+10%)
+└ Part 3 (33.34%): ₹{entry_levels[part3]:.2f} (+15%)
+
+<i>Position Type: SELL {side}</i>
+"""
+
+ENTRY_SIGNAL_TMPL = """
+{emoji} <b>ENTRY SIGNAL - PART {part}</b>
+
+📊 <b>Instrument:</b> {instrument} {side}
+💰 <b>Entry Price:</b> ₹{entry_price:.2f}
+📦 <b>Quantity:</b> {quantity_pct:.2f}% of capital
+⏰ <b>Time:</b> {time_str}
+
+<i>Action: SELL at ₹{entry_price:.2f}</i>
+"""
+
+TARGET_HIT_TMPL = """
+🎯 <b>TARGET HIT - PROFIT BOOKED</b> 💰
+
+📊 <b>Instrument:</b> {instrument} {side}
+📥 <b>Avg Entry:</b> ₹{avg_entry:.2f}
+📤 <b>Exit Price:</b> ₹{exit_price:.2f}
+💵 <b>Profit:</b> +{profit_pct:.2f}%
+⏰ <b>Time:</b> {time_str}
+
+<i>✅ Position closed successfully!</i>
+"""
+
+STOP_LOSS_TMPL = """
+⚠️ <b>STOP LOSS HIT</b> ⚠️
+
+📊 <b>Instrument:</b> {instrument} {side}
+📥 <b>Avg Entry:</b> ₹{avg_entry:.2f}
+📤 <b>Exit Price:</b> ₹{exit_price:.2f}
+📉 <b>Loss:</b> -{loss_pct:.2f}%
+⏰ <b>Time:</b> {time_str}
+
+<i>⛔ Position stopped out</i>
+"""
+
+EOD_CLOSE_TMPL = """
+🔚 <b>FORCE CLOSE - END OF DAY</b>
+
+📊 <b>Instrument:</b> {instrument} {side}
+⏰ <b>Time:</b> {time_str}
+
+<i>Position closed at 3:15 PM</i>
+"""
+
+BOT_STARTED_TMPL = """
+🤖 <b>TRADING BOT STARTED</b> 🚀
+
+📊 <b>Instruments:</b> {instruments_str}
+📈 <b>RSI Length:</b> {rsi_length}
+🛑 <b>Stop Loss:</b> {stop_loss_pct}%
+🎯 <b>Target:</b> {target_pct}%
+⏰ <b>Started At:</b> {time_str}
+
+<i>Monitoring for RSI signals...</i>
+"""
+
+BOT_STOPPED_TMPL = """
+🛑 <b>TRADING BOT STOPPED</b>
+
+⏰ <b>Stopped At:</b> {time_str}
+
+<i>Bot has been shut down</i>
+"""
+
+ERROR_ALERT_TMPL = """
+❌ <b>ERROR ALERT</b>
+
+🔴 <b>Type:</b> {error_type}
+📝 <b>Message:</b> {error_message}
+⏰ <b>Time:</b> {time_str}
+
+<i>Please check the bot!</i>
+"""
+
+ATM_UPDATE_TMPL = """
+🔄 <b>ATM STRIKE UPDATED</b>
+
+📊 <b>Instrument:</b> {instrument}
+📍 <b>Old Strike:</b> {old_strike}
+🆕 <b>New Strike:</b> {new_strike}
+💹 <b>Spot Price:</b> ₹{spot:.2f}
+⏰ <b>Time:</b> {time_str}
+"""
+
+DAILY_SUMMARY_TMPL = """
+📊 <b>DAILY SUMMARY - {date_str}</b>
+
+📈 <b>Total Signals:</b> {total_signals}
+✅ <b>Profitable Trades:</b> {winning_trades}
+❌ <b>Loss Trades:</b> {losing_trades}
+💰 <b>Total P&L:</b> {total_pnl:.2f}%
+📊 <b>Win Rate:</b> {win_rate:.2f}%
+
+<i>End of day summary</i>
+"""
+
+# Template per message kind, for TelegramNotifier._send_templated
+TEMPLATES = {
+    'new_signal': NEW_SIGNAL_TMPL,
+    'entry': ENTRY_SIGNAL_TMPL,
+    'target': TARGET_HIT_TMPL,
+    'stop_loss': STOP_LOSS_TMPL,
+    'eod_close': EOD_CLOSE_TMPL,
+    'bot_started': BOT_STARTED_TMPL,
+    'bot_stopped': BOT_STOPPED_TMPL,
+    'error': ERROR_ALERT_TMPL,
+    'atm_update': ATM_UPDATE_TMPL,
+    'daily_summary': DAILY_SUMMARY_TMPL,
+}
+
 
 class TelegramNotifier:
     """
     Handles sending notifications to Telegram
     """
     
-    def __init__(self, bot_token: str, chat_id: str):
+    # requests HTTPAdapter settings for the keep-alive session: one host
+    # (api.telegram.org), a few connections for the sender and callers
+    HTTP_POOL = {'pool_connections': 1, 'pool_maxsize': 4}
+    
+    # Messages waiting for the send worker; beyond this new ones are dropped
+    SEND_QUEUE_SIZE = 256
+    
+    # Telegram's limits: about 1 message/s per chat and 30 messages/s overall
+    CHAT_RATE = 1.0
+    GLOBAL_RATE = 30.0
+    
+    # Retries of a message on 429 / 5xx / network errors
+    MAX_SEND_ATTEMPTS = 8
+    MAX_BACKOFF = 60.0
+    
+    # Entry-part messages of an instrument sent within this window go out
+    # as one message (kept under Telegram's 4096-character limit)
+    COALESCE_WINDOW = 0.5
+    COALESCE_MAX_CHARS = 3500
+    
+    # A message identical (by its dedupe key) to the last one of its kind
+    # within this many seconds is not sent again
+    DEDUPE_WINDOW = 60.0
+    
+    def __init__(self, bot_token: str, chat_id: str,
+                 session: Optional[requests.Session] = None):
         """
         Initialize Telegram notifier
         
         Args:
             bot_token: Telegram bot token from BotFather
             chat_id: Your Telegram chat ID
+            session: Session to send through (e.g. one already connected by
+                     get_telegram_chat_id); a new one is created if omitted
         """
         self.bot_token = bot_token
         self.chat_id = chat_id
         self.base_url = f"https://api.telegram.org/bot{bot_token}"
-        self.ist = pytz.timezone('Asia/Kolkata')
+        
+        # Last formatted time: (epoch second, 'DD-Mon-YYYY HH:MM:SS')
+        self._time_cache = (None, None)
+        
+        # One keep-alive session for all API calls, so messages after the
+        # first reuse the TCP+TLS connection instead of a new handshake each
+        self._session = session if session is not None else self.new_session()
+        
+        # Rate limits, applied by the send worker before each message
+        self._bucket_chat = TokenBucket(rate=self.CHAT_RATE, capacity=1)
+        self._bucket_global = TokenBucket(rate=self.GLOBAL_RATE, capacity=int(self.GLOBAL_RATE))
+        
+        # Sends go through a queue drained by one worker thread, so callers
+        # (the strategy's tick path) never wait on Telegram's network I/O
+        self._tx_queue = queue.Queue(maxsize=self.SEND_QUEUE_SIZE)
+        self._worker = threading.Thread(target=self._drain, name='telegram-sender', daemon=True)
+        self._worker.start()
+        atexit.register(self.flush)
+        
+        # Entry-part messages waiting to be joined, per instrument
+        self._coalesce_buf: Dict[str, List[str]] = {}
+        self._coalesce_lock = threading.Lock()
+        self._coalesce_timer: Optional[threading.Timer] = None
+        
+        # Last dedupe key sent per template kind: kind -> (key, monotonic time)
+        self._last_key: Dict[str, tuple] = {}
         
         # Test connection
         if self.test_connection():
@@ -36,6 +240,13 @@ class TelegramNotifier:
         else:
             logger.warning("⚠️ Telegram connection test failed")
     
+    @classmethod
+    def new_session(cls) -> requests.Session:
+        """Keep-alive session with the notifier's connection pool settings"""
+        session = requests.Session()
+        session.mount('https://', HTTPAdapter(**cls.HTTP_POOL))
+        return session
+    
     def test_connection(self) -> bool:
         """
         Test Telegram bot connection
@@ -45,7 +256,7 @@ class TelegramNotifier:
         """
         try:
             url = f"{self.base_url}/getMe"
-            response = requests.get(url, timeout=10)
+            response = self._session.get(url, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -61,37 +272,217 @@ class TelegramNotifier:
             logger.error(f"Telegram connection test failed: {e}")
             return False
     
-    def send_message(self, message: str, parse_mode: str = "HTML") -> bool:
+    def send_message(self, message: str, parse_mode: str = "HTML",
+                     wait: bool = False) -> bool:
         """
-        Send a message to Telegram
+        Queue a message for Telegram (sent by the background worker)
         
         Args:
             message: Message text (supports HTML formatting)
             parse_mode: 'HTML' or 'Markdown'
+            wait: Block until the message has been sent
             
         Returns:
-            True if sent successfully
+            True if queued (with wait: sent) successfully
         """
+        # Pending entry parts go first, so messages keep their order
+        self._flush_coalesced()
+        return self._enqueue(message, parse_mode, wait)
+    
+    def _enqueue(self, message: str, parse_mode: str = "HTML", wait: bool = False) -> bool:
+        """Put one message on the send queue (see send_message)"""
+        payload = {
+            'chat_id': self.chat_id,
+            'text': message,
+            'parse_mode': parse_mode
+        }
+        future = Future() if wait else None
+        
         try:
-            url = f"{self.base_url}/sendMessage"
+            self._tx_queue.put_nowait((payload, future))
+        except queue.Full:
+            logger.warning("Telegram send queue full, dropping message")
+            return False
+        
+        return future.result() if wait else True
+    
+    def flush(self, timeout: float = 10.0) -> bool:
+        """
+        Wait until all queued messages have been sent
+        
+        Args:
+            timeout: Maximum seconds to wait
+            
+        Returns:
+            True if the queue drained within timeout
+        """
+        self._flush_coalesced()
+        deadline = time.monotonic() + timeout
+        with self._tx_queue.all_tasks_done:
+            while self._tx_queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._tx_queue.all_tasks_done.wait(remaining)
+        return True
+    
+    def _coalesce(self, key: str, message: str) -> bool:
+        """
+        Buffer a message to be sent joined with others for the same key
+        
+        The buffer goes out COALESCE_WINDOW seconds after its first message,
+        when it would grow past COALESCE_MAX_CHARS, or on the next
+        send_message/flush.
+        
+        Args:
+            key: Buffer key (instrument)
+            message: Message text
             
-            payload = {
-                'chat_id': self.chat_id,
-                'text': message,
-                'parse_mode': parse_mode
-            }
+        Returns:
+            True (the message is buffered)
+        """
+        ready = None
+        with self._coalesce_lock:
+            parts = self._coalesce_buf.get(key)
+            if parts and sum(len(p) + 1 for p in parts) + len(message) > self.COALESCE_MAX_CHARS:
+                ready = self._coalesce_buf.pop(key)
+            self._coalesce_buf.setdefault(key, []).append(message)
             
-            response = requests.post(url, json=payload, timeout=10)
+            if self._coalesce_timer is None:
+                self._coalesce_timer = threading.Timer(self.COALESCE_WINDOW, self._flush_coalesced)
+                self._coalesce_timer.daemon = True
+                self._coalesce_timer.start()
+        
+        if ready:
+            self._enqueue("\n".join(ready))
+        return True
+    
+    def _flush_coalesced(self):
+        """Queue all buffered messages, one joined message per key"""
+        with self._coalesce_lock:
+            buffers = list(self._coalesce_buf.values())
+            self._coalesce_buf.clear()
+            if self._coalesce_timer is not None:
+                self._coalesce_timer.cancel()
+                self._coalesce_timer = None
+        
+        for parts in buffers:
+            self._enqueue("\n".join(parts))
+    
+    def _drain(self):
+        """Worker thread: send queued messages one at a time"""
+        while True:
+            payload, future = self._tx_queue.get()
+            sent = False
+            try:
+                sent = self._post(payload)
+            except Exception as e:
+                # Keep the worker alive: one bad send must not stop the rest
+                logger.error("Unexpected error sending Telegram message: %s", e, exc_info=True)
+            finally:
+                self._tx_queue.task_done()
+                if future is not None:
+                    future.set_result(sent)
+    
+    def _post(self, payload: Dict) -> bool:
+        """
+        Send one sendMessage request, retrying transient failures
+        
+        On 429 waits the retry_after Telegram returns; on 5xx or a network
+        error backs off exponentially (with jitter, capped at MAX_BACKOFF).
+        
+        Args:
+            payload: sendMessage parameters
+            
+        Returns:
+            True if sent successfully
+        """
+        url = f"{self.base_url}/sendMessage"
+        # Serialised once for all attempts; orjson encodes in C and emits
+        # UTF-8 directly instead of \u-escaping every emoji
+        if orjson is not None:
+            body = orjson.dumps(payload)
+        else:
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        
+        for attempt in range(self.MAX_SEND_ATTEMPTS):
+            # Wait for a token instead of running into 429 Too Many Requests
+            self._bucket_chat.consume()
+            self._bucket_global.consume()
+            
+            try:
+                response = self._session.post(url, data=body, headers=_JSON_HEADERS, timeout=10)
+            except requests.RequestException as e:
+                logger.warning(f"Error sending Telegram message (attempt {attempt + 1}): {e}")
+                time.sleep(min(self.MAX_BACKOFF, 2 ** attempt + random.random()))
+                continue
             
             if response.status_code == 200:
                 return True
+            
+            if response.status_code == 429:
+                delay = self._retry_after(response) + random.random()
+                logger.warning(f"Telegram rate limit hit, retrying in {delay:.1f}s")
+                time.sleep(delay)
+            elif response.status_code >= 500:
+                delay = min(self.MAX_BACKOFF, 2 ** attempt + random.random())
+                logger.warning(f"Telegram server error {response.status_code}, retrying in {delay:.1f}s")
+                time.sleep(delay)
             else:
                 logger.error(f"Failed to send Telegram message: {response.text}")
                 return False
-                
-        except Exception as e:
-            logger.error(f"Error sending Telegram message: {e}")
-            return False
+        
+        logger.error(f"Giving up on Telegram message after {self.MAX_SEND_ATTEMPTS} attempts")
+        return False
+    
+    @staticmethod
+    def _retry_after(response) -> float:
+        """Seconds to wait from a 429 response (JSON parameters, else Retry-After header)"""
+        try:
+            return float(response.json()['parameters']['retry_after'])
+        except (ValueError, KeyError, TypeError):
+            pass
+        try:
+            return float(response.headers.get('Retry-After', 1))
+        except (TypeError, ValueError):
+            return 1.0
+    
+    def _now_cached(self) -> str:
+        """Current IST time as 'DD-Mon-YYYY HH:MM:SS', formatted once per second"""
+        second = int(time.time())
+        if second != self._time_cache[0]:
+            self._time_cache = (second, datetime.fromtimestamp(second, IST).strftime('%d-%b-%Y %H:%M:%S'))
+        return self._time_cache[1]
+    
+    def _send_templated(self, key: str, coalesce_key: Optional[str] = None,
+                        dedupe_key: Optional[tuple] = None, **fields) -> bool:
+        """
+        Fill a message template and queue it
+        
+        Args:
+            key: TEMPLATES key
+            coalesce_key: Join with other messages for this key (see _coalesce)
+            dedupe_key: Skip the message if the last one of this kind had the
+                        same key and went out within DEDUPE_WINDOW seconds
+            **fields: Template fields; time_str defaults to the current IST time
+            
+        Returns:
+            True if queued successfully (or skipped as a duplicate)
+        """
+        if dedupe_key is not None:
+            now = time.monotonic()
+            last = self._last_key.get(key)
+            if last is not None and last[0] == dedupe_key and now - last[1] < self.DEDUPE_WINDOW:
+                logger.debug("Skipping duplicate %s notification", key)
+                return True
+            self._last_key[key] = (dedupe_key, now)
+        
+        fields.setdefault('time_str', self._now_cached())
+        message = TEMPLATES[key].format_map(fields)
+        
+        if coalesce_key is not None:
+            return self._coalesce(coalesce_key, message)
+        return self.send_message(message)
     
     def send_new_signal(self, instrument: str, option_type: str, 
                        base_price: float, rsi: float,
@@ -107,34 +498,20 @@ class TelegramNotifier:
             entry_levels: Dictionary with entry prices
             
         Returns:
-            True if sent successfully
+            True if queued successfully
         """
-        time_str = datetime.now(self.ist).strftime('%d-%b-%Y %H:%M:%S')
-        
-        message = f"""
-🔔 <b>NEW SIGNAL GENERATED</b> 🔔
-
-📊 <b>Instrument:</b> {instrument}
-📈 <b>Option:</b> {option_type.upper()}
-💰 <b>Base Price:</b> ₹{base_price:.2f}
-📉 <b>RSI:</b> {rsi:.2f}
-⏰ <b>Time:</b> {time_str}
-
-<b>📍 Entry Levels:</b>
-├ Part 1 (33.33%): ₹{entry_levels['part1']:.2f} (+5%)
-├ Part 2 (33.33%): ₹{entry_levels['part2']:.2f} (+10%)
-└ Part 3 (33.34%): ₹{entry_levels['part3']:.2f} (+15%)
-
-<i>Position Type: SELL {option_type.upper()}</i>
-        """
-        
-        return self.send_message(message)
+        return self._send_templated('new_signal',
+                                    dedupe_key=(instrument, option_type, round(base_price, 2), round(rsi, 1)),
+                                    instrument=instrument, side=option_type.upper(),
+                                    base_price=base_price, rsi=rsi, entry_levels=entry_levels)
     
     def send_entry_signal(self, instrument: str, option_type: str,
                          part: int, entry_price: float, quantity_pct: float) -> bool:
         """
         Send entry signal notification
         
+        Parts filled together (e.g. on one candle) go out as one message
+        
         Args:
             instrument: Instrument name
             option_type: 'call' or 'put'
@@ -143,25 +520,12 @@ class TelegramNotifier:
             quantity_pct: Quantity percentage
             
         Returns:
-            True if sent successfully
+            True if queued successfully
         """
-        time_str = datetime.now(self.ist).strftime('%d-%b-%Y %H:%M:%S')
-        
-        emoji_map = {1: "1️⃣", 2: "2️⃣", 3: "3️⃣"}
-        emoji = emoji_map.get(part, "✅")
-        
-        message = f"""
-{emoji} <b>ENTRY SIGNAL - PART {part}</b>
-
-📊 <b>Instrument:</b> {instrument} {option_type.upper()}
-💰 <b>Entry Price:</b> ₹{entry_price:.2f}
-📦 <b>Quantity:</b> {quantity_pct:.2f}% of capital
-⏰ <b>Time:</b> {time_str}
-
-<i>Action: SELL at ₹{entry_price:.2f}</i>
-        """
-        
-        return self.send_message(message)
+        return self._send_templated('entry', coalesce_key=instrument,
+                                    emoji=_PART_EMOJI.get(part, "✅"), part=part, instrument=instrument,
+                                    side=option_type.upper(), entry_price=entry_price,
+                                    quantity_pct=quantity_pct)
     
     def send_target_hit(self, instrument: str, option_type: str,
                        avg_entry: float, exit_price: float,
@@ -177,23 +541,10 @@ class TelegramNotifier:
             profit_pct: Profit percentage
             
         Returns:
-            True if sent successfully
-        """
-        time_str = datetime.now(self.ist).strftime('%d-%b-%Y %H:%M:%S')
-        
-        message = f"""
-🎯 <b>TARGET HIT - PROFIT BOOKED</b> 💰
-
-📊 <b>Instrument:</b> {instrument} {option_type.upper()}
-📥 <b>Avg Entry:</b> ₹{avg_entry:.2f}
-📤 <b>Exit Price:</b> ₹{exit_price:.2f}
-💵 <b>Profit:</b> +{profit_pct:.2f}%
-⏰ <b>Time:</b> {time_str}
-
-<i>✅ Position closed successfully!</i>
+            True if queued successfully
         """
-        
-        return self.send_message(message)
+        return self._send_templated('target', instrument=instrument, side=option_type.upper(),
+                                    avg_entry=avg_entry, exit_price=exit_price, profit_pct=profit_pct)
     
     def send_stop_loss_hit(self, instrument: str, option_type: str,
                           avg_entry: float, exit_price: float,
@@ -209,23 +560,10 @@ class TelegramNotifier:
             loss_pct: Loss percentage
             
         Returns:
-            True if sent successfully
-        """
-        time_str = datetime.now(self.ist).strftime('%d-%b-%Y %H:%M:%S')
-        
-        message = f"""
-⚠️ <b>STOP LOSS HIT</b> ⚠️
-
-📊 <b>Instrument:</b> {instrument} {option_type.upper()}
-📥 <b>Avg Entry:</b> ₹{avg_entry:.2f}
-📤 <b>Exit Price:</b> ₹{exit_price:.2f}
-📉 <b>Loss:</b> -{loss_pct:.2f}%
-⏰ <b>Time:</b> {time_str}
-
-<i>⛔ Position stopped out</i>
+            True if queued successfully
         """
-        
-        return self.send_message(message)
+        return self._send_templated('stop_loss', instrument=instrument, side=option_type.upper(),
+                                    avg_entry=avg_entry, exit_price=exit_price, loss_pct=loss_pct)
     
     def send_eod_close(self, instrument: str, option_type: str) -> bool:
         """
@@ -236,20 +574,9 @@ class TelegramNotifier:
             option_type: 'call' or 'put'
             
         Returns:
-            True if sent successfully
-        """
-        time_str = datetime.now(self.ist).strftime('%d-%b-%Y %H:%M:%S')
-        
-        message = f"""
-🔚 <b>FORCE CLOSE - END OF DAY</b>
-
-📊 <b>Instrument:</b> {instrument} {option_type.upper()}
-⏰ <b>Time:</b> {time_str}
-
-<i>Position closed at 3:15 PM</i>
+            True if queued successfully
         """
-        
-        return self.send_message(message)
+        return self._send_templated('eod_close', instrument=instrument, side=option_type.upper())
     
     def send_bot_started(self, instruments: List[str], config: Dict) -> bool:
         """
@@ -260,44 +587,21 @@ class TelegramNotifier:
             config: Strategy configuration
             
         Returns:
-            True if sent successfully
+            True if queued successfully
         """
-        time_str = datetime.now(self.ist).strftime('%d-%b-%Y %H:%M:%S')
-        
-        instruments_str = ", ".join(instruments)
-        
-        message = f"""
-🤖 <b>TRADING BOT STARTED</b> 🚀
-
-📊 <b>Instruments:</b> {instruments_str}
-📈 <b>RSI Length:</b> {config.get('rsi_length', 14)}
-🛑 <b>Stop Loss:</b> {config.get('stop_loss_pct', 20)}%
-🎯 <b>Target:</b> {config.get('target_pct', 10)}%
-⏰ <b>Started At:</b> {time_str}
-
-<i>Monitoring for RSI signals...</i>
-        """
-        
-        return self.send_message(message)
+        return self._send_templated('bot_started', instruments_str=", ".join(instruments),
+                                    rsi_length=config.get('rsi_length', 14),
+                                    stop_loss_pct=config.get('stop_loss_pct', 20),
+                                    target_pct=config.get('target_pct', 10))
     
     def send_bot_stopped(self) -> bool:
         """
         Send bot stopped notification
         
         Returns:
-            True if sent successfully
+            True if queued successfully
         """
-        time_str = datetime.now(self.ist).strftime('%d-%b-%Y %H:%M:%S')
-        
-        message = f"""
-🛑 <b>TRADING BOT STOPPED</b>
-
-⏰ <b>Stopped At:</b> {time_str}
-
-<i>Bot has been shut down</i>
-        """
-        
-        return self.send_message(message)
+        return self._send_templated('bot_stopped')
     
     def send_error_alert(self, error_type: str, error_message: str) -> bool:
         """
@@ -308,21 +612,10 @@ class TelegramNotifier:
             error_message: Error message
             
         Returns:
-            True if sent successfully
+            True if queued successfully
         """
-        time_str = datetime.now(self.ist).strftime('%d-%b-%Y %H:%M:%S')
-        
-        message = f"""
-❌ <b>ERROR ALERT</b>
-
-🔴 <b>Type:</b> {error_type}
-📝 <b>Message:</b> {error_message}
-⏰ <b>Time:</b> {time_str}
-
-<i>Please check the bot!</i>
-        """
-        
-        return self.send_message(message)
+        return self._send_templated('error', dedupe_key=(error_type, error_message[:64]),
+                                    error_type=error_type, error_message=error_message)
     
     def send_atm_update(self, instrument: str, old_strike: int, 
                        new_strike: int, spot: float) -> bool:
@@ -336,21 +629,11 @@ class TelegramNotifier:
             spot: Current spot price
             
         Returns:
-            True if sent successfully
-        """
-        time_str = datetime.now(self.ist).strftime('%d-%b-%Y %H:%M:%S')
-        
-        message = f"""
-🔄 <b>ATM STRIKE UPDATED</b>
-
-📊 <b>Instrument:</b> {instrument}
-📍 <b>Old Strike:</b> {old_strike}
-🆕 <b>New Strike:</b> {new_strike}
-💹 <b>Spot Price:</b> ₹{spot:.2f}
-⏰ <b>Time:</b> {time_str}
+            True if queued successfully
         """
-        
-        return self.send_message(message)
+        return self._send_templated('atm_update', dedupe_key=(instrument, old_strike, new_strike),
+                                    instrument=instrument, old_strike=old_strike,
+                                    new_strike=new_strike, spot=spot)
     
     def send_daily_summary(self, summary: Dict) -> bool:
         """
@@ -360,27 +643,19 @@ class TelegramNotifier:
             summary: Dictionary with daily statistics
             
         Returns:
-            True if sent successfully
-        """
-        date_str = datetime.now(self.ist).strftime('%d-%b-%Y')
-        
-        message = f"""
-📊 <b>DAILY SUMMARY - {date_str}</b>
-
-📈 <b>Total Signals:</b> {summary.get('total_signals', 0)}
-✅ <b>Profitable Trades:</b> {summary.get('winning_trades', 0)}
-❌ <b>Loss Trades:</b> {summary.get('losing_trades', 0)}
-💰 <b>Total P&L:</b> {summary.get('total_pnl', 0):.2f}%
-📊 <b>Win Rate:</b> {summary.get('win_rate', 0):.2f}%
-
-<i>End of day summary</i>
-        """
-        
-        return self.send_message(message)
+            True if queued successfully
+        """
+        return self._send_templated('daily_summary', date_str=self._now_cached()[:11],
+                                    total_signals=summary.get('total_signals', 0),
+                                    winning_trades=summary.get('winning_trades', 0),
+                                    losing_trades=summary.get('losing_trades', 0),
+                                    total_pnl=summary.get('total_pnl', 0),
+                                    win_rate=summary.get('win_rate', 0))
 
 
 # Utility function to get chat ID
-def get_telegram_chat_id(bot_token: str) -> Optional[str]:
+def get_telegram_chat_id(bot_token: str,
+                         session: Optional[requests.Session] = None) -> Optional[str]:
     """
     Helper function to get your Telegram chat ID
     
@@ -392,13 +667,18 @@ def get_telegram_chat_id(bot_token: str) -> Optional[str]:
     
     Args:
         bot_token: Your bot token from BotFather
+        session: Session to reuse (pass the same one to TelegramNotifier
+                 so its first calls skip the TLS handshake)
         
     Returns:
         Chat ID as string or None
     """
+    if session is None:
+        session = TelegramNotifier.new_session()
+    
     try:
         url = f"https://api.telegram.org/bot{bot_token}/getUpdates"
-        response = requests.get(url, timeout=10)
+        response = session.get(url, timeout=10)
         
         if response.status_code == 200:
             data = response.json()
@@ -451,7 +731,9 @@ if __name__ == "__main__":
     print("- Press Enter to continue...")
     input()
     
-    chat_id = get_telegram_chat_id(bot_token)
+    # One session for the whole setup: getUpdates, getMe and the test send
+    session = TelegramNotifier.new_session()
+    chat_id = get_telegram_chat_id(bot_token, session)
     
     if not chat_id:
         print("❌ Could not get chat ID. Please try again.")
@@ -467,7 +749,7 @@ if __name__ == "__main__":
     print("Sending test notification...")
     print("="*60)
     
-    notifier = TelegramNotifier(bot_token, chat_id)
+    notifier = TelegramNotifier(bot_token, chat_id, session=session)
     
     # Send test message
     test_message = """
@@ -478,7 +760,7 @@ if __name__ == "__main__":
 You will receive trading signals here.
     """
     
-    if notifier.send_message(test_message):
+    if notifier.send_message(test_message, wait=True):
         print("✅ Test message sent successfully!")
         print("Check your Telegram to confirm.")
     else:
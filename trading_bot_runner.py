@@ -3,11 +3,15 @@ Main Runner Script
 Integrates RSI Options Strategy with Dhan Live Data Feed
 """
 
+import atexit
+import queue
 import time
 import logging
+import logging.handlers
 from datetime import datetime
-import pytz
-from typing import Dict
+import numpy as np
+from zoneinfo import ZoneInfo
+from typing import Dict, NamedTuple
 import sys
 import os
 
@@ -15,23 +19,62 @@ from rsi_options_strategy import RSIOptionsStrategy
 from dhan_datafeed import DhanDataFeed
 from telegram_notifier import TelegramNotifier
 
-# Configure logging
+# Configure logging: records are formatted by the emitting thread, then
+# queued and written by a listener thread, so the tick loop never waits on
+# file or console I/O. force=True replaces the handlers the strategy module
+# installs on import
+_log_queue = queue.SimpleQueue()
+_log_listener = logging.handlers.QueueListener(
+    _log_queue,
+    logging.FileHandler('trading_bot.log'),
+    logging.StreamHandler()
+)
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('trading_bot.log'),
-        logging.StreamHandler()
-    ]
+    handlers=[logging.handlers.QueueHandler(_log_queue)],
+    force=True
 )
+_log_listener.start()
+atexit.register(_log_listener.stop)  # Drains queued records at exit
 logger = logging.getLogger(__name__)
 
+IST = ZoneInfo('Asia/Kolkata')
+
+# Candle array layout: ohlc[instrument index, side, field]
+SIDES = ('call', 'put')
+SIDE_INDEX = {side: i for i, side in enumerate(SIDES)}
+OPEN, HIGH, LOW, CLOSE = range(4)
+
+
+def _log_banner(char: str, title: str, *lines: str):
+    """Log a banner (title and lines between rules of `char`) as a single record"""
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    rule = char * 60
+    text = f"\n{rule}\n{title}\n{rule}\n"
+    if lines:
+        text += "\n".join(lines) + f"\n{rule}\n"
+    logger.info(text)
+
+
+class OptionTick(NamedTuple):
+    """One streamed option trade, queued from the feed thread to the main loop"""
+    instrument: str
+    side: str        # 'call' or 'put'
+    strike: int
+    ltp: float
+    ts: float        # Epoch seconds (time.time())
+
 
 class TradingBot:
     """
     Main trading bot that connects strategy with live data
     """
     
+    ATM_UPDATE_INTERVAL = 300  # Seconds between ATM strike checks
+    CLOCK_CHECK_INTERVAL = 1   # Seconds between trading-hours / EOD checks
+    
     def __init__(self, client_id: str, access_token: str, config: Dict, 
                  telegram_config: Dict = None):
         """
@@ -43,8 +86,6 @@ class TradingBot:
             config: Strategy configuration
             telegram_config: Telegram configuration dict with bot_token and chat_id
         """
-        self.ist = pytz.timezone('Asia/Kolkata')
-        
         # Initialize Telegram notifier (optional)
         self.telegram = None
         if telegram_config and telegram_config.get('enabled'):
@@ -55,7 +96,7 @@ class TradingBot:
                     telegram_config['chat_id']
                 )
             except Exception as e:
-                logger.warning(f"Telegram initialization failed: {e}")
+                logger.warning("Telegram initialization failed: %s", e)
                 logger.warning("Continuing without Telegram notifications")
         
         # Initialize data feed
@@ -68,8 +109,19 @@ class TradingBot:
         
         # Tracking variables
         self.current_atm_strikes = {}
-        self.last_candle_time = {}
-        self.candle_data = {}  # Store OHLC for 1-min candles
+        
+        # 1-min candles, one (call, put) x OHLC block per instrument; NaN
+        # until the side's first tick of the minute. last_min holds each
+        # instrument's candle minute (epoch minutes, 0 = none yet) and
+        # _minute the newest minute flushed for all of them
+        self.inst_idx = {inst: i for i, inst in enumerate(self.strategy.instruments)}
+        self.ohlc = np.full((len(self.inst_idx), len(SIDES), 4), np.nan)
+        self.last_min = np.zeros(len(self.inst_idx), dtype=np.int64)
+        self._minute = 0
+        
+        # Websocket ticks, filled by the feed thread and drained by run()
+        self._tick_q = queue.Queue()
+        self._stream = None
         
         logger.info("Trading bot initialized successfully")
     
@@ -77,57 +129,86 @@ class TradingBot:
         """
         Initialize ATM strikes and option symbols for all instruments
         """
-        logger.info("\n" + "="*60)
-        logger.info("INITIALIZING INSTRUMENTS")
-        logger.info("="*60)
+        # Spot prices and expiries for all instruments, fetched concurrently
+        warmup = self.data_feed.warmup(self.strategy.instruments, need_chain=False)
+        spot_prices = warmup['spots']
+        
+        # Per-instrument summary, logged as one banner at the end
+        log_lines = [] if logger.isEnabledFor(logging.INFO) else None
         
         for instrument in self.strategy.instruments:
             try:
                 # Get spot price
-                spot_price = self.data_feed.get_spot_price(instrument)
+                spot_price = spot_prices.get(instrument)
                 if not spot_price:
-                    logger.error(f"Failed to get spot price for {instrument}")
+                    logger.error("Failed to get spot price for %s", instrument)
                     continue
                 
                 # Calculate ATM strike
                 atm_strike = self.data_feed.get_atm_strike(spot_price, instrument)
                 
                 # Get expiry
-                expiry = self.data_feed.get_weekly_expiry(instrument)
+                expiry = warmup['expiries'][instrument]
                 
                 # Store for this instrument
-                self.current_atm_strikes[instrument] = {
-                    'spot': spot_price,
-                    'strike': atm_strike,
-                    'expiry': expiry
-                }
+                self.set_atm(instrument, spot_price, atm_strike, expiry)
                 
                 # Initialize candle tracking
-                self.last_candle_time[instrument] = None
-                self.candle_data[instrument] = {
-                    'call': {'open': None, 'high': None, 'low': None, 'close': None},
-                    'put': {'open': None, 'high': None, 'low': None, 'close': None}
-                }
+                self.ohlc[self.inst_idx[instrument]].fill(np.nan)
                 
-                logger.info(f"\n{instrument}:")
-                logger.info(f"  Spot Price: ₹{spot_price:.2f}")
-                logger.info(f"  ATM Strike: {atm_strike}")
-                logger.info(f"  Expiry: {expiry}")
+                if log_lines is not None:
+                    log_lines += [
+                        f"\n{instrument}:",
+                        f"  Spot Price: ₹{spot_price:.2f}",
+                        f"  ATM Strike: {atm_strike}",
+                        f"  Expiry: {expiry}",
+                    ]
                 
             except Exception as e:
-                logger.error(f"Error initializing {instrument}: {e}")
+                logger.error("Error initializing %s: %s", instrument, e)
+        
+        if log_lines is not None:
+            _log_banner('=', "INITIALIZING INSTRUMENTS", *log_lines)
+    
+    def set_atm(self, instrument: str, spot_price: float, strike: int, expiry: str):
+        """
+        Store an instrument's ATM strike with its call/put contract tuples
         
-        logger.info("\n" + "="*60 + "\n")
+        The tuples are built, and their security IDs resolved into the data
+        feed's cache, once per ATM change rather than on every subscribe
+        
+        Args:
+            instrument: Instrument name
+            spot_price: Spot price the strike was derived from
+            strike: ATM strike
+            expiry: Expiry in DD-MMM-YYYY format
+        """
+        self.data_feed.get_option_security_ids(instrument, [strike], expiry)
+        self.current_atm_strikes[instrument] = {
+            'spot': spot_price,
+            'strike': strike,
+            'expiry': expiry,
+            'contracts': ((instrument, strike, expiry, 'CE'),
+                          (instrument, strike, expiry, 'PE'))
+        }
     
-    def update_atm_strikes(self):
+    def update_atm_strikes(self) -> bool:
         """
         Update ATM strikes periodically (every 5 minutes)
         Only updates if spot has moved significantly
+        
+        Returns:
+            True if any instrument's ATM strike changed
         """
+        changed = False
+        
+        # All spot prices in one API call
+        spot_prices = self.data_feed.get_spot_prices(self.strategy.instruments)
+        
         for instrument in self.strategy.instruments:
             try:
                 # Get current spot
-                spot_price = self.data_feed.get_spot_price(instrument)
+                spot_price = spot_prices.get(instrument)
                 if not spot_price:
                     continue
                 
@@ -139,13 +220,11 @@ class TradingBot:
                     old_atm = self.current_atm_strikes[instrument]['strike']
                     
                     if new_atm != old_atm:
-                        logger.info(f"\n{'~'*60}")
-                        logger.info(f"ATM STRIKE UPDATED - {instrument}")
-                        logger.info(f"{'~'*60}")
-                        logger.info(f"Old ATM: {old_atm}")
-                        logger.info(f"New ATM: {new_atm}")
-                        logger.info(f"Spot: ₹{spot_price:.2f}")
-                        logger.info(f"{'~'*60}\n")
+                        if logger.isEnabledFor(logging.INFO):
+                            _log_banner('~', f"ATM STRIKE UPDATED - {instrument}",
+                                        f"Old ATM: {old_atm}",
+                                        f"New ATM: {new_atm}",
+                                        f"Spot: ₹{spot_price:.2f}")
                         
                         # Send Telegram notification
                         if self.telegram:
@@ -154,20 +233,61 @@ class TradingBot:
                             )
                         
                         # Update strike
-                        self.current_atm_strikes[instrument]['strike'] = new_atm
-                        self.current_atm_strikes[instrument]['spot'] = spot_price
+                        changed = True
+                        self.set_atm(instrument, spot_price, new_atm,
+                                     self.current_atm_strikes[instrument]['expiry'])
                         
                         # Reset candle data for new strike
-                        self.candle_data[instrument] = {
-                            'call': {'open': None, 'high': None, 'low': None, 'close': None},
-                            'put': {'open': None, 'high': None, 'low': None, 'close': None}
-                        }
+                        self.ohlc[self.inst_idx[instrument]].fill(np.nan)
                 
             except Exception as e:
-                logger.error(f"Error updating ATM for {instrument}: {e}")
+                logger.error("Error updating ATM for %s: %s", instrument, e)
+        
+        return changed
+    
+    def start_stream(self):
+        """
+        (Re)subscribe the websocket feed to every instrument's ATM call and put
+        """
+        self.stop_stream()
+        
+        contracts = [
+            contract
+            for atm in self.current_atm_strikes.values()
+            for contract in atm['contracts']
+        ]
+        
+        self._stream = self.data_feed.stream_options(contracts, self._on_stream_tick)
+    
+    def stop_stream(self):
+        """Close the websocket feed if it is running"""
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream = None
+    
+    def _on_stream_tick(self, contract, ltp: float):
+        """Feed thread callback: timestamp the tick and hand it to run()"""
+        instrument, strike, _, option_type = contract
+        self._tick_q.put(OptionTick(
+            instrument,
+            'call' if option_type == 'CE' else 'put',
+            strike,
+            ltp,
+            time.time()
+        ))
+    
+    def _handle_tick(self, tick: OptionTick):
+        """Feed one queued tick into the candles (run loop helper)"""
+        # Ticks queued for a strike that was just replaced are dropped
+        if tick.strike != self.current_atm_strikes[tick.instrument]['strike']:
+            return
+        try:
+            self.process_option_tick(tick.instrument, tick.side, tick.ltp, tick.ts)
+        except Exception as e:
+            logger.error("Error processing %s: %s", tick.instrument, e)
     
     def process_option_tick(self, instrument: str, option_type: str, 
-                           ltp: float, current_time: datetime):
+                           ltp: float, current_ts: float):
         """
         Process tick data and build 1-minute candles
         
@@ -175,58 +295,72 @@ class TradingBot:
             instrument: Instrument name
             option_type: 'call' or 'put'
             ltp: Last traded price
-            current_time: Current time
+            current_ts: Tick time in epoch seconds
         """
-        # Get current minute (floor to minute)
-        current_minute = current_time.replace(second=0, microsecond=0)
+        # Close the previous minute's candles first (one compare per tick)
+        current_minute = int(current_ts // 60)
+        if current_minute > self._minute:
+            self.flush_minute(current_minute)
+        elif current_minute < self._minute:
+            # Late tick for a minute already closed: it must not leak into
+            # the current candle
+            logger.debug("Dropping late %s %s tick from a closed minute", instrument, option_type)
+            return
         
-        # Check if this is a new candle
-        last_minute = self.last_candle_time.get(instrument)
+        candle = self.ohlc[self.inst_idx[instrument], SIDE_INDEX[option_type]]
+        if candle[CLOSE] != candle[CLOSE]:
+            # First tick of this side in the minute
+            candle[:] = ltp
+        else:
+            # Update current candle
+            if ltp > candle[HIGH]:
+                candle[HIGH] = ltp
+            if ltp < candle[LOW]:
+                candle[LOW] = ltp
+            candle[CLOSE] = ltp
+    
+    def flush_minute(self, current_minute: int):
+        """
+        Process every candle from before current_minute and start new ones
         
-        if last_minute is None or current_minute > last_minute:
-            # New candle - process previous candle if exists
-            if last_minute is not None:
-                candle = self.candle_data[instrument][option_type]
-                
-                if candle['close'] is not None:
-                    # Process completed candle
+        Instruments are checked in one array compare; the Python loop only
+        runs for those whose candle actually closes
+        
+        Args:
+            current_minute: Current time in epoch minutes
+        """
+        closed = self.last_min < current_minute
+        for i in np.flatnonzero(closed):
+            instrument = self.strategy.instruments[i]
+            for s, side in enumerate(SIDES):
+                close = self.ohlc[i, s, CLOSE]
+                if close == close:  # Not NaN: the side ticked that minute
                     self.strategy.process_tick(
                         instrument,
-                        option_type,
-                        candle['close'],
-                        candle['high']
+                        side,
+                        float(close),
+                        float(self.ohlc[i, s, HIGH])
                     )
-            
-            # Start new candle
-            self.candle_data[instrument][option_type] = {
-                'open': ltp,
-                'high': ltp,
-                'low': ltp,
-                'close': ltp
-            }
-            
-            self.last_candle_time[instrument] = current_minute
         
-        else:
-            # Update current candle
-            candle = self.candle_data[instrument][option_type]
-            candle['high'] = max(candle['high'], ltp)
-            candle['low'] = min(candle['low'], ltp)
-            candle['close'] = ltp
+        self.ohlc[closed] = np.nan
+        self.last_min[closed] = current_minute
+        self._minute = current_minute
     
     def run(self):
         """
-        Main loop - fetch data and process ticks
+        Main loop - process streamed ticks as they arrive
+        
+        Blocks on the tick queue until a tick arrives or the next deadline
+        (clock check, minute close or ATM update) is due, so ticks are
+        handled immediately and scheduled work still runs when it is quiet
         """
-        logger.info("\n" + "="*60)
-        logger.info("TRADING BOT STARTED")
-        logger.info("="*60)
-        logger.info(f"Instruments: {', '.join(self.strategy.instruments)}")
-        logger.info(f"RSI Length: {self.strategy.rsi_length}")
-        logger.info(f"Stop Loss: {self.strategy.stop_loss_pct * 100}%")
-        logger.info(f"Target: {self.strategy.target_pct * 100}%")
-        logger.info(f"Trading Hours: 09:18 to 15:15 IST")
-        logger.info("="*60 + "\n")
+        if logger.isEnabledFor(logging.INFO):
+            _log_banner('=', "TRADING BOT STARTED",
+                        f"Instruments: {', '.join(self.strategy.instruments)}",
+                        f"RSI Length: {self.strategy.rsi_length}",
+                        f"Stop Loss: {self.strategy.stop_loss_pct * 100}%",
+                        f"Target: {self.strategy.target_pct * 100}%",
+                        "Trading Hours: 09:18 to 15:15 IST")
         
         # Send Telegram notification
         if self.telegram:
@@ -242,96 +376,87 @@ class TradingBot:
         # Initialize instruments
         self.initialize_instruments()
         
-        # Track iterations for periodic updates
-        iteration = 0
+        # Periodic work runs on monotonic deadlines, independent of how
+        # many ticks (or loop iterations) arrive in between
+        now = time.monotonic()
+        deadlines = {
+            'atm': now + self.ATM_UPDATE_INTERVAL,
+            'clock': now,
+            'minute': now + 60 - time.time() % 60,
+        }
         
         try:
             while True:
-                current_time = datetime.now(self.ist)
+                now = time.monotonic()
                 
-                # Check trading hours
-                if not self.strategy.is_trading_hours():
-                    if current_time.time().hour < 9:
+                # Check the clock about once a second, not on every tick
+                if now >= deadlines['clock']:
+                    deadlines['clock'] = now + self.CLOCK_CHECK_INTERVAL
+                    current_time = datetime.now(IST)
+                    
+                    # Check for end of day (before the hours check, which
+                    # is already False once end_time has passed)
+                    if current_time.time() >= self.strategy.end_time:
+                        self.strategy.force_close_eod()
+                        logger.info("End of trading day. Stopping bot.")
+                        break
+                    
+                    # Check trading hours
+                    if not self.strategy.is_trading_hours(current_time):
                         logger.info("Market not yet open. Waiting...")
                         time.sleep(60)
-                    else:
-                        logger.info("Market closed for the day.")
-                        break
-                    continue
-                
-                # Update ATM strikes every 5 minutes (300 iterations at 1 sec interval)
-                if iteration % 300 == 0 and iteration > 0:
-                    self.update_atm_strikes()
-                
-                # Process each instrument
-                for instrument in self.strategy.instruments:
-                    if instrument not in self.current_atm_strikes:
                         continue
                     
-                    try:
-                        strike = self.current_atm_strikes[instrument]['strike']
-                        expiry = self.current_atm_strikes[instrument]['expiry']
-                        
-                        # Get call option data
-                        call_data = self.data_feed.get_option_price(
-                            instrument, strike, expiry, 'CE'
-                        )
-                        
-                        if call_data:
-                            self.process_option_tick(
-                                instrument,
-                                'call',
-                                call_data['ltp'],
-                                current_time
-                            )
-                        
-                        # Get put option data
-                        put_data = self.data_feed.get_option_price(
-                            instrument, strike, expiry, 'PE'
-                        )
-                        
-                        if put_data:
-                            self.process_option_tick(
-                                instrument,
-                                'put',
-                                put_data['ltp'],
-                                current_time
-                            )
-                        
-                        # Small delay to avoid rate limiting
-                        time.sleep(0.2)
-                        
-                    except Exception as e:
-                        logger.error(f"Error processing {instrument}: {e}")
+                    # Subscribe once; the feed then pushes every trade
+                    if self._stream is None:
+                        self.start_stream()
+                
+                # Update ATM strikes every 5 minutes, resubscribing on a change
+                if now >= deadlines['atm']:
+                    deadlines['atm'] = now + self.ATM_UPDATE_INTERVAL
+                    if self.update_atm_strikes():
+                        self.start_stream()
                 
-                # Check for end of day
-                if current_time.time() >= self.strategy.end_time:
-                    self.strategy.force_close_eod()
-                    logger.info("End of trading day. Stopping bot.")
-                    break
+                # Close finished candles at the minute boundary, even when
+                # no tick arrives to trigger it
+                if now >= deadlines['minute']:
+                    wall = time.time()
+                    deadlines['minute'] = now + 60 - wall % 60
+                    current_minute = int(wall // 60)
+                    if current_minute > self._minute:
+                        # Ticks already queued belong to the closing minute
+                        # (or earlier); they go into its candles first
+                        while True:
+                            try:
+                                self._handle_tick(self._tick_q.get_nowait())
+                            except queue.Empty:
+                                break
+                        if current_minute > self._minute:
+                            self.flush_minute(current_minute)
                 
-                iteration += 1
+                try:
+                    tick = self._tick_q.get(timeout=max(0.0, min(deadlines.values()) - time.monotonic()))
+                except queue.Empty:
+                    continue
                 
-                # Wait before next iteration (adjust based on needs)
-                # 1 second interval means we update every second
-                time.sleep(1)
+                self._handle_tick(tick)
                 
         except KeyboardInterrupt:
             logger.info("\n\nBot stopped by user (Ctrl+C)")
-            if self.strategy.position_state['cycle_active']:
+            if self.strategy.position_state.cycle_active:
                 logger.info("WARNING: Active position exists. Please manage manually.")
         
         except Exception as e:
-            logger.error(f"Critical error in main loop: {e}", exc_info=True)
+            logger.error("Critical error in main loop: %s", e, exc_info=True)
         
         finally:
+            self.stop_stream()
+            
             # Send Telegram notification
             if self.telegram:
                 self.telegram.send_bot_stopped()
             
-            logger.info("\n" + "="*60)
-            logger.info("TRADING BOT STOPPED")
-            logger.info("="*60)
+            _log_banner('=', "TRADING BOT STOPPED")
 
 
 def main():
@@ -405,7 +530,7 @@ def main():
         bot = TradingBot(CLIENT_ID, ACCESS_TOKEN, config, telegram_config)
         bot.run()
     except Exception as e:
-        logger.error(f"Failed to start bot: {e}", exc_info=True)
+        logger.error("Failed to start bot: %s", e, exc_info=True)
 
 
 if __name__ == "__main__":